@@ -9,16 +9,22 @@ so that decorated functions remain importable.
 """
 
 # Define the rust to python module version and functions
-from ._pysealer import generate_keypair, generate_signature, verify_signature
+from ._pysealer import SigningKey, VerifyingKey, VerdictMemo, generate_keypair, generate_signature, generate_signatures, verify_signature, verify_signatures, reencode_seal, digest, merkle_root, seal_file, verify_file
 
 __version__ = "0.7.0"
-__all__ = ["generate_keypair", "generate_signature", "verify_signature"]
+__all__ = ["SigningKey", "VerifyingKey", "VerdictMemo", "generate_keypair", "generate_signature", "generate_signatures", "verify_signature", "verify_signatures", "reencode_seal", "digest", "merkle_root", "seal_file", "verify_file", "Sealer", "install_import_guard", "uninstall_import_guard"]
 
 # Ensure dummy decorators are registered on import
 from . import dummy_decorators
 
+# Python API, imported on first use so that importing a sealed module stays cheap
+_LAZY_ATTRIBUTES = {"Sealer": "sealer", "install_import_guard": "import_guard", "uninstall_import_guard": "import_guard"}
+
 # Allow dynamic decorator resolution for @pyseal._<sig>()
 def __getattr__(name):
+	if name in _LAZY_ATTRIBUTES:
+		from importlib import import_module
+		return getattr(import_module(f".{_LAZY_ATTRIBUTES[name]}", __name__), name)
 	if name.startswith("_"):
 		return dummy_decorators._dummy_decorator
 	raise AttributeError(f"module 'pysealer' has no attribute '{name}'")
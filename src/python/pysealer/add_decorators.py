@@ -1,137 +1,132 @@
 """Automatically add cryptographic decorators to all functions and classes in a python file."""
 
-import ast
-import copy
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from pysealer import generate_signature
-from .setup import get_private_key
+from typing import List, Optional, Tuple
+from pysealer import SigningKey, merkle_root, seal_file
+from .setup import get_signing_key
+from .source_index import ROOT_MARKER, SourceIndex
+from .scheduling import largest_first
+from .discovery import find_python_files
+from . import profiling
 
-def add_decorators(file_path: str) -> tuple[str, bool]:
+# Seal modes: "plain" signs the source itself, "blake3" signs a BLAKE3 digest of the source
+# and is recorded in the decorator as @pysealer._b3_<signature>()
+SEAL_MODES = ("plain", "blake3")
+
+# Signature encodings: "base32" is recorded in the decorator as @pysealer._b32_<signature>(),
+# "base58" is the original untagged encoding
+SEAL_ENCODINGS = ("base32", "base58")
+
+# Files sealed with root=True carry a ROOT_MARKER comment holding a signature over the Merkle
+# root of the BLAKE3 digests of every sealed function/class, so an unchanged file verifies at once
+
+def check_seal_options(mode: str, encoding: str) -> None:
+    """Reject unknown seal modes and encodings before any file is touched."""
+    if mode not in SEAL_MODES:
+        raise ValueError(f"Unknown seal mode '{mode}', expected one of: {', '.join(SEAL_MODES)}")
+    if encoding not in SEAL_ENCODINGS:
+        raise ValueError(f"Unknown seal encoding '{encoding}', expected one of: {', '.join(SEAL_ENCODINGS)}")
+
+
+def _apply_seal_plan(content: str, remove_lines: List[int], insertions: List[Tuple[int, int, str]]) -> List[str]:
     """
-    Parse a Python file, add decorators to all functions and classes, and return the modified code.
+    Rewrite the source lines in one pass: drop old pysealer lines and insert the new decorators.
     
     Args:
-        file_path: Path to the Python file to process
-        
-    Returns:
-        Tuple of (modified Python source code as a string, whether any decorators were added)
+        content: Python source code of the file
+        remove_lines: 0-based lines of existing pysealer decorators and root markers
+        insertions: (0-based line to insert before, indentation, signature) per sealed function/class
     """
-    # Read the entire file content into a string
-    with open(file_path, 'r') as f:
-        content = f.read()
-
-    # Split content into lines for manipulation
-    lines = content.split('\n')
-
-    # Parse the Python source code into an Abstract Syntax Tree (AST)
-    tree = ast.parse(content)
-    
-    # First pass: Remove existing pysealer decorators
-    lines_to_remove = set()
-    for node in ast.walk(tree):
-        if type(node).__name__ in ("FunctionDef", "AsyncFunctionDef", "ClassDef"):
-            if hasattr(node, 'decorator_list'):
-                for decorator in node.decorator_list:
-                    is_pysealer_decorator = False
-                    
-                    if isinstance(decorator, ast.Name):
-                        if decorator.id.startswith("pysealer"):
-                            is_pysealer_decorator = True
-                    elif isinstance(decorator, ast.Attribute):
-                        if isinstance(decorator.value, ast.Name) and decorator.value.id == "pysealer":
-                            is_pysealer_decorator = True
-                    elif isinstance(decorator, ast.Call):
-                        func = decorator.func
-                        if isinstance(func, ast.Attribute):
-                            if isinstance(func.value, ast.Name) and func.value.id == "pysealer":
-                                is_pysealer_decorator = True
-                        elif isinstance(func, ast.Name) and func.id.startswith("pysealer"):
-                            is_pysealer_decorator = True
-                    
-                    if is_pysealer_decorator:
-                        # Mark this line for removal (convert to 0-indexed)
-                        lines_to_remove.add(decorator.lineno - 1)
-    
-    # Remove the marked lines (in reverse order to preserve indices)
-    for line_idx in sorted(lines_to_remove, reverse=True):
-        del lines[line_idx]
-    
-    # Re-parse the content after removing decorators to get updated line numbers
-    modified_content = '\n'.join(lines)
-    tree = ast.parse(modified_content)
-    
-    # Build parent map for all nodes
-    parent_map = {}
-    for parent in ast.walk(tree):
-        for child in ast.iter_child_nodes(parent):
-            parent_map[child] = parent
-
-    decorators_to_add = []
-
-    for node in ast.walk(tree):
-        node_type = type(node).__name__
-
-        # Only decorate:
-        # - Top-level functions (not inside a class)
-        # - Top-level classes
-        if node_type in ("FunctionDef", "AsyncFunctionDef"):
-            parent = parent_map.get(node)
-            if isinstance(parent, ast.ClassDef):
-                continue  # skip methods inside classes
-        elif node_type == "ClassDef":
-            pass  # always decorate classes
-        else:
-            continue
+    removed = set(remove_lines)
+    inserted = {line_idx: (col_offset, signature) for line_idx, col_offset, signature in insertions}
+    
+    lines = []
+    for line_idx, line in enumerate(content.split('\n')):
+        if line_idx in inserted:
+            col_offset, signature = inserted[line_idx]
+            lines.append(f"{' ' * col_offset}@pysealer._{signature}()")
+        if line_idx not in removed:
+            lines.append(line)
+    
+    return lines
 
-        # Extract the complete source code of this function/class for hashing
-        # Use original source to preserve formatting (quotes, spacing, etc.)
-        start_line = node.lineno - 1
-        end_line = node.end_lineno if hasattr(node, 'end_lineno') and node.end_lineno else node.lineno
-        
-        # Get the source lines for this node
-        source_lines = lines[start_line:end_line]
+
+def _seal_natively(file_path: str, content: str, signing_key: SigningKey, mode: str = "plain", encoding: str = "base32", root: bool = False) -> Tuple[List[str], int, Optional[str]]:
+    """
+    Sign all functions and classes with the native engine and insert their decorators.
+    
+    The Rust extension reads, parses and signs the whole file in one call and returns
+    which existing pysealer decorator lines to drop and where to insert the new ones.
+    With a root seal, seals of functions/classes that did not change are reused.
+    
+    Args:
+        file_path: Path to the Python file to process
+        content: Python source code of the file
+        signing_key: Decoded signing key
+        mode: Seal mode, one of SEAL_MODES
+        encoding: Signature encoding, one of SEAL_ENCODINGS
+        root: Whether to also create the file's root seal
         
-        # Filter out pysealer decorator lines
-        filtered_lines = []
-        for line in source_lines:
-            stripped = line.strip()
-            # Skip lines that are pysealer decorators
-            if stripped.startswith('@pysealer.') or stripped.startswith('@pysealer'):
-                continue
-            filtered_lines.append(line)
+    Returns:
+        Tuple of (modified source lines, number of decorators added, root seal or None)
         
-        function_source = '\n'.join(filtered_lines)
-
-        try:
-            private_key = get_private_key()
-        except (FileNotFoundError, ValueError) as e:
-            raise RuntimeError(f"Cannot add decorators: {e}. Please run 'pysealer init' first.")
-
-        try:
-            signature = generate_signature(function_source, private_key)
-        except Exception as e:
-            raise RuntimeError(f"Failed to generate signature: {e}")
-
-        decorator_line = node.lineno - 1
-        if hasattr(node, 'decorator_list') and node.decorator_list:
-            decorator_line = node.decorator_list[0].lineno - 1
+    Raises:
+        ValueError: If the native engine cannot handle the file
+    """
+    with profiling.phase("seal (native)"):
+        remove_lines, insertions, root_seal = seal_file(file_path, signing_key, mode, encoding, root)
+    return _apply_seal_plan(content, remove_lines, insertions), len(insertions), root_seal
 
-        decorators_to_add.append((decorator_line, node.col_offset, signature))
 
-    # If no decorators to add, return original content
-    if not decorators_to_add:
-        return content, False
+def _seal_with_ast(content: str, signing_key: SigningKey, mode: str = "plain", encoding: str = "base32", root: bool = False) -> Tuple[List[str], int, Optional[str]]:
+    """
+    Sign all functions and classes using Python's ast module and insert their decorators.
     
-    # Sort in reverse order to add from bottom to top (preserves line numbers)
-    decorators_to_add.sort(reverse=True)
-
-    # Add decorators to the lines first
-    for line_idx, col_offset, signature in decorators_to_add:
-        indent = ' ' * col_offset
-        decorator_line = f"{indent}@pysealer._{signature}()"
-        lines.insert(line_idx, decorator_line)
+    Args:
+        content: Python source code of the file
+        signing_key: Decoded signing key
+        mode: Seal mode, one of SEAL_MODES
+        encoding: Signature encoding, one of SEAL_ENCODINGS
+        root: Whether to also create the file's root seal
+        
+    Returns:
+        Tuple of (modified source lines, number of decorators added, root seal or None)
+    """
+    index = SourceIndex(content)
     
-    # Now add 'import pysealer' at the top if not present
+    # Existing pysealer decorators and root seals are dropped, the root is recreated below if requested
+    remove_lines = index.sealer_lines.union(index.root_marker_lines)
+    
+    # Only decorate top-level functions, functions not defined directly in a class, and all classes
+    targets = [symbol for symbol in index.symbols if not symbol.is_method]
+    
+    # If no decorators to add, leave the file unchanged
+    if not targets:
+        return content.split('\n'), 0, None
+    
+    # Sign every function/class in a single call into the Rust extension
+    try:
+        with profiling.phase("segments"):
+            sources = [index.segment(symbol) for symbol in targets]
+        with profiling.phase("sign"):
+            signatures = signing_key.sign_many(sources, mode, encoding)
+            root_seal = signing_key.sign(bytes.fromhex(merkle_root(sources)), "plain", encoding) if root else None
+    except Exception as e:
+        raise RuntimeError(f"Failed to generate signature: {e}")
+    
+    insertions = [
+        (symbol.insert_line, symbol.col_offset, signature)
+        for symbol, signature in zip(targets, signatures)
+    ]
+    
+    return _apply_seal_plan(content, remove_lines, insertions), len(insertions), root_seal
+
+
+def _add_import(lines: List[str]) -> None:
+    """Add 'import pysealer' to the source lines if it is not already imported."""
     has_import_pysealer = any(
         line.strip() == 'import pysealer' or line.strip().startswith('import pysealer') or line.strip().startswith('from pysealer')
         for line in lines
@@ -178,21 +173,158 @@ def add_decorators(file_path: str) -> tuple[str, bool]:
             if insert_at + 1 < len(lines) and lines[insert_at + 1].strip() != '':
                 lines.insert(insert_at + 1, '')
 
+
+def _add_root_marker(lines: List[str], root_seal: str) -> None:
+    """Insert the file's root seal as a module-level comment right below 'import pysealer'."""
+    marker = f"{ROOT_MARKER}{root_seal}"
+    for index, line in enumerate(lines):
+        if line.startswith('import pysealer') or line.startswith('from pysealer'):
+            lines.insert(index + 1, marker)
+            return
+    lines.insert(0, marker)
+
+
+def add_decorators(file_path: str, signing_key: Optional[SigningKey] = None, mode: str = "plain", encoding: str = "base32", root: bool = False) -> tuple[str, bool]:
+    """
+    Parse a Python file, add decorators to all functions and classes, and return the modified code.
+    
+    Args:
+        file_path: Path to the Python file to process
+        signing_key: Decoded signing key to reuse. If None, the key is loaded from the .env file.
+        mode: Seal mode, one of SEAL_MODES. "blake3" signs a digest of each function/class,
+            which is cheaper for very large classes.
+        encoding: Signature encoding, one of SEAL_ENCODINGS. "base32" is much faster to
+            decode than the original "base58".
+        root: Whether to also add a file-level root seal. Unchanged files then verify with a
+            single signature check, and re-locking only signs the functions/classes that changed.
+        
+    Returns:
+        Tuple of (modified Python source code as a string, whether any decorators were added)
+    """
+    _, modified_code, added = read_and_seal(file_path, signing_key, mode, encoding, root)
+    return modified_code, added
+
+
+def read_and_seal(file_path: str, signing_key: Optional[SigningKey] = None, mode: str = "plain", encoding: str = "base32", root: bool = False) -> Tuple[str, str, bool]:
+    """
+    Read a Python file once and seal it, as add_decorators does, also returning the source it read.
+
+    Lets a caller tell whether sealing changes the file without reading it a second time.
+
+    Returns:
+        Tuple of (source code as read, modified source code, whether any decorators were added)
+    """
+    check_seal_options(mode, encoding)
+
+    if signing_key is None:
+        signing_key = load_signing_key()
+
+    # Read the entire file content into a string
+    with profiling.phase("read"):
+        with open(file_path, 'r') as f:
+            content = f.read()
+
+    try:
+        lines, added, root_seal = _seal_natively(file_path, content, signing_key, mode, encoding, root)
+    except ValueError:
+        # The native parser could not handle this file, fall back to Python's ast module
+        lines, added, root_seal = _seal_with_ast(content, signing_key, mode, encoding, root)
+
+    # If no decorators to add, return original content
+    if not added:
+        return content, content, False
+
+    # Now add 'import pysealer' at the top if not present
+    _add_import(lines)
+
+    if root_seal:
+        _add_root_marker(lines, root_seal)
+
     # Join lines back together
     modified_code = '\n'.join(lines)
 
-    return modified_code, True
+    return content, modified_code, True
+
+
+def load_signing_key() -> SigningKey:
+    """Load the signing key handle, reporting a missing or invalid key as a RuntimeError."""
+    try:
+        with profiling.phase("env"):
+            return get_signing_key()
+    except (FileNotFoundError, ValueError) as e:
+        raise RuntimeError(f"Cannot add decorators: {e}. Please run 'pysealer init' first.")
+
+
+def write_atomically(file_path: str, content: str) -> None:
+    """
+    Replace a file's content without ever leaving it half-written.
+    
+    The content goes to a temporary file in the same directory, which is then renamed over
+    the original, keeping its permissions. An interrupted write leaves the original intact.
+    """
+    with profiling.phase("write"):
+        directory, name = os.path.split(os.path.abspath(file_path))
+        fd, temp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            try:
+                os.chmod(temp_path, os.stat(file_path).st_mode & 0o7777)
+            except FileNotFoundError:
+                pass
+            os.replace(temp_path, file_path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+
+def lock_file_with_key(file_path: str, signing_key: SigningKey, mode: str, encoding: str, root: bool) -> bool:
+    """Seal one file and write it back atomically. Returns whether the file was changed."""
+    with profiling.timed_file(file_path):
+        modified_code, has_changes = add_decorators(file_path, signing_key, mode, encoding, root)
+        if has_changes:
+            write_atomically(file_path, modified_code)
+    return has_changes
 
 
-def add_decorators_to_folder(folder_path: str) -> list[str]:
+def _lock_file_in_worker(task: Tuple[str, str, str, bool]) -> Tuple[str, bool, Optional[str], Optional[profiling.Snapshot]]:
+    """
+    Seal one file inside a worker process of the folder lock pool.
+    
+    Each worker loads the signing key once (it is cached per process).
+    
+    Returns:
+        Tuple of (file path, whether the file was changed, error message or None,
+        what the worker profiled for this file or None)
+    """
+    file_path, mode, encoding, root = task
+    try:
+        return file_path, lock_file_with_key(file_path, load_signing_key(), mode, encoding, root), None, profiling.collect()
+    except Exception as e:
+        return file_path, False, str(e), profiling.collect()
+
+
+def add_decorators_to_folder(folder_path: str, mode: str = "plain", encoding: str = "base32", root: bool = False, jobs: Optional[int] = 1) -> list[str]:
     """
     Add decorators to all Python files in a folder.
     
+    Every file is written atomically, so an interrupted run never leaves a half-written module.
+    
     Args:
         folder_path: Path to the folder containing Python files
+        mode: Seal mode, one of SEAL_MODES
+        encoding: Signature encoding, one of SEAL_ENCODINGS
+        root: Whether to also add a file-level root seal to every file
+        jobs: Number of worker processes. If None, one per CPU is used; with 1 the
+            files are sealed in this process.
         
     Returns:
-        List of file paths where decorators were successfully added
+        List of file paths where decorators were successfully added, ordered by path
     """
     folder = Path(folder_path)
     
@@ -202,27 +334,64 @@ def add_decorators_to_folder(folder_path: str) -> list[str]:
     if not folder.is_dir():
         raise NotADirectoryError(f"'{folder_path}' is not a directory.")
     
-    # Find all Python files in the folder (recursive)
-    python_files = list(folder.rglob('*.py'))
+    # Find all Python files in the folder (recursive), in a stable order
+    python_files = find_python_files(folder_path)
     
     if not python_files:
         raise ValueError(f"No Python files found in '{folder_path}'.")
     
-    decorated_files = []
-    errors = []
+    return add_decorators_to_files(python_files, mode, encoding, root, jobs)
+
+
+def add_decorators_to_files(python_files: List[str], mode: str = "plain", encoding: str = "base32", root: bool = False, jobs: Optional[int] = 1) -> list[str]:
+    """
+    Add decorators to the given Python files, e.g. the files changed since a git reference.
+    
+    Args:
+        python_files: Paths of the Python files to process
+        mode: Seal mode, one of SEAL_MODES
+        encoding: Signature encoding, one of SEAL_ENCODINGS
+        root: Whether to also add a file-level root seal to every file
+        jobs: Number of worker processes. If None, one per CPU is used; with 1 the
+            files are sealed in this process.
+        
+    Returns:
+        List of file paths where decorators were successfully added, in the order given
+    """
+    if not python_files:
+        return []
     
-    for py_file in python_files:
-        try:
-            modified_code, has_changes = add_decorators(str(py_file))
-            if has_changes:
-                with open(py_file, 'w') as f:
-                    f.write(modified_code)
-                decorated_files.append(str(py_file))
-        except Exception as e:
-            errors.append((str(py_file), str(e)))
+    check_seal_options(mode, encoding)
+    
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    if jobs < 1:
+        raise ValueError(f"Number of jobs must be at least 1, got {jobs}.")
+    jobs = min(jobs, len(python_files))
+    
+    # Decode the signing key once for the whole folder (and fail early if it is missing)
+    signing_key = load_signing_key()
+    
+    changed = {}
+    errors = {}
+    
+    if jobs > 1:
+        tasks = [(file_path, mode, encoding, root) for file_path in largest_first(python_files)]
+        with ProcessPoolExecutor(max_workers=jobs, initializer=profiling.start if profiling.is_active() else None) as executor:
+            for file_path, has_changes, error, profile in executor.map(_lock_file_in_worker, tasks):
+                profiling.merge(profile)
+                changed[file_path] = has_changes
+                if error is not None:
+                    errors[file_path] = error
+    else:
+        for file_path in python_files:
+            try:
+                changed[file_path] = lock_file_with_key(file_path, signing_key, mode, encoding, root)
+            except Exception as e:
+                errors[file_path] = str(e)
     
     if errors:
-        error_msg = "\n".join([f"  - {file}: {error}" for file, error in errors])
+        error_msg = "\n".join([f"  - {file}: {errors[file]}" for file in python_files if file in errors])
         raise RuntimeError(f"Failed to decorate some files:\n{error_msg}")
     
-    return decorated_files
+    return [file_path for file_path in python_files if changed.get(file_path)]
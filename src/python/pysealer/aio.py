@@ -0,0 +1,431 @@
+"""
+Asyncio API for checking and locking Python files from async services without blocking the event loop.
+
+Checking and locking run in an executor (by default the event loop's thread pool; the native
+engine releases the GIL, so threads verify in parallel), at most `concurrency` files at a time.
+Git is run with asyncio subprocesses, and the little file system work of discovery and diffs
+runs in the event loop's default executor.
+
+Usage:
+    from pysealer import aio
+
+    results = await aio.check_file("server.py")
+    async for file_path, results in aio.iter_check("src", concurrency=8):
+        ...
+    locked_files = await aio.lock_folder("src")
+
+Diffs read blobs through one `git cat-file --batch` process per repository and event loop;
+await close_git_readers() before the loop ends to stop them.
+"""
+
+import asyncio
+import os
+import weakref
+from concurrent.futures import Executor
+from functools import partial
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+from .add_decorators import check_seal_options, load_signing_key, lock_file_with_key
+from .check_decorators import check_decorators, check_file_reporting_errors
+from .check_results import SymbolResult
+from .discovery import Rules, select_python_files
+from .git_diff import LS_FILES_ARGS, changed_files_directory, changed_files_pathspec, diff_names_args, generate_function_diff, index_blob, merge_base_args, parse_changed_files, parse_ls_files
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def _default_concurrency() -> int:
+    return os.cpu_count() or 1
+
+
+async def _run(executor: Optional[Executor], function: Callable[..., R], *args) -> R:
+    """Run a blocking function in the executor (None: the event loop's default executor)."""
+    return await asyncio.get_running_loop().run_in_executor(executor, partial(function, *args))
+
+
+async def _bounded(items: Iterable[T], run: Callable[[T], Awaitable[R]], concurrency: int) -> AsyncIterator[Tuple[T, R]]:
+    """
+    Run at most `concurrency` coroutines at a time, yielding (item, result) as each completes.
+
+    Only `concurrency` tasks exist at any time; pending ones are cancelled if the consumer stops early.
+    """
+    if concurrency < 1:
+        raise ValueError(f"Concurrency must be at least 1, got {concurrency}.")
+
+    items = iter(items)
+    in_flight: Dict[asyncio.Future, T] = {}
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(in_flight) < concurrency:
+                try:
+                    item = next(items)
+                except StopIteration:
+                    exhausted = True
+                    break
+                in_flight[asyncio.ensure_future(run(item))] = item
+
+            if not in_flight:
+                return
+
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                yield in_flight.pop(future), future.result()
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+
+async def _run_git(cwd: str, args: List[str]) -> Optional[bytes]:
+    """Run git with an asyncio subprocess and return its output, or None if git is missing or fails."""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "git", *args,
+            cwd=cwd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+    except OSError:
+        return None
+
+    try:
+        stdout, _ = await asyncio.wait_for(process.communicate(), timeout=60)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return None
+    return stdout if process.returncode == 0 else None
+
+
+# Repository root of each directory asked about, so git is asked only once per directory
+_git_roots: Dict[str, Optional[str]] = {}
+
+
+async def find_git_root(directory: str) -> Optional[str]:
+    """Root of the git repository containing a directory, or None."""
+    if directory not in _git_roots:
+        output = await _run_git(directory, ["rev-parse", "--show-toplevel"])
+        _git_roots[directory] = output.decode().strip() if output is not None else None
+    return _git_roots[directory]
+
+
+class AsyncGitObjectReader:
+    """
+    One long-running asyncio `git cat-file --batch` process for reading files out of a
+    repository, as git_diff.GitObjectReader is for the synchronous API.
+
+    Requests are serialized over the process's pipes instead of starting a git subprocess each.
+    The process belongs to the event loop it was started in.
+    """
+
+    def __init__(self, git_root: str):
+        self.git_root = git_root
+        self._lock = asyncio.Lock()
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._broken = False
+
+    async def _start(self) -> asyncio.subprocess.Process:
+        """Start the cat-file process on first use."""
+        if self._process is None or self._process.returncode is not None:
+            self._process = await asyncio.create_subprocess_exec(
+                "git", "cat-file", "--batch",
+                cwd=self.git_root,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+        return self._process
+
+    async def read(self, ref: str, relative_path: str) -> Optional[Tuple[str, bytes]]:
+        """
+        Read a file at a git reference.
+
+        Returns:
+            Tuple of (blob object id, raw content), or None if the file or reference does not exist
+        """
+        if self._broken or "\n" in relative_path:
+            return None
+
+        async with self._lock:
+            try:
+                process = await self._start()
+                process.stdin.write(f"{ref}:{relative_path}\n".encode())
+                await process.stdin.drain()
+
+                header = (await process.stdout.readline()).decode().split()
+                # "<object> missing" or "<object> ambiguous" for anything that is not a blob
+                if len(header) != 3 or header[1] != "blob":
+                    if len(header) == 3:
+                        # Skip the content of trees and other objects
+                        await process.stdout.readexactly(int(header[2]) + 1)
+                    return None
+
+                object_id, _, size = header
+                content = await process.stdout.readexactly(int(size) + 1)
+                return object_id, content[:-1]
+            except (OSError, ValueError, asyncio.IncompleteReadError):
+                # git is missing or the process died: give up on this repository for the loop
+                self._broken = True
+                await self.close()
+                return None
+
+    async def close(self) -> None:
+        """Stop the cat-file process."""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+            await asyncio.wait_for(process.wait(), timeout=5)
+        except (OSError, asyncio.TimeoutError):
+            process.kill()
+            await process.wait()
+
+
+# Object readers of each running event loop, by repository root
+_readers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, AsyncGitObjectReader]]" = weakref.WeakKeyDictionary()
+
+
+def _get_reader(git_root: str) -> AsyncGitObjectReader:
+    """Return the object reader of a repository in the running event loop, starting one if needed."""
+    readers = _readers.setdefault(asyncio.get_running_loop(), {})
+    reader = readers.get(git_root)
+    if reader is None:
+        reader = readers[git_root] = AsyncGitObjectReader(git_root)
+    return reader
+
+
+async def close_git_readers() -> None:
+    """Stop every `git cat-file` process of the running event loop."""
+    readers = _readers.pop(asyncio.get_running_loop(), {})
+    for reader in readers.values():
+        await reader.close()
+
+
+async def find_python_files(folder: str) -> List[str]:
+    """
+    Python files in a folder, as discovery.find_python_files lists them, without blocking the loop.
+
+    Inside a git repository, the `git ls-files` call runs as an asyncio subprocess.
+    """
+    rules = await _run(None, Rules.for_folder, folder)
+    output = None
+    if await find_git_root(folder) is not None:
+        output = await _run_git(folder, LS_FILES_ARGS)
+    listed = parse_ls_files(output) if output is not None else None
+    return await _run(None, select_python_files, folder, listed, rules)
+
+
+async def get_changed_files(path: str, since: Optional[str] = None, staged: bool = False) -> Tuple[List[str], str]:
+    """
+    Python files under a file or folder changed since the merge base of a git reference and HEAD,
+    or staged for commit, as git_diff.get_changed_files lists them.
+
+    Raises:
+        ValueError: Outside a git repository, or if the reference is unknown
+    """
+    directory = changed_files_directory(path, since, staged)
+    git_root = await find_git_root(directory)
+    pathspec = changed_files_pathspec(path, git_root)
+
+    if staged:
+        base = "HEAD"
+    else:
+        output = await _run_git(git_root, merge_base_args(since))
+        if output is None:
+            raise ValueError(f"Cannot find the merge base of '{since}' and HEAD.")
+        base = output.decode().strip()
+
+    output = await _run_git(git_root, diff_names_args(pathspec, base, staged))
+    if output is None:
+        raise ValueError(f"Cannot list the files changed since '{base}'.")
+    return parse_changed_files(git_root, output), base
+
+
+async def get_function_diff(file_path: str, function_name: str, new_source: str, new_start_line: int,
+                            ref: str = "HEAD") -> Optional[List[Tuple[str, str, int]]]:
+    """
+    Diff of a function or class against a git reference, as git_diff.get_function_diff computes it.
+
+    The blob is read through the repository's AsyncGitObjectReader, so diffing many symbols
+    reuses one git process. Parsing it and diffing run in the default executor, and parsed
+    blobs share the cache of the synchronous API.
+    """
+    path = Path(file_path).resolve()
+    git_root = await find_git_root(str(path.parent))
+    if git_root is None:
+        return None
+    try:
+        relative_path = path.relative_to(Path(git_root).resolve()).as_posix()
+    except ValueError:
+        return None
+
+    blob = await _get_reader(git_root).read(ref, relative_path)
+    if blob is None:
+        return None
+
+    def diff() -> Optional[List[Tuple[str, str, int]]]:
+        index = index_blob(*blob)
+        symbol = index.find(function_name) if index is not None else None
+        if symbol is None:
+            return None
+        return generate_function_diff(index.span(symbol), new_source, function_name, symbol.line_start, new_start_line, context_lines=2) or None
+
+    return await _run(None, diff)
+
+
+async def load_diffs(results: Dict[str, SymbolResult]) -> None:
+    """
+    Compute the git diff of every invalid result of a file ahead of time.
+
+    SymbolResult.diff computes it on first access with blocking git calls; after this, result["diff"]
+    is ready and accessing it does not block.
+    """
+    for name, result in results.items():
+        if not isinstance(result, SymbolResult) or not result.has_decorator or result.valid:
+            continue
+        source = await _run(None, getattr, result, "source")
+        result["diff"] = await get_function_diff(result.file_path, name, source, result.line_start)
+
+
+async def check_file(file_path: str, with_diffs: bool = False, executor: Optional[Executor] = None) -> Dict[str, SymbolResult]:
+    """
+    Verify the pysealer decorators of a Python file, as check_decorators does.
+
+    Args:
+        file_path: Path to the Python file to verify
+        with_diffs: Also compute the git diff of every invalid decorator (see load_diffs)
+        executor: Executor to verify in; None uses the event loop's default executor
+
+    Raises:
+        RuntimeError: If the verifying key is missing or invalid
+    """
+    results = await _run(executor, check_decorators, file_path)
+    if with_diffs:
+        await load_diffs(results)
+    return results
+
+
+async def iter_check(path: str, concurrency: Optional[int] = None, executor: Optional[Executor] = None) -> AsyncIterator[Tuple[str, dict]]:
+    """
+    Check a Python file, or every Python file in a folder, yielding (file path, results) as each
+    file completes.
+
+    Failures are reported per file as {"error": message}, as check_decorators_in_folder does.
+
+    Args:
+        path: Python file or folder to check
+        concurrency: Number of files checked at a time (default: one per CPU)
+        executor: Executor to check in; a ProcessPoolExecutor works too, each process loading
+            the key once
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Path '{path}' does not exist.")
+
+    if os.path.isdir(path):
+        file_paths = await find_python_files(path)
+        if not file_paths:
+            raise ValueError(f"No Python files found in '{path}'.")
+    else:
+        file_paths = [path]
+
+    async def check(file_path: str) -> dict:
+        return await _run(executor, check_file_reporting_errors, file_path)
+
+    async for file_path, results in _bounded(file_paths, check, concurrency or _default_concurrency()):
+        yield file_path, results
+
+
+async def check_folder(folder_path: str, concurrency: Optional[int] = None, executor: Optional[Executor] = None) -> Dict[str, dict]:
+    """
+    Check every Python file in a folder, as check_decorators_in_folder does.
+
+    Returns:
+        Dictionary mapping file paths to their verification results, ordered by path
+    """
+    if not os.path.isdir(folder_path):
+        raise NotADirectoryError(f"'{folder_path}' is not a directory.")
+    all_results = {file_path: results async for file_path, results in iter_check(folder_path, concurrency, executor)}
+    return {file_path: all_results[file_path] for file_path in sorted(all_results)}
+
+
+async def lock_file(file_path: str, mode: str = "plain", encoding: str = "base32", root: bool = False,
+                    executor: Optional[Executor] = None) -> bool:
+    """
+    Seal a Python file and write it back atomically, as 'pysealer lock' does.
+
+    Returns:
+        Whether the file was changed
+
+    Raises:
+        RuntimeError: If the signing key is missing or the file cannot be sealed
+    """
+    check_seal_options(mode, encoding)
+    await _run(executor, load_signing_key)
+    changed, error = await _run(executor, _lock_one, file_path, mode, encoding, root)
+    if error is not None:
+        raise RuntimeError(f"Failed to decorate '{file_path}': {error}")
+    return changed
+
+
+def _lock_one(file_path: str, mode: str, encoding: str, root: bool) -> Tuple[bool, Optional[str]]:
+    """Seal one file in the executor, returning (whether it was changed, error message or None)."""
+    try:
+        return lock_file_with_key(file_path, load_signing_key(), mode, encoding, root), None
+    except Exception as e:
+        return False, str(e)
+
+
+async def lock_files(file_paths: List[str], mode: str = "plain", encoding: str = "base32", root: bool = False,
+                     concurrency: Optional[int] = None, executor: Optional[Executor] = None) -> List[str]:
+    """
+    Seal the given Python files, as add_decorators_to_files does.
+
+    Returns:
+        Paths of the files that were changed, in the order given
+
+    Raises:
+        RuntimeError: If the signing key is missing, or listing every file that could not be sealed
+    """
+    if not file_paths:
+        return []
+    check_seal_options(mode, encoding)
+    # Fail before any file is touched if the key is missing
+    await _run(executor, load_signing_key)
+
+    async def lock(file_path: str) -> Tuple[bool, Optional[str]]:
+        return await _run(executor, _lock_one, file_path, mode, encoding, root)
+
+    changed = {}
+    errors = {}
+    async for file_path, (has_changes, error) in _bounded(file_paths, lock, concurrency or _default_concurrency()):
+        changed[file_path] = has_changes
+        if error is not None:
+            errors[file_path] = error
+
+    if errors:
+        error_msg = "\n".join([f"  - {file}: {errors[file]}" for file in file_paths if file in errors])
+        raise RuntimeError(f"Failed to decorate some files:\n{error_msg}")
+
+    return [file_path for file_path in file_paths if changed.get(file_path)]
+
+
+async def lock_folder(folder_path: str, mode: str = "plain", encoding: str = "base32", root: bool = False,
+                      concurrency: Optional[int] = None, executor: Optional[Executor] = None) -> List[str]:
+    """
+    Seal every Python file in a folder, as add_decorators_to_folder does.
+
+    Returns:
+        Paths of the files that were changed, ordered by path
+    """
+    if not os.path.exists(folder_path):
+        raise FileNotFoundError(f"Folder '{folder_path}' does not exist.")
+    if not os.path.isdir(folder_path):
+        raise NotADirectoryError(f"'{folder_path}' is not a directory.")
+
+    file_paths = await find_python_files(folder_path)
+    if not file_paths:
+        raise ValueError(f"No Python files found in '{folder_path}'.")
+    return await lock_files(file_paths, mode, encoding, root, concurrency, executor)
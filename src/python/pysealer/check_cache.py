@@ -0,0 +1,281 @@
+"""Persistent cache of Python files that passed 'pysealer check', so unchanged files are not verified again."""
+
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+from pysealer import digest
+from .check_results import STORED_KEYS
+from .setup import get_public_key
+
+# Cache location, relative to the git repository root (or the checked folder outside git)
+CACHE_DIR = Path(".pysealer") / "cache"
+CACHE_FILE = "check.sqlite3"
+
+# A file modified this close to the time its git blob id was listed may have been written again
+# within the file system's timestamp granularity, so its blob id is not trusted
+RACY_WINDOW_NS = 2_000_000_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checks (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    public_key TEXT NOT NULL,
+    checked_ns INTEGER NOT NULL,
+    results TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS verified_blobs (
+    blob_id TEXT NOT NULL,
+    public_key TEXT NOT NULL,
+    results TEXT NOT NULL,
+    PRIMARY KEY (blob_id, public_key)
+)
+"""
+
+
+class Fingerprint(NamedTuple):
+    """What a file looked like when it was checked."""
+    size: int
+    mtime_ns: int
+    content_hash: str
+
+
+def find_cache_dir(path: str | Path) -> Path:
+    """
+    Directory holding the check cache for a file or folder.
+
+    PYSEALER_CACHE_DIR overrides it; otherwise the cache lives in .pysealer/cache at the
+    root of the enclosing git repository, or in the folder itself outside of git.
+    """
+    override = os.getenv("PYSEALER_CACHE_DIR")
+    if override:
+        return Path(override)
+
+    start = Path(path).resolve()
+    if not start.is_dir():
+        start = start.parent
+
+    for parent in [start] + list(start.parents):
+        if (parent / ".git").exists():
+            return parent / CACHE_DIR
+    return start / CACHE_DIR
+
+
+def _fingerprint(file_path: str, stat: os.stat_result) -> Fingerprint:
+    """Fingerprint a file from its stat and a BLAKE3 hash of its content."""
+    with open(file_path, 'rb') as f:
+        content_hash = digest(f.read())
+    return Fingerprint(stat.st_size, stat.st_mtime_ns, content_hash)
+
+
+def _all_valid(results: Dict[str, dict]) -> bool:
+    """Whether a file's check results can be cached: no error, and every decorator valid."""
+    if "error" in results:
+        return False
+    return all(result["valid"] for result in results.values() if result["has_decorator"])
+
+
+class CheckCache:
+    """
+    SQLite cache of files whose decorators were all valid, keyed by path, content hash and
+    public key.
+
+    A file is skipped only when the BLAKE3 hash of its current content matches its entry:
+    size and mtime can be restored after an edit, so they never decide on their own. Within
+    one run the hash taken by lookup() is reused by store() while the file's stat is
+    unchanged, and a file that changed in between is not recorded. Only source and diff are left out of the cached results, as they are only
+    shown for invalid decorators.
+
+    The cache records which content passed, not a signature over it: whoever can rewrite the
+    code can also rewrite the cache. Check with --no-cache where that matters.
+    """
+
+    def __init__(self, cache_dir: str | Path, public_key: Optional[str] = None):
+        self.cache_dir = Path(cache_dir)
+        self.public_key = public_key
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # Keep the cache out of version control
+        gitignore = self.cache_dir / ".gitignore"
+        if not gitignore.exists():
+            gitignore.write_text("# Created by pysealer\n*\n")
+
+        self._connection = sqlite3.connect(str(self.cache_dir / CACHE_FILE))
+        self._connection.executescript(_SCHEMA)
+        # Fingerprints taken by lookup(), reused by store()
+        self._fingerprints: Dict[str, Fingerprint] = {}
+
+    @classmethod
+    def open(cls, path: str | Path, public_key: Optional[str] = None) -> "CheckCache":
+        """Open the cache that belongs to a file or folder."""
+        return cls(find_cache_dir(path), public_key)
+
+    def __enter__(self) -> "CheckCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Commit pending entries and close the database."""
+        self._connection.commit()
+        self._connection.close()
+
+    def lookup(self, file_path: str) -> Optional[Dict[str, dict]]:
+        """
+        Cached results of a file if it is unchanged since it last passed, otherwise None.
+        """
+        stat = os.stat(file_path)
+        fingerprint = self._fingerprints.get(file_path)
+        if fingerprint is None or (fingerprint.size, fingerprint.mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+            fingerprint = _fingerprint(file_path, stat)
+            self._fingerprints[file_path] = fingerprint
+
+        row = self._connection.execute(
+            "SELECT size, mtime_ns, content_hash, results FROM checks WHERE path = ? AND public_key = ?",
+            (file_path, self.public_key),
+        ).fetchone()
+        if row is None or row[2] != fingerprint.content_hash:
+            return None
+
+        if (row[0], row[1]) != (fingerprint.size, fingerprint.mtime_ns):
+            # Same content with a new mtime: refresh the entry so 'cache prune' keeps it
+            self._connection.execute(
+                "UPDATE checks SET size = ?, mtime_ns = ?, checked_ns = ? WHERE path = ?",
+                (fingerprint.size, fingerprint.mtime_ns, time.time_ns(), file_path),
+            )
+        return self._load_results(row[3])
+
+    def store(self, file_path: str, results: Dict[str, dict]) -> None:
+        """
+        Record the results of a file, or forget it if not every decorator was valid.
+
+        A file whose stat moved since lookup() hashed it is forgotten too: it changed while it
+        was being checked, so which content the results belong to is unknown.
+        """
+        fingerprint = self._fingerprints.pop(file_path, None)
+        stat = os.stat(file_path)
+        changed = fingerprint is not None and (fingerprint.size, fingerprint.mtime_ns) != (stat.st_size, stat.st_mtime_ns)
+
+        if self.public_key is None or changed or not _all_valid(results):
+            self._connection.execute("DELETE FROM checks WHERE path = ?", (file_path,))
+            return
+
+        if fingerprint is None:
+            fingerprint = _fingerprint(file_path, stat)
+
+        self._connection.execute(
+            "INSERT OR REPLACE INTO checks VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (file_path, fingerprint.size, fingerprint.mtime_ns, fingerprint.content_hash,
+             self.public_key, time.time_ns(), json.dumps(self._compact(results))),
+        )
+
+    def lookup_blob(self, blob_id: str) -> Optional[Dict[str, dict]]:
+        """Cached results of a git blob that was fully verified with this public key, otherwise None."""
+        row = self._connection.execute(
+            "SELECT results FROM verified_blobs WHERE blob_id = ? AND public_key = ?",
+            (blob_id, self.public_key),
+        ).fetchone()
+        return None if row is None else self._load_results(row[0])
+
+    def store_blob(self, blob_id: str, results: Dict[str, dict]) -> None:
+        """
+        Record a git blob as fully verified, if every decorator of its file was valid.
+
+        Blobs are immutable and their results hold no path, so an entry holds for every
+        file and branch with that content.
+        """
+        if self.public_key is None or not _all_valid(results):
+            return
+        self._connection.execute(
+            "INSERT OR REPLACE INTO verified_blobs VALUES (?, ?, ?)",
+            (blob_id, self.public_key, json.dumps(self._compact(results))),
+        )
+
+    @staticmethod
+    def _compact(results: Dict[str, dict]) -> Dict[str, dict]:
+        """Results without source and diff, which are only shown for invalid decorators."""
+        return {
+            name: {key: result[key] for key in STORED_KEYS}
+            for name, result in results.items()
+        }
+
+    @staticmethod
+    def _load_results(results: str) -> Dict[str, dict]:
+        """Decode cached results, restoring the fields that are not stored."""
+        loaded = json.loads(results)
+        for result in loaded.values():
+            result["source"] = ""
+            result["diff"] = None
+        return loaded
+
+    def prune(self) -> int:
+        """
+        Drop entries of files that no longer exist or no longer match their entry, and, if
+        the cache was opened with a public key, file and blob entries recorded under another key.
+
+        Returns:
+            Number of entries removed
+        """
+        stale = []
+        rows = self._connection.execute("SELECT path, size, mtime_ns, public_key FROM checks").fetchall()
+        for path, size, mtime_ns, public_key in rows:
+            if self.public_key is not None and public_key != self.public_key:
+                stale.append(path)
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stale.append(path)
+                continue
+            if stat.st_size != size or stat.st_mtime_ns != mtime_ns:
+                stale.append(path)
+
+        self._connection.executemany("DELETE FROM checks WHERE path = ?", [(path,) for path in stale])
+        removed = len(stale)
+        if self.public_key is not None:
+            removed += self._connection.execute("DELETE FROM verified_blobs WHERE public_key != ?", (self.public_key,)).rowcount
+        self._connection.commit()
+        self._connection.execute("VACUUM")
+        return removed
+
+    def clear(self) -> int:
+        """
+        Drop every file and blob entry.
+
+        Returns:
+            Number of entries removed
+        """
+        removed = self._connection.execute("DELETE FROM checks").rowcount
+        removed += self._connection.execute("DELETE FROM verified_blobs").rowcount
+        self._connection.commit()
+        self._connection.execute("VACUUM")
+        return removed
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM checks").fetchone()[0]
+
+
+def open_check_cache(path: str | Path, public_key: Optional[str] = None) -> Tuple[Optional[CheckCache], Optional[Exception]]:
+    """
+    Open the check cache for a folder with a public key (by default the current one).
+
+    A cache that cannot be used never fails a check: it is reported and checking goes on without it.
+
+    Returns:
+        Tuple of (cache or None, exception raised while opening it or None)
+    """
+    if public_key is None:
+        try:
+            public_key = get_public_key()
+        except (FileNotFoundError, ValueError) as e:
+            return None, e
+
+    try:
+        return CheckCache.open(path, public_key), None
+    except (sqlite3.Error, OSError) as e:
+        return None, e
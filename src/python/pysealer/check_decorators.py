@@ -1,15 +1,191 @@
 """Automatically verify cryptographic decorators for all functions and classes in a python file."""
 
-import ast
-import copy
+import os
+import sqlite3
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
-from pysealer import verify_signature
-from .setup import get_public_key
-from .git_diff import get_function_diff, is_git_available
+from typing import Dict, Iterator, List, Tuple, Optional
+from pysealer import VerdictMemo, VerifyingKey, merkle_root, verify_file
+from .setup import get_verifying_key, verifying_key_handle
+from .git_diff import get_unmodified_blobs
+from .source_index import ROOT_MARKER, SourceIndex
+from .check_cache import RACY_WINDOW_NS, open_check_cache
+from .check_results import SymbolResult
+from .discovery import find_python_files
+from .scheduling import largest_first
+from . import profiling
 
+# Seals already found valid in this process, keyed by (verifying key, seal, source). Every
+# check shares it, so a function or class that moved between files or is vendored in several
+# places is verified only once.
+_verdict_memo = VerdictMemo()
 
-def check_decorators(file_path: str) -> Dict[str, dict]:
+# Message of a function/class whose verdict comes from its file's root seal: its own seal is not checked
+ROOT_COVERED_MESSAGE = "✓ Covered by the file's valid root seal - code has not been tampered with"
+
+
+def clear_verdict_memo() -> None:
+    """Forget every remembered verdict, so the next check verifies every signature again."""
+    _verdict_memo.clear()
+
+
+def _root_is_valid(index: SourceIndex, verifying_key: VerifyingKey) -> bool:
+    """Whether a file's root seal (the last one, as in the native engine) still matches its functions and classes."""
+    if not index.root_marker_lines:
+        return False
+    seal = index.lines[index.root_marker_lines[-1]][len(ROOT_MARKER):].rstrip()
+    with profiling.phase("segments"):
+        sources = [index.segment(symbol) for symbol in index.symbols if not symbol.is_method]
+    try:
+        with profiling.phase("verify"):
+            return verifying_key.verify(bytes.fromhex(merkle_root(sources)), seal)
+    except ValueError:
+        return False
+
+
+def _collect_decorators(file_path: str, content: Optional[str] = None, verifying_key: Optional[VerifyingKey] = None) -> Tuple[Dict[str, SymbolResult], List[Tuple[str, SymbolResult, str, int]]]:
+    """
+    Parse a Python file and collect every function/class that needs its signature verified.
+    
+    With a verifying key, the functions and classes covered by a valid root seal are reported
+    valid right away, as the native engine does, and are not collected.
+    
+    Args:
+        file_path: Path to the Python file to inspect
+        content: Source of the file to inspect instead of reading it
+        verifying_key: Decoded verifying key to check the file's root seal with
+        
+    Returns:
+        Tuple of (results dictionary with verification still pending, list of
+        (name, result, function_source, line_number) entries to verify)
+    """
+    index = SourceIndex.from_file(file_path) if content is None else SourceIndex(content)
+    covered = verifying_key is not None and _root_is_valid(index, verifying_key)
+    
+    # Dictionary to store results
+    results = {}
+    pending = []
+    
+    with profiling.phase("segments"):
+        for symbol in index.symbols:
+            # Initialize result for this function/class
+            result = SymbolResult(file_path, symbol.name, symbol.signature, symbol.line_start, symbol.line_end)
+            results[symbol.name] = result
+            
+            if symbol.signature is None:
+                result.message = "No pysealer decorator found"
+                continue
+            
+            if covered and not symbol.is_method:
+                result.valid = True
+                result.message = ROOT_COVERED_MESSAGE
+                continue
+            
+            # Source without pysealer decorators, as it was signed. It is only kept until verified.
+            pending.append((symbol.name, result, index.segment(symbol), symbol.line_start))
+    
+    return results, pending
+
+
+def _verify_natively(file_path: str, verifying_key: VerifyingKey) -> Tuple[Dict[str, SymbolResult], List[Tuple[str, SymbolResult, Optional[str], int]], List[bool]]:
+    """
+    Verify every function/class of a Python file with the native engine.
+    
+    The Rust extension reads, parses and verifies the whole file in one call, without
+    handing the sources back.
+    
+    Args:
+        file_path: Path to the Python file to verify
+        verifying_key: Decoded verifying key
+        
+    Returns:
+        Tuple of (results dictionary, list of (name, result, None, line_number)
+        entries that carry a signature not covered by the root seal, one verdict per entry)
+        
+    Raises:
+        ValueError: If the native engine cannot handle the file
+    """
+    results = {}
+    pending = []
+    verdicts = []
+    
+    with profiling.phase("verify (native)"):
+        verdicts_by_symbol = verify_file(file_path, verifying_key, _verdict_memo, False)
+    
+    for name, line_start, line_end, signature, source, valid, covered in verdicts_by_symbol:
+        result = SymbolResult(file_path, name, signature, line_start, line_end)
+        results[name] = result
+        
+        if signature is None:
+            result.message = "No pysealer decorator found"
+            continue
+        
+        if covered:
+            result.valid = True
+            result.message = ROOT_COVERED_MESSAGE
+            continue
+        
+        pending.append((name, result, source, line_start))
+        verdicts.append(valid)
+    
+    return results, pending, verdicts
+
+
+def apply_verdicts(file_path: str, pending: List[Tuple[str, SymbolResult, Optional[str], int]], verdicts: Optional[List[bool]], error: Optional[Exception] = None) -> None:
+    """
+    Record batch verification verdicts on the pending results of a file.
+    
+    The git diff of an invalid signature is not computed here: SymbolResult.diff loads
+    it when it is first accessed.
+    
+    Args:
+        file_path: Path to the Python file the results belong to
+        pending: Entries returned by _collect_decorators
+        verdicts: One boolean per pending entry, or None if verification failed
+        error: The exception raised by verification, if any
+    """
+    for index, (name, result, function_source, line_number) in enumerate(pending):
+        if verdicts is None:
+            result.message = f"✗ Error verifying signature: {error}"
+            continue
+        
+        is_valid = verdicts[index]
+        result.valid = is_valid
+        if is_valid:
+            result.message = "✓ Signature valid - code has not been tampered with"
+        else:
+            result.message = "✗ Signature invalid - code may have been modified"
+
+
+def verify_pending(pending: List[Tuple[str, SymbolResult, Optional[str], int]], verifying_key: VerifyingKey) -> Tuple[Optional[List[bool]], Optional[Exception]]:
+    """
+    Batch verify the signatures of pending entries in a single call into the Rust extension.
+    
+    Returns:
+        Tuple of (verdicts or None, exception raised by verification or None)
+    """
+    if not pending:
+        return [], None
+    
+    try:
+        items = [(function_source, result["signature"]) for _, result, function_source, _ in pending]
+        with profiling.phase("verify"):
+            return verifying_key.verify_many(items, _verdict_memo), None
+    except Exception as e:
+        return None, e
+
+
+def _load_verifying_key() -> VerifyingKey:
+    """Load the verifying key handle, reporting a missing or invalid key as a RuntimeError."""
+    try:
+        with profiling.phase("env"):
+            return get_verifying_key()
+    except (FileNotFoundError, ValueError) as e:
+        raise RuntimeError(f"Cannot verify decorators: {e}. Please run 'pysealer init' first.")
+
+
+def check_decorators(file_path: str, verifying_key: Optional[VerifyingKey] = None) -> Dict[str, SymbolResult]:
     """
     Parse a Python file and verify all pysealer cryptographic decorators.
     
@@ -18,6 +194,7 @@ def check_decorators(file_path: str) -> Dict[str, dict]:
     
     Args:
         file_path: Path to the Python file to verify
+        verifying_key: Decoded verifying key to reuse. If None, the key is loaded from the .env file.
         
     Returns:
         Dictionary mapping function/class names to their verification results:
@@ -29,136 +206,208 @@ def check_decorators(file_path: str) -> Dict[str, dict]:
                 "has_decorator": bool,   # Whether function has pysealer decorator
                 "line_start": int,       # Starting line number
                 "line_end": int,         # Ending line number
-                "source": str,           # Function source code
-                "diff": List[Tuple]      # Git diff if validation failed
+                "source": str,           # Function source code, read when accessed
+                "diff": List[Tuple]      # Git diff if validation failed, computed when accessed
             }
         }
+        Each result is a SymbolResult: a dict-like mapping, whose keys can be assigned, that
+        only stores the verdict, signature and line span. Source and diff are read from the
+        file when first accessed, as it is then.
     """
-    # Read the file content
-    with open(file_path, 'r') as f:
-        content = f.read()
-    
-    # Parse the Python source code into an AST
-    tree = ast.parse(content)
-    
     # Get the public key for verification
-    try:
-        public_key = get_public_key()
-    except (FileNotFoundError, ValueError) as e:
-        raise RuntimeError(f"Cannot verify decorators: {e}. Please run 'pysealer init' first.")
+    if verifying_key is None:
+        verifying_key = _load_verifying_key()
     
-    # Dictionary to store results
-    results = {}
+    with profiling.timed_file(file_path):
+        try:
+            results, pending, verdicts = _verify_natively(file_path, verifying_key)
+            error = None
+        except ValueError:
+            # The native parser could not handle this file, fall back to Python's ast module
+            results, pending = _collect_decorators(file_path, verifying_key=verifying_key)
+            
+            # Verify every decorated function/class in one batch
+            verdicts, error = verify_pending(pending, verifying_key)
+        
+        apply_verdicts(file_path, pending, verdicts, error)
+    
+    return results
+
+
+def check_source(file_path: str, content: str, verifying_key: Optional[VerifyingKey] = None) -> Dict[str, SymbolResult]:
+    """
+    Verify every pysealer decorator of a Python source held in memory, e.g. exactly the bytes about to be compiled.
     
-    # Iterate through each node in the AST
-    for node in ast.walk(tree):
-        node_type = type(node).__name__
+    Args:
+        file_path: Path the source was read from, recorded in the results
+        content: Decoded source
+        verifying_key: Decoded verifying key to reuse. If None, the key is loaded from the .env file.
         
-        # Check if this node is a function or class definition
-        if node_type in ("FunctionDef", "AsyncFunctionDef", "ClassDef"):
-            name = node.name
-            
-            # Look for pysealer decorator
-            signature_from_decorator = None
-            has_pysealer_decorator = False
-            
-            if hasattr(node, 'decorator_list'):
-                for decorator in node.decorator_list:
-                    # Check if decorator is a Call node (e.g., @pysealer._<signature>())
-                    if isinstance(decorator, ast.Call):
-                        func = decorator.func
-                        # Check if it's pysealer._<signature>
-                        if isinstance(func, ast.Attribute):
-                            if isinstance(func.value, ast.Name) and func.value.id == "pysealer":
-                                attr_name = func.attr
-                                # Extract signature (remove leading underscore)
-                                if attr_name.startswith('_'):
-                                    signature_from_decorator = attr_name[1:]
-                                    has_pysealer_decorator = True
-                                    break
-            
-            # Initialize result for this function/class
-            result = {
-                "has_decorator": has_pysealer_decorator,
-                "valid": False,
-                "signature": signature_from_decorator,
-                "message": "",
-                "line_start": node.lineno,
-                "line_end": node.end_lineno if hasattr(node, 'end_lineno') and node.end_lineno else node.lineno,
-                "source": "",
-                "diff": None
-            }
-            
-            if not has_pysealer_decorator:
-                result["message"] = "No pysealer decorator found"
-                results[name] = result
-                continue
-            
-            # Extract the source code without pysealer decorators for verification
-            # Use original source to preserve formatting (quotes, spacing, etc.)
-            content_lines = content.split('\n')
-            start_line = node.lineno - 1
-            end_line = node.end_lineno if hasattr(node, 'end_lineno') and node.end_lineno else node.lineno
-            
-            # Get the source lines for this node
-            source_lines = content_lines[start_line:end_line]
-            
-            # Filter out pysealer decorator lines
-            filtered_lines = []
-            for line in source_lines:
-                stripped = line.strip()
-                # Skip lines that are pysealer decorators
-                if stripped.startswith('@pysealer.') or stripped.startswith('@pysealer'):
-                    continue
-                filtered_lines.append(line)
-            
-            function_source = '\n'.join(filtered_lines)
-            
-            # Store the source code
-            result["source"] = function_source
-            
-            # Verify the signature
-            try:
-                is_valid = verify_signature(function_source, signature_from_decorator, public_key)
-                
-                result["valid"] = is_valid
-                if is_valid:
-                    result["message"] = "✓ Signature valid - code has not been tampered with"
-                else:
-                    result["message"] = "✗ Signature invalid - code may have been modified"
-                    
-                    # Try to get git diff for failed validation (only if git is available)
-                    if is_git_available():
-                        try:
-                            diff = get_function_diff(
-                                file_path,
-                                name,
-                                function_source,
-                                node.lineno
-                            )
-                            if diff:
-                                result["diff"] = diff
-                        except Exception:
-                            # If git diff fails, just continue without it
-                            pass
-                    
-            except Exception as e:
-                result["message"] = f"✗ Error verifying signature: {e}"
-            
-            results[name] = result
+    Returns:
+        Results as returned by check_decorators
+    """
+    if verifying_key is None:
+        verifying_key = _load_verifying_key()
+    
+    with profiling.timed_file(file_path):
+        results, pending = _collect_decorators(file_path, content, verifying_key)
+        verdicts, error = verify_pending(pending, verifying_key)
+        apply_verdicts(file_path, pending, verdicts, error)
     
     return results
 
 
-def check_decorators_in_folder(folder_path: str) -> Dict[str, Dict[str, dict]]:
+def _check_file_in_worker(file_path: str, public_key: Optional[str] = None) -> Tuple[Dict[str, dict], Optional[profiling.Snapshot]]:
+    """
+    Check one file inside a worker process of the folder check pool.
+    
+    Each worker decodes the caller's public key, or loads the verifying key when none is
+    given, once (it is cached per process) and reports failures as an {"error": ...} entry,
+    like the sequential folder check does.
+    
+    Returns:
+        Tuple of (results, what the worker profiled for this file or None)
+    """
+    verifying_key = verifying_key_handle(public_key) if public_key is not None else None
+    return check_file_reporting_errors(file_path, verifying_key), profiling.collect()
+
+
+def check_file_reporting_errors(file_path: str, verifying_key: Optional[VerifyingKey] = None) -> Dict[str, dict]:
+    """Check one file with a key (by default the key of this process), reporting failures as an {"error": ...} entry."""
+    if verifying_key is None:
+        try:
+            verifying_key = _load_verifying_key()
+        except RuntimeError as key_error:
+            return _check_file_without_key(file_path, key_error)
+    
+    try:
+        return check_decorators(file_path, verifying_key)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def _check_file_without_key(file_path: str, key_error: Exception) -> Dict[str, dict]:
+    """Results of a file when no key could be loaded: files without any decorator do not need it."""
+    try:
+        results, pending = _collect_decorators(file_path)
+    except Exception as e:
+        return {"error": str(e)}
+    return {"error": str(key_error)} if pending else results
+
+
+def _iter_files_in_parallel(file_paths: List[str], jobs: int, public_key: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, dict]]]:
+    """
+    Check files across a pool of worker processes, yielding (file path, results) as each file completes.
+    
+    The workers verify with public_key if given, otherwise with the key they load themselves.
+    The largest files are scheduled first so that a few huge modules do not finish
+    last on a single core.
+    """
+    executor = ProcessPoolExecutor(max_workers=jobs, initializer=profiling.start if profiling.is_active() else None)
+    futures = {executor.submit(_check_file_in_worker, file_path, public_key): file_path for file_path in largest_first(file_paths)}
+    try:
+        for future in as_completed(futures):
+            results, profile = future.result()
+            profiling.merge(profile)
+            yield futures.pop(future), results
+    finally:
+        # Stop scheduling work if the consumer gave up early
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def _iter_files_in_threads(file_paths: List[str], executor: Executor, verifying_key: VerifyingKey) -> Iterator[Tuple[str, Dict[str, dict]]]:
+    """
+    Check files across a thread pool with a given key, yielding (file path, results) as each file completes.
+    
+    The native engine releases the GIL while it reads, parses and verifies a file, so threads
+    check files in parallel without the start-up cost of processes.
+    """
+    futures = {executor.submit(check_file_reporting_errors, file_path, verifying_key): file_path for file_path in largest_first(file_paths)}
+    try:
+        for future in as_completed(futures):
+            yield futures.pop(future), future.result()
+    finally:
+        # Stop scheduling work if the consumer gave up early
+        for future in futures:
+            future.cancel()
+
+
+def _iter_files_sequentially(file_paths: List[str], verifying_key: Optional[VerifyingKey] = None,
+                             key_error: Optional[Exception] = None) -> Iterator[Tuple[str, Dict[str, dict]]]:
+    """
+    Check files in this process, yielding (file path, results) as each file completes.
+    
+    Files the native engine handles are yielded right away. The signatures of files it cannot
+    handle are verified together in one batch at the end. Without a key (key_error is why it
+    could not be loaded), files with decorators are reported with that error.
+    """
+    # Get the public key for verification, decoded once for the whole folder
+    if verifying_key is None and key_error is None:
+        try:
+            verifying_key = _load_verifying_key()
+        except RuntimeError as e:
+            key_error = e
+    
+    collected = []
+    
+    for file_path in file_paths:
+        try:
+            with profiling.timed_file(file_path):
+                results = None
+                if verifying_key is not None:
+                    try:
+                        results, pending, verdicts = _verify_natively(file_path, verifying_key)
+                        apply_verdicts(file_path, pending, verdicts)
+                    except ValueError:
+                        # The native parser could not handle this file, fall back to Python's ast module
+                        results = None
+                if results is None:
+                    results, pending = _collect_decorators(file_path, verifying_key=verifying_key)
+                    if pending:
+                        collected.append((file_path, results, pending))
+                        continue
+        except Exception as e:
+            yield file_path, {"error": str(e)}
+            continue
+        yield file_path, results
+    
+    if not collected:
+        return
+    
+    if key_error is not None:
+        for file_path, _, _ in collected:
+            yield file_path, {"error": str(key_error)}
+        return
+    
+    # Verify the signatures of the remaining files in one batch
+    all_pending = [entry for _, _, pending in collected for entry in pending]
+    verdicts, error = verify_pending(all_pending, verifying_key)
+    
+    offset = 0
+    for file_path, results, pending in collected:
+        file_verdicts = verdicts[offset:offset + len(pending)] if verdicts is not None else None
+        apply_verdicts(file_path, pending, file_verdicts, error)
+        offset += len(pending)
+        yield file_path, results
+
+
+def check_decorators_in_folder(folder_path: str, jobs: Optional[int] = 1, use_cache: bool = False, use_git_blobs: bool = False) -> Dict[str, Dict[str, dict]]:
     """
     Check decorators in all Python files in a folder.
     
     Args:
         folder_path: Path to the folder containing Python files
+        jobs: Number of worker processes. If None, one per CPU is used; with 1 the
+            files are checked in this process.
+        use_cache: Whether to skip files that are unchanged since they last passed, using
+            the check cache in .pysealer/cache (see check_cache.py)
+        use_git_blobs: Whether to skip tracked, unmodified files whose git blob was already
+            fully verified, recording newly verified blobs in the same cache directory
         
     Returns:
-        Dictionary mapping file paths to their verification results
+        Dictionary mapping file paths to their verification results, ordered by path
     """
     folder = Path(folder_path)
     
@@ -168,19 +417,180 @@ def check_decorators_in_folder(folder_path: str) -> Dict[str, Dict[str, dict]]:
     if not folder.is_dir():
         raise NotADirectoryError(f"'{folder_path}' is not a directory.")
     
-    # Find all Python files in the folder (recursive)
-    python_files = list(folder.rglob('*.py'))
+    # Find all Python files in the folder (recursive), in a stable order
+    file_paths = find_python_files(folder_path)
     
-    if not python_files:
+    if not file_paths:
         raise ValueError(f"No Python files found in '{folder_path}'.")
     
-    all_results = {}
+    return check_decorators_in_files(file_paths, jobs, use_cache, use_git_blobs, blob_root=str(folder))
+
+
+def check_decorators_in_files(file_paths: List[str], jobs: Optional[int] = 1, use_cache: bool = False, use_git_blobs: bool = False, blob_root: Optional[str] = None) -> Dict[str, Dict[str, dict]]:
+    """
+    Check decorators in the given Python files, e.g. the files changed since a git reference.
+    
+    Args:
+        file_paths: Paths of the Python files to check
+        jobs, use_cache, use_git_blobs: As for check_decorators_in_folder
+        blob_root: Folder whose tracked files are listed for use_git_blobs (default: the
+            common folder of file_paths)
+        
+    Returns:
+        Dictionary mapping file paths to their verification results, in the order given
+    """
+    all_results = dict(iter_check_files(file_paths, jobs, use_cache, use_git_blobs, blob_root))
+    return {file_path: all_results[file_path] for file_path in file_paths}
+
+
+def iter_check(path: str, jobs: Optional[int] = 1, use_cache: bool = False, use_git_blobs: bool = False) -> Iterator[Tuple[str, Dict[str, dict]]]:
+    """
+    Check a Python file or every Python file in a folder, yielding results as each file completes.
+    
+    Nothing is kept once a file's results have been yielded, so memory stays flat however
+    large the tree is, and the first failures are available as soon as their file is checked.
+    
+    Args:
+        path: Python file or folder to check
+        jobs, use_cache, use_git_blobs: As for check_decorators_in_folder
+        
+    Yields:
+        Tuples of (file path, verification results as returned by check_decorators, or
+        {"error": message} if the file could not be checked), in completion order
+    """
+    target = Path(path)
+    
+    if not target.exists():
+        raise FileNotFoundError(f"Path '{path}' does not exist.")
+    
+    if target.is_dir():
+        # Find all Python files in the folder (recursive), in a stable order
+        file_paths = find_python_files(path)
+        if not file_paths:
+            raise ValueError(f"No Python files found in '{path}'.")
+        blob_root = str(target)
+    else:
+        file_paths = [str(target)]
+        blob_root = None
+    
+    return iter_check_files(file_paths, jobs, use_cache, use_git_blobs, blob_root)
+
+
+def iter_check_files(file_paths: List[str], jobs: Optional[int] = 1, use_cache: bool = False, use_git_blobs: bool = False, blob_root: Optional[str] = None,
+                     *, verifying_key: Optional[VerifyingKey] = None, public_key: Optional[str] = None,
+                     executor: Optional[Executor] = None, key_error: Optional[Exception] = None) -> Iterator[Tuple[str, Dict[str, dict]]]:
+    """
+    Check the given Python files, yielding (file path, results) as each file completes.
+    
+    Files served from the check cache or the verified-blob store come first.
+    
+    Args:
+        file_paths: Paths of the Python files to check
+        jobs, use_cache, use_git_blobs, blob_root: As for check_decorators_in_files
+        verifying_key, public_key: Key to verify with, and its public key for the cache,
+            instead of the key of the .env file (as a Sealer session passes its own); worker
+            processes are handed it as well
+        executor: Thread pool to check in, instead of a process pool when jobs > 1
+        key_error: Error the caller's key failed to load with, reported for every file
+            holding a decorator
+    """
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    if jobs < 1:
+        raise ValueError(f"Number of jobs must be at least 1, got {jobs}.")
+    
+    return _iter_check_files(file_paths, jobs, use_cache, use_git_blobs, blob_root, verifying_key, public_key, executor, key_error)
+
+
+def _iter_check_files(file_paths: List[str], jobs: int, use_cache: bool, use_git_blobs: bool, blob_root: Optional[str],
+                      verifying_key: Optional[VerifyingKey], public_key: Optional[str],
+                      executor: Optional[Executor], key_error: Optional[Exception]) -> Iterator[Tuple[str, Dict[str, dict]]]:
+    """Generator behind iter_check_files, so that invalid arguments are reported on the call."""
+    if not file_paths:
+        return
+    
+    # Blob ids of tracked files whose working tree matches the index, listed before any file is read
+    listed_ns = time.time_ns()
+    if blob_root is None:
+        blob_root = os.path.commonpath([os.path.dirname(os.path.abspath(file_path)) for file_path in file_paths])
+    blobs = {}
+    if use_git_blobs:
+        with profiling.phase("git"):
+            unmodified = get_unmodified_blobs(blob_root) or {}
+        # Blob ids are keyed by resolved path, files by the (possibly relative) path they were given as
+        for file_path in file_paths:
+            object_id = unmodified.get(os.path.realpath(file_path))
+            if object_id is not None:
+                blobs[file_path] = object_id
+    
+    cache = None
+    if use_cache or blobs:
+        with profiling.phase("cache"):
+            cache = open_check_cache(blob_root, public_key)[0]
     
-    for py_file in python_files:
+    def record(file_path: str, results: Dict[str, dict], checked: bool) -> None:
+        """Remember a file's results in the cache and the verified-blob store."""
+        nonlocal cache
+        if cache is None:
+            return
         try:
-            results = check_decorators(str(py_file))
-            all_results[str(py_file)] = results
-        except Exception as e:
-            all_results[str(py_file)] = {"error": str(e)}
+            with profiling.phase("cache"):
+                if use_cache and checked:
+                    cache.store(file_path, results)
+                if file_path in blobs and _unchanged_since(file_path, listed_ns):
+                    cache.store_blob(blobs[file_path], results)
+        except (OSError, sqlite3.Error):
+            # A broken cache never fails a check
+            cache = None
     
-    return all_results
+    try:
+        to_check = file_paths
+        if cache is not None:
+            to_check = []
+            for file_path in file_paths:
+                try:
+                    with profiling.phase("cache"):
+                        cached = cache.lookup_blob(blobs[file_path]) if file_path in blobs else None
+                        by_path = cached is None and use_cache
+                        if by_path:
+                            cached = cache.lookup(file_path)
+                    if by_path and cached is not None:
+                        # Passed before under another blob id, or before blobs were recorded
+                        record(file_path, cached, checked=False)
+                except (OSError, sqlite3.Error):
+                    cached = None
+                if cached is None:
+                    to_check.append(file_path)
+                else:
+                    yield file_path, {name: SymbolResult.from_dict(file_path, name, result) for name, result in cached.items()}
+        
+        # A pool only pays off with more than one file per worker
+        jobs = min(jobs, len(to_check))
+        if executor is not None and verifying_key is not None and len(to_check) > 1:
+            checked_files = _iter_files_in_threads(to_check, executor, verifying_key)
+        elif jobs > 1 and key_error is None:
+            # The workers are handed the caller's key, not left to load their own
+            checked_files = _iter_files_in_parallel(to_check, jobs, str(verifying_key) if verifying_key is not None else None)
+        else:
+            checked_files = _iter_files_sequentially(to_check, verifying_key, key_error)
+        
+        for file_path, results in checked_files:
+            record(file_path, results, checked=True)
+            yield file_path, results
+    finally:
+        if cache is not None:
+            try:
+                cache.close()
+            except (OSError, sqlite3.Error):
+                pass
+
+
+def _unchanged_since(file_path: str, listed_ns: int) -> bool:
+    """
+    Whether a file was last written well before its blob id was listed, so the content that
+    was verified is the content of that blob.
+    """
+    try:
+        return os.stat(file_path).st_mtime_ns < listed_ns - RACY_WINDOW_NS
+    except OSError:
+        return False
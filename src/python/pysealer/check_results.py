@@ -0,0 +1,126 @@
+"""Compact per-symbol check results that load sources and diffs only when they are accessed."""
+
+from collections.abc import Mapping
+from typing import Any, Iterator, List, Optional, Tuple
+from .git_diff import get_function_diff, is_git_available
+from .source_index import SourceIndex
+from . import profiling
+
+# Keys of the dict view, in the order check_decorators has always used
+RESULT_KEYS = ("has_decorator", "valid", "signature", "message", "line_start", "line_end", "source", "diff")
+
+# Keys that are stored, as opposed to loaded on access
+STORED_KEYS = RESULT_KEYS[:6]
+
+
+class SymbolResult(Mapping):
+    """
+    Verification result of one function or class.
+
+    Only the verdict, signature and line span are stored. The decorator-stripped source is
+    read back from the file, and the git diff of an invalid signature is computed, the first
+    time they are accessed. Both reflect the file as it is at that moment, which may differ
+    from the content that was verified if the file changed in between; assign them (e.g.
+    result["source"] = ...) to pin them, as aio.load_diffs does for the diff.
+
+    The result also behaves like the dict check_decorators used to return: result["valid"],
+    result.get("diff") and dict(result) keep working, and its keys can be assigned.
+    """
+
+    __slots__ = (
+        "file_path", "name", "has_decorator", "valid", "signature", "message",
+        "line_start", "line_end", "_source", "_diff", "_diff_loaded",
+    )
+
+    def __init__(self, file_path: str, name: str, signature: Optional[str], line_start: int, line_end: int,
+                 valid: bool = False, message: str = ""):
+        self.file_path = file_path
+        self.name = name
+        self.has_decorator = signature is not None
+        self.valid = valid
+        self.signature = signature
+        self.message = message
+        # 1-based first (def/class keyword) and last line of the definition
+        self.line_start = line_start
+        self.line_end = line_end
+        self._source: Optional[str] = None
+        self._diff: Optional[List[Tuple[str, str, int]]] = None
+        self._diff_loaded = False
+
+    @classmethod
+    def from_dict(cls, file_path: str, name: str, result: dict) -> "SymbolResult":
+        """Build a result from its dict form, e.g. as stored in the check cache."""
+        record = cls(file_path, name, result["signature"], result["line_start"], result["line_end"],
+                     result["valid"], result["message"])
+        record.has_decorator = result["has_decorator"]
+        return record
+
+    @property
+    def source(self) -> str:
+        """Source of the definition without pysealer decorators, as it is signed (empty if undecorated)."""
+        if self._source is None:
+            self._source = self._load_source()
+        return self._source
+
+    @property
+    def diff(self) -> Optional[List[Tuple[str, str, int]]]:
+        """Git diff of the definition against HEAD if its signature is invalid, otherwise None."""
+        if not self._diff_loaded:
+            self._diff = self._load_diff()
+            self._diff_loaded = True
+        return self._diff
+
+    def _load_source(self) -> str:
+        """Read the definition back from the file, as it is now on disk."""
+        if not self.has_decorator:
+            return ""
+        try:
+            index = SourceIndex.from_file(self.file_path)
+        except (OSError, SyntaxError, UnicodeDecodeError):
+            return ""
+        for symbol in index.symbols:
+            if symbol.name == self.name and symbol.line_start == self.line_start:
+                return index.segment(symbol)
+        return ""
+
+    def _load_diff(self) -> Optional[List[Tuple[str, str, int]]]:
+        """Diff the definition against git HEAD (only for invalid signatures, and only if git is available)."""
+        if not self.has_decorator or self.valid or not is_git_available():
+            return None
+        source = self.source
+        try:
+            with profiling.phase("git diff"):
+                return get_function_diff(self.file_path, self.name, source, self.line_start)
+        except Exception:
+            # If git diff fails, just continue without it
+            return None
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in RESULT_KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key == "source":
+            self._source = value
+        elif key == "diff":
+            self._diff = value
+            self._diff_loaded = True
+        elif key in STORED_KEYS:
+            setattr(self, key, value)
+        else:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(RESULT_KEYS)
+
+    def __len__(self) -> int:
+        return len(RESULT_KEYS)
+
+    def __repr__(self) -> str:
+        return (f"SymbolResult(name={self.name!r}, valid={self.valid!r}, has_decorator={self.has_decorator!r}, "
+                f"line_start={self.line_start!r}, line_end={self.line_end!r})")
+
+    def stored(self) -> dict:
+        """Dict of the stored fields only, without loading the source or diff."""
+        return {key: getattr(self, key) for key in STORED_KEYS}
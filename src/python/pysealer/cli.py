@@ -6,23 +6,33 @@ Commands:
 - lock: Add pysealer decorators to all functions and classes in a Python file.
 - check: Check the integrity and validity of pysealer decorators in a Python file.
 - remove: Remove all pysealer decorators from a Python file.
+- watch: Check (or re-lock) a Python file or folder again every time a file changes.
+- migrate: Re-encode existing pysealer decorators in another signature encoding.
+- cache prune / cache clear: Drop stale or all entries of the check cache.
 
 Use `pysealer --help` to see available options and command details.
 Use `pysealer --version` to see the current version of pysealer installed.
 """
 
+import json
+import sqlite3
+import time
 from pathlib import Path
+from typing import Optional
 
 import typer
 from typing_extensions import Annotated
 
 from . import __version__
-from .setup import setup_keypair
-from .add_decorators import add_decorators, add_decorators_to_folder
-from .check_decorators import check_decorators, check_decorators_in_folder
-from .remove_decorators import remove_decorators, remove_decorators_from_folder
-from .git_diff import is_git_available
+from .setup import get_public_key, setup_keypair
+from .add_decorators import write_atomically
+from .migrate_decorators import migrate_decorators, migrate_decorators_in_folder
+from .check_cache import CheckCache, find_cache_dir
+from .git_diff import get_changed_files, get_changed_symbols, is_git_available
 from .git_pre_commit import install_hook, get_hook_status, is_git_repository
+from .sealer import Sealer
+from .watch import DEFAULT_DEBOUNCE, DEFAULT_POLL_INTERVAL, Watcher, WatchEvent
+from . import profiling
 
 app = typer.Typer(
     name="pysealer",
@@ -30,6 +40,13 @@ app = typer.Typer(
     no_args_is_help=True,
 )
 
+cache_app = typer.Typer(
+    name="cache",
+    help="Manage the cache of files that passed 'pysealer check'",
+    no_args_is_help=True,
+)
+app.add_typer(cache_app)
+
 
 def _format_diff_output(func_name: str, diff_lines):
     """Format and display git diff with color coding."""
@@ -52,6 +69,44 @@ def _format_diff_output(func_name: str, diff_lines):
         typer.echo(line_str)
 
 
+def _start_profile(ctx: typer.Context, profile: bool, profile_stats: Optional[str]):
+    """Profile the rest of a command and print the breakdown to stderr once it is done, however it exits."""
+    if not profile and profile_stats is None:
+        return
+    profiling.start(profile_stats)
+
+    def report():
+        for line in profiling.stop().report():
+            typer.echo(line, err=True)
+        if profile_stats is not None:
+            typer.echo(f"cProfile stats written to {profile_stats}", err=True)
+
+    ctx.call_on_close(report)
+
+
+def _changed_files(path: Path, since: Optional[str], staged: bool):
+    """List the Python files under path changed since a git reference or staged for commit."""
+    with profiling.phase("git"):
+        changed_files, base = get_changed_files(str(path.resolve()), since, staged)
+    if not changed_files:
+        scope = f"changed since {since}" if since is not None else "staged for commit"
+        typer.echo(typer.style(f"No Python files {scope}.", fg=typer.colors.YELLOW, bold=True))
+    return changed_files, base
+
+
+def _echo_changed_symbols(changed_files, base: str, since: Optional[str]):
+    """List the functions and classes that changed in each changed file."""
+    scope = f"since {since}" if since is not None else "in staged files"
+    typer.echo(typer.style(f"Changed functions and classes {scope}:", fg=typer.colors.BLUE, bold=True))
+    for file in changed_files:
+        try:
+            names = get_changed_symbols(file, base)
+        except (OSError, SyntaxError, UnicodeDecodeError):
+            continue
+        if names:
+            typer.echo(f"  {file}: {', '.join(names)}")
+
+
 def version_callback(value: bool):
     """Helper function to display version information."""
     if value:
@@ -150,12 +205,46 @@ def init(
 
 @app.command()
 def lock(
+    ctx: typer.Context,
     file_path: Annotated[
         str,
         typer.Argument(help="Path to the Python file or folder to lock")
-    ]
+    ],
+    mode: Annotated[
+        str,
+        typer.Option("--mode", help="Seal mode: 'plain' (sign the source) or 'blake3' (sign a BLAKE3 digest of the source, faster for large classes).")
+    ] = "plain",
+    encoding: Annotated[
+        str,
+        typer.Option("--encoding", help="Signature encoding: 'base32' (fast) or 'base58' (original).")
+    ] = "base32",
+    root: Annotated[
+        bool,
+        typer.Option("--root", help="Also add a file-level root seal so unchanged files verify with one signature check.")
+    ] = False,
+    jobs: Annotated[
+        int,
+        typer.Option("--jobs", "-j", help="Number of threads used to lock a folder (default: one per CPU).", min=1)
+    ] = None,
+    since: Annotated[
+        str,
+        typer.Option("--since", help="Only lock Python files changed since the merge base of this git reference and HEAD.")
+    ] = None,
+    staged: Annotated[
+        bool,
+        typer.Option("--staged", help="Only lock Python files staged for commit.")
+    ] = False,
+    profile: Annotated[
+        bool,
+        typer.Option("--profile", help="Print the wall time and call count of each phase, and the slowest files, to stderr.")
+    ] = False,
+    profile_stats: Annotated[
+        str,
+        typer.Option("--profile-stats", help="Also run cProfile in this process and write its pstats to this file (implies --profile).")
+    ] = None
 ):
     """Add decorators to all functions and classes in a Python file or all Python files in a folder."""
+    _start_profile(ctx, profile, profile_stats)
     path = Path(file_path)
     
     # Validate path exists
@@ -169,28 +258,38 @@ def lock(
         raise typer.Exit(code=1)
     
     try:
+        # Handle files changed since a git reference, or staged for commit
+        changed_files = None
+        if since is not None or staged:
+            changed_files, base = _changed_files(path, since, staged)
+            if not changed_files:
+                return
+        
+        sealer = Sealer(jobs=jobs)
+        ctx.call_on_close(sealer.close)
+        
         # Handle folder path
-        if path.is_dir():
+        if changed_files is not None or path.is_dir():
             resolved_path = str(path.resolve())
-            decorated_files = add_decorators_to_folder(resolved_path)
+            if changed_files is not None:
+                decorated_files = sealer.lock_files(changed_files, mode, encoding, root)
+            else:
+                decorated_files = sealer.lock(resolved_path, mode, encoding, root)
             
             file_word = "file" if len(decorated_files) == 1 else "files"
             typer.echo(typer.style(f"Successfully added decorators to {len(decorated_files)} {file_word}:", fg=typer.colors.BLUE, bold=True))
             for file in decorated_files:
                 typer.echo(f"  {typer.style('✓', fg=typer.colors.GREEN)} {file}")
+            
+            if changed_files is not None:
+                _echo_changed_symbols(changed_files, base, since)
         
         # Handle file path
         else:
             
             # Add decorators to all functions and classes in the file
             resolved_path = str(path.resolve())
-            modified_code, has_changes = add_decorators(resolved_path)
-            
-            if has_changes:
-                # Write the modified code back to the file
-                with open(resolved_path, 'w') as f:
-                    f.write(modified_code)
-                
+            if sealer.lock(resolved_path, mode, encoding, root):
                 typer.echo(typer.style(f"Successfully added decorators to 1 file:", fg=typer.colors.BLUE, bold=True))
                 typer.echo(f"  {typer.style('✓', fg=typer.colors.GREEN)} {resolved_path}")
             else:
@@ -207,12 +306,46 @@ def lock(
 
 @app.command()
 def check(
+    ctx: typer.Context,
     file_path: Annotated[
         str,
         typer.Argument(help="Path to the Python file or folder to check")
-    ]
+    ],
+    jobs: Annotated[
+        int,
+        typer.Option("--jobs", "-j", help="Number of threads used to check a folder (default: one per CPU).", min=1)
+    ] = None,
+    no_cache: Annotated[
+        bool,
+        typer.Option("--no-cache", help="Verify every file of a folder, ignoring and not updating the check cache.")
+    ] = False,
+    git_blobs: Annotated[
+        bool,
+        typer.Option("--git-blobs", help="Skip tracked, unmodified files whose git blob was already fully verified.")
+    ] = False,
+    since: Annotated[
+        str,
+        typer.Option("--since", help="Only check Python files changed since the merge base of this git reference and HEAD.")
+    ] = None,
+    staged: Annotated[
+        bool,
+        typer.Option("--staged", help="Only check Python files staged for commit.")
+    ] = False,
+    output_format: Annotated[
+        str,
+        typer.Option("--format", help="Output format: 'text' (summary once every file is checked) or 'ndjson' (one JSON object per file as soon as it is checked).")
+    ] = "text",
+    profile: Annotated[
+        bool,
+        typer.Option("--profile", help="Print the wall time and call count of each phase, and the slowest files, to stderr.")
+    ] = False,
+    profile_stats: Annotated[
+        str,
+        typer.Option("--profile-stats", help="Also run cProfile in this process and write its pstats to this file (implies --profile).")
+    ] = None
 ):
     """Check the integrity of decorators in a Python file or all Python files in a folder."""
+    _start_profile(ctx, profile, profile_stats)
     path = Path(file_path)
     
     # Validate path exists
@@ -225,6 +358,17 @@ def check(
         typer.echo(typer.style(f"Error: File '{path}' is not a Python file.", fg=typer.colors.RED, bold=True), err=True)
         raise typer.Exit(code=1)
     
+    if output_format not in ("text", "ndjson"):
+        typer.echo(typer.style(f"Error: Unknown output format '{output_format}', expected 'text' or 'ndjson'.", fg=typer.colors.RED, bold=True), err=True)
+        raise typer.Exit(code=1)
+    
+    sealer = Sealer(jobs=jobs)
+    ctx.call_on_close(sealer.close)
+    
+    if output_format == "ndjson":
+        _check_as_ndjson(sealer, path, not no_cache, git_blobs, since, staged)
+        return
+    
     try:
         # Check if git is available for diff output
         git_available = is_git_available()
@@ -232,10 +376,20 @@ def check(
             typer.echo(typer.style("Note: Git not available - diff output will not be shown for invalid signatures.", fg=typer.colors.YELLOW))
             typer.echo()
         
+        # Handle files changed since a git reference, or staged for commit
+        changed_files = None
+        if since is not None or staged:
+            changed_files, base = _changed_files(path, since, staged)
+            if not changed_files:
+                return
+        
         # Handle folder path
-        if path.is_dir():
+        if changed_files is not None or path.is_dir():
             resolved_path = str(path.resolve())
-            all_results = check_decorators_in_folder(resolved_path)
+            if changed_files is not None:
+                all_results = sealer.check_files(changed_files, use_cache=not no_cache, use_git_blobs=git_blobs)
+            else:
+                all_results = sealer.check(resolved_path, use_cache=not no_cache, use_git_blobs=git_blobs)
             
             total_decorated = 0
             total_valid = 0
@@ -296,6 +450,9 @@ def check(
                                 if result.get("diff"):
                                     _format_diff_output(func_name, result["diff"])
             
+            if changed_files is not None:
+                _echo_changed_symbols(changed_files, base, since)
+            
             # Exit with error if there were failures
             if total_decorated > 0 and total_valid < total_decorated:
                 raise typer.Exit(code=1)
@@ -305,7 +462,7 @@ def check(
             
             # Check all decorators in the file
             resolved_path = str(path.resolve())
-            results = check_decorators(resolved_path)
+            results = sealer.check_file(resolved_path)
             
             # Return success if all decorated functions are valid
             decorated_count = sum(1 for r in results.values() if r["has_decorator"])
@@ -337,14 +494,186 @@ def check(
         raise typer.Exit(code=1)
 
 
+def _ndjson_record(file_path: str, results: dict) -> dict:
+    """Summarize one file's check results as a JSON-serializable record, without sources."""
+    if "error" in results:
+        return {"file": file_path, "status": "error", "error": results["error"]}
+    
+    symbols = []
+    for name, result in results.items():
+        symbols.append({
+            "name": name,
+            "has_decorator": result["has_decorator"],
+            "valid": result["valid"],
+            "message": result["message"],
+            "line_start": result["line_start"],
+            "line_end": result["line_end"],
+            "diff": result.get("diff"),
+        })
+    
+    decorated = [symbol for symbol in symbols if symbol["has_decorator"]]
+    if not decorated:
+        status = "unsealed"
+    elif all(symbol["valid"] for symbol in decorated):
+        status = "valid"
+    else:
+        status = "invalid"
+    return {"file": file_path, "status": status, "symbols": symbols}
+
+
+def _check_as_ndjson(sealer: Sealer, path: Path, use_cache: bool, use_git_blobs: bool, since: Optional[str], staged: bool):
+    """Stream one JSON object per file as soon as it is checked, then a summary object."""
+    counts = {"valid": 0, "invalid": 0, "error": 0, "unsealed": 0}
+    try:
+        if since is not None or staged:
+            with profiling.phase("git"):
+                changed_files, _ = get_changed_files(str(path.resolve()), since, staged)
+            checked = sealer.iter_check_files(changed_files, use_cache, use_git_blobs)
+        else:
+            checked = sealer.iter_check(str(path.resolve()), use_cache, use_git_blobs)
+        
+        for file_path, results in checked:
+            record = _ndjson_record(file_path, results)
+            counts[record["status"]] += 1
+            typer.echo(json.dumps(record))
+    except (FileNotFoundError, NotADirectoryError, ValueError) as e:
+        typer.echo(json.dumps({"status": "error", "error": str(e)}))
+        raise typer.Exit(code=1)
+    
+    typer.echo(json.dumps({"summary": counts}))
+    if counts["invalid"]:
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def watch(
+    ctx: typer.Context,
+    file_path: Annotated[
+        str,
+        typer.Argument(help="Path to the Python file or folder to watch")
+    ],
+    lock: Annotated[
+        bool,
+        typer.Option("--lock", help="Seal changed files again instead of checking them.")
+    ] = False,
+    mode: Annotated[
+        str,
+        typer.Option("--mode", help="Seal mode used with --lock: 'plain' or 'blake3'.")
+    ] = "plain",
+    encoding: Annotated[
+        str,
+        typer.Option("--encoding", help="Signature encoding used with --lock: 'base32' or 'base58'.")
+    ] = "base32",
+    root: Annotated[
+        bool,
+        typer.Option("--root", help="With --lock, also add a file-level root seal.")
+    ] = False,
+    jobs: Annotated[
+        int,
+        typer.Option("--jobs", "-j", help="Number of threads used for the initial check or lock of a folder (default: one per CPU).", min=1)
+    ] = None,
+    debounce: Annotated[
+        float,
+        typer.Option("--debounce", help="Seconds without further changes to wait before handling a burst of saves.", min=0)
+    ] = DEFAULT_DEBOUNCE,
+    poll: Annotated[
+        bool,
+        typer.Option("--poll", help="Poll file modification times instead of using inotify.")
+    ] = False,
+    poll_interval: Annotated[
+        float,
+        typer.Option("--poll-interval", help="Seconds between two polls.", min=0.05)
+    ] = DEFAULT_POLL_INTERVAL
+):
+    """Check (or with --lock, re-lock) a Python file or folder, then again every file that changes, until interrupted."""
+    path = Path(file_path)
+    
+    # Validate it's a Python file or directory
+    if path.is_file() and path.suffix != '.py':
+        typer.echo(typer.style(f"Error: File '{path}' is not a Python file.", fg=typer.colors.RED, bold=True), err=True)
+        raise typer.Exit(code=1)
+    
+    try:
+        sealer = Sealer(jobs=jobs)
+        ctx.call_on_close(sealer.close)
+        watcher = Watcher(str(path), lock, mode, encoding, root, debounce, poll_interval, poll, sealer=sealer)
+        invalid = sum(1 for event in watcher.start() if not _echo_watch_event(event, quiet=True))
+    except (RuntimeError, FileNotFoundError, NotADirectoryError, ValueError) as e:
+        typer.echo(typer.style(f"Error: {e}", fg=typer.colors.RED, bold=True), err=True)
+        raise typer.Exit(code=1)
+    
+    file_word = "file" if len(watcher) == 1 else "files"
+    action = "Locked" if lock else "Checked"
+    summary = f"{action} {len(watcher)} {file_word}" + (f", {invalid} with problems" if invalid else "")
+    typer.echo(typer.style(f"{summary}. Watching for changes with {watcher.backend} (Ctrl+C to stop)...", fg=typer.colors.BLUE, bold=True))
+    
+    try:
+        for events in watcher.changes():
+            typer.echo(typer.style(time.strftime("[%H:%M:%S]"), dim=True))
+            for event in events:
+                _echo_watch_event(event)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+def _echo_watch_event(event: WatchEvent, quiet: bool = False) -> bool:
+    """
+    Print what happened to a file. With quiet, only problems are printed.
+    
+    Returns:
+        Whether the file is fine: removed, locked, or every decorator valid
+    """
+    if event.removed:
+        if not quiet:
+            typer.echo(f"  {typer.style('⊘', fg=typer.colors.YELLOW)} {event.file_path} (removed)")
+        return True
+    if event.results is None:
+        if not quiet:
+            typer.echo(f"  {typer.style('✓', fg=typer.colors.GREEN)} {event.file_path} (locked)")
+        return True
+    if "error" in event.results:
+        typer.echo(typer.style(f"  ✗ {event.file_path}: {event.results['error']}", fg=typer.colors.RED))
+        return False
+    
+    if not any(result["has_decorator"] for result in event.results.values()):
+        if not quiet:
+            typer.echo(f"  {typer.style('⊘', fg=typer.colors.YELLOW)} {event.file_path} (no pysealer decorators)")
+        return True
+    
+    invalid = [name for name, result in event.results.items() if result["has_decorator"] and not result["valid"]]
+    if not invalid:
+        if not quiet:
+            typer.echo(f"  {typer.style('✓', fg=typer.colors.GREEN)} {event.file_path}")
+        return True
+    
+    typer.echo(f"  {typer.style('✗', fg=typer.colors.RED)} {event.file_path}: {', '.join(invalid)}")
+    for name in invalid:
+        diff = event.results[name].get("diff")
+        if diff:
+            _format_diff_output(name, diff)
+    return False
+
+
 @app.command()
 def remove(
+    ctx: typer.Context,
     file_path: Annotated[
         str,
         typer.Argument(help="Path to the Python file or folder to remove pysealer decorators from")
-    ]
+    ],
+    profile: Annotated[
+        bool,
+        typer.Option("--profile", help="Print the wall time and call count of each phase, and the slowest files, to stderr.")
+    ] = False,
+    profile_stats: Annotated[
+        str,
+        typer.Option("--profile-stats", help="Also run cProfile in this process and write its pstats to this file (implies --profile).")
+    ] = None
 ):
     """Remove pysealer decorators from all functions and classes in a Python file or all Python files in a folder."""
+    _start_profile(ctx, profile, profile_stats)
     path = Path(file_path)
     
     # Validate path exists
@@ -358,10 +687,12 @@ def remove(
         raise typer.Exit(code=1)
     
     try:
+        sealer = Sealer()
+        
         # Handle folder path
         if path.is_dir():
             resolved_path = str(path.resolve())
-            modified_files = remove_decorators_from_folder(resolved_path)
+            modified_files = sealer.remove(resolved_path)
             
             file_word = "file" if len(modified_files) == 1 else "files"
             typer.echo(typer.style(f"Successfully removed decorators from {len(modified_files)} {file_word}:", fg=typer.colors.BLUE, bold=True))
@@ -370,7 +701,7 @@ def remove(
         # Handle single file
         else:
             resolved_path = str(path.resolve())
-            modified_content, _ = remove_decorators(resolved_path)
+            sealer.remove(resolved_path)
             typer.echo(typer.style(f"✓ Successfully removed decorators from: {resolved_path}", fg=typer.colors.GREEN))
 
     except Exception as e:
@@ -378,6 +709,114 @@ def remove(
         raise typer.Exit(code=1)
 
 
+@app.command()
+def migrate(
+    file_path: Annotated[
+        str,
+        typer.Argument(help="Path to the Python file or folder to migrate")
+    ],
+    encoding: Annotated[
+        str,
+        typer.Option("--encoding", help="Target signature encoding: 'base32' (fast) or 'base58' (original).")
+    ] = "base32"
+):
+    """Re-encode existing pysealer decorators in a Python file or all Python files in a folder without signing again."""
+    path = Path(file_path)
+    
+    # Validate path exists
+    if not path.exists():
+        typer.echo(typer.style(f"Error: Path '{path}' does not exist.", fg=typer.colors.RED, bold=True), err=True)
+        raise typer.Exit(code=1)
+    
+    # Validate it's a Python file or directory
+    if path.is_file() and path.suffix != '.py':
+        typer.echo(typer.style(f"Error: File '{path}' is not a Python file.", fg=typer.colors.RED, bold=True), err=True)
+        raise typer.Exit(code=1)
+    
+    try:
+        # Handle folder path
+        if path.is_dir():
+            resolved_path = str(path.resolve())
+            migrated_files = migrate_decorators_in_folder(resolved_path, encoding)
+            
+            file_word = "file" if len(migrated_files) == 1 else "files"
+            typer.echo(typer.style(f"Successfully re-encoded decorators in {len(migrated_files)} {file_word}:", fg=typer.colors.BLUE, bold=True))
+            for file in migrated_files:
+                typer.echo(f"  {typer.style('✓', fg=typer.colors.GREEN)} {file}")
+        
+        # Handle file path
+        else:
+            resolved_path = str(path.resolve())
+            modified_code, changed = migrate_decorators(resolved_path, encoding)
+            
+            if changed:
+                write_atomically(resolved_path, modified_code)
+                
+                typer.echo(typer.style(f"Successfully re-encoded decorators in 1 file:", fg=typer.colors.BLUE, bold=True))
+                typer.echo(f"  {typer.style('✓', fg=typer.colors.GREEN)} {resolved_path}")
+            else:
+                typer.echo(typer.style(f"No decorators to re-encode in file:", fg=typer.colors.YELLOW, bold=True))
+                typer.echo(f"  {typer.style('⊘', fg=typer.colors.YELLOW)} {resolved_path}")
+    
+    except (RuntimeError, FileNotFoundError, NotADirectoryError, ValueError, SyntaxError) as e:
+        typer.echo(typer.style(f"Error: {e}", fg=typer.colors.RED, bold=True), err=True)
+        raise typer.Exit(code=1)
+
+
+def _open_cache(path: str, public_key: Optional[str] = None) -> CheckCache:
+    """Open the check cache of a folder for a cache command, exiting if there is none."""
+    cache_dir = find_cache_dir(path)
+    if not cache_dir.exists():
+        typer.echo(typer.style(f"No check cache found at {cache_dir}", fg=typer.colors.YELLOW, bold=True))
+        raise typer.Exit()
+    return CheckCache(cache_dir, public_key)
+
+
+@cache_app.command("prune")
+def cache_prune(
+    path: Annotated[
+        str,
+        typer.Argument(help="Folder whose check cache to prune")
+    ] = "."
+):
+    """Drop check cache entries of deleted or modified files, and of other keys."""
+    try:
+        public_key = get_public_key()
+    except (FileNotFoundError, ValueError):
+        # Without a key, entries of every key are kept
+        public_key = None
+    
+    try:
+        with _open_cache(path, public_key) as cache:
+            removed = cache.prune()
+            remaining = len(cache)
+    except (sqlite3.Error, OSError) as e:
+        typer.echo(typer.style(f"Error: Cannot prune check cache: {e}", fg=typer.colors.RED, bold=True), err=True)
+        raise typer.Exit(code=1)
+    
+    entry_word = "entry" if removed == 1 else "entries"
+    typer.echo(typer.style(f"Pruned {removed} {entry_word} from the check cache ({remaining} left).", fg=typer.colors.BLUE, bold=True))
+
+
+@cache_app.command("clear")
+def cache_clear(
+    path: Annotated[
+        str,
+        typer.Argument(help="Folder whose check cache to clear")
+    ] = "."
+):
+    """Drop every check cache entry, so the next check verifies every file."""
+    try:
+        with _open_cache(path) as cache:
+            removed = cache.clear()
+    except (sqlite3.Error, OSError) as e:
+        typer.echo(typer.style(f"Error: Cannot clear check cache: {e}", fg=typer.colors.RED, bold=True), err=True)
+        raise typer.Exit(code=1)
+    
+    entry_word = "entry" if removed == 1 else "entries"
+    typer.echo(typer.style(f"Cleared {removed} {entry_word} from the check cache.", fg=typer.colors.BLUE, bold=True))
+
+
 def main():
     """Main CLI entry point."""
     app()
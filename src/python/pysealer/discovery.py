@@ -0,0 +1,331 @@
+"""Discovery of the Python files in a folder, pruning ignored directories instead of walking them."""
+
+import os
+import re
+from fnmatch import fnmatch
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+from .git_diff import list_git_files
+from . import profiling
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+# Directories that never hold code to seal: VCS metadata, virtual environments, installed
+# packages, caches and packaging metadata. A directory holding a pyvenv.cfg is a virtual environment too.
+DEFAULT_EXCLUDES = (
+    ".git", ".hg", ".svn", ".pysealer",
+    ".venv", "venv", "site-packages", "node_modules",
+    "__pycache__", ".mypy_cache", ".pytest_cache", ".ruff_cache", ".tox", ".nox",
+    "*.egg-info",
+)
+
+# Build output, excluded only at the project root: packages named build or dist elsewhere are code
+DEFAULT_ROOT_EXCLUDES = ("build", "dist")
+
+
+class Rules:
+    """
+    Include and exclude globs of a project, read from [tool.pysealer] in its pyproject.toml:
+
+        [tool.pysealer]
+        include = ["src/*"]
+        exclude = ["tests/fixtures", "*_pb2.py"]
+
+    A glob without a slash matches the name of a file or of any directory above it. A glob
+    with a slash matches the path relative to the project root, i.e. the directory holding
+    pyproject.toml. Excludes extend DEFAULT_EXCLUDES and DEFAULT_ROOT_EXCLUDES; with includes,
+    only files matching one of them are kept.
+    """
+
+    def __init__(self, root: str, include: Sequence[str] = (), exclude: Sequence[str] = ()):
+        self.root = root
+        self.include = [pattern.strip("/") for pattern in include]
+        self.exclude_names = list(DEFAULT_EXCLUDES)
+        self.exclude_paths = list(DEFAULT_ROOT_EXCLUDES)
+        for pattern in exclude:
+            pattern = pattern.strip("/")
+            (self.exclude_paths if "/" in pattern else self.exclude_names).append(pattern)
+
+    @classmethod
+    def for_folder(cls, folder: str) -> "Rules":
+        """Rules of the project a folder belongs to (defaults only if it has no [tool.pysealer] table)."""
+        return _rules_for(os.path.abspath(folder))
+
+    def _relative(self, path: str) -> str:
+        """Path relative to the project root, in POSIX form."""
+        return Path(os.path.relpath(path, self.root)).as_posix()
+
+    def excludes_name(self, name: str) -> bool:
+        """Whether a file or directory is excluded by its name alone."""
+        return any(fnmatch(name, pattern) for pattern in self.exclude_names)
+
+    def excludes(self, path: str) -> bool:
+        """Whether a file or directory is excluded by its name or by its path in the project."""
+        if self.excludes_name(os.path.basename(path)):
+            return True
+        relative = self._relative(path)
+        return any(fnmatch(relative, pattern) or relative.startswith(pattern + "/") for pattern in self.exclude_paths)
+
+    def includes(self, path: str) -> bool:
+        """Whether a file is covered by the include globs (every file is without any)."""
+        if not self.include:
+            return True
+        relative = self._relative(path)
+        name = os.path.basename(path)
+        return any(
+            fnmatch(relative, pattern) or relative.startswith(pattern + "/") if "/" in pattern else fnmatch(name, pattern)
+            for pattern in self.include
+        )
+
+
+@lru_cache(maxsize=64)
+def _rules_for(folder: str) -> Rules:
+    """Read [tool.pysealer] from the nearest pyproject.toml at or above a folder."""
+    for parent in [Path(folder)] + list(Path(folder).parents):
+        pyproject = parent / "pyproject.toml"
+        if not pyproject.is_file():
+            continue
+        if tomllib is None:
+            # Without a TOML parser only the default excludes apply
+            return Rules(str(parent))
+        try:
+            with open(pyproject, "rb") as f:
+                config = tomllib.load(f).get("tool", {}).get("pysealer", {})
+        except (OSError, tomllib.TOMLDecodeError) as e:
+            raise ValueError(f"Cannot read [tool.pysealer] from '{pyproject}': {e}")
+        include, exclude = config.get("include", []), config.get("exclude", [])
+        for key, value in (("include", include), ("exclude", exclude)):
+            if not isinstance(value, list) or not all(isinstance(pattern, str) for pattern in value):
+                raise ValueError(f"[tool.pysealer] {key} in '{pyproject}' must be a list of glob strings")
+        return Rules(str(parent), include, exclude)
+    return Rules(folder)
+
+
+def find_python_files(folder: str, rules: Optional[Rules] = None) -> List[str]:
+    """
+    List the Python files in a folder (recursively) that pysealer should handle, in a stable order.
+
+    Inside a git repository, the files come from a single `git ls-files` call, so everything
+    .gitignore ignores is left out without being walked. Elsewhere the folder is walked with
+    os.scandir, honouring the .gitignore files found on the way. Either way, directories
+    matching DEFAULT_EXCLUDES or the project's [tool.pysealer] excludes are pruned, and virtual
+    environments are skipped.
+
+    Args:
+        folder: Path to the folder to search
+        rules: Include and exclude globs to apply instead of those of the folder's project
+
+    Returns:
+        Sorted paths of the Python files, each joined onto folder as given
+    """
+    if rules is None:
+        rules = Rules.for_folder(folder)
+    with profiling.phase("discover"):
+        return select_python_files(folder, list_git_files(folder), rules)
+
+
+def select_python_files(folder: str, listed: Optional[List[str]], rules: Rules) -> List[str]:
+    """
+    The Python files of a folder, from its git listing, or by walking it when listed is None.
+
+    Shared by find_python_files and aio.find_python_files, which only run `git ls-files` differently.
+
+    Returns:
+        Sorted paths of the Python files, each joined onto folder as given
+    """
+    if listed is None:
+        relative_paths = _walk(folder, rules)
+    else:
+        relative_paths = _filter_listed(folder, listed, rules)
+    return sorted(str(Path(folder) / relative_path) for relative_path in relative_paths)
+
+
+def _filter_listed(folder: str, listed: List[str], rules: Rules) -> List[str]:
+    """Keep the Python files of a git listing that exist and that no rule excludes."""
+    kept = []
+    # Verdict for each directory, so every directory is matched against the rules once
+    pruned = {"": False}
+
+    def is_pruned(directory: str) -> bool:
+        if directory not in pruned:
+            parent = os.path.dirname(directory)
+            pruned[directory] = is_pruned(parent) or _prunes(os.path.join(folder, directory), rules)
+        return pruned[directory]
+
+    for relative_path in listed:
+        if not relative_path.endswith(".py"):
+            continue
+        path = os.path.join(folder, relative_path)
+        if is_pruned(os.path.dirname(relative_path)) or rules.excludes(path) or not rules.includes(path):
+            continue
+        # Tracked files deleted from the working tree are still listed
+        if os.path.isfile(path):
+            kept.append(relative_path)
+    return kept
+
+
+def find_directories(folder: str, rules: Optional[Rules] = None) -> List[str]:
+    """
+    List every directory under a folder that discovery descends into, the folder included.
+
+    These are the directories where a new Python file would be discovered, e.g. to watch them.
+    Directories are walked with os.scandir, pruned and gitignored ones left out as for
+    find_python_files.
+    """
+    if rules is None:
+        rules = Rules.for_folder(folder)
+    directories: List[str] = []
+    with profiling.phase("discover"):
+        _walk(folder, rules, directories)
+    return [os.path.join(folder, directory) if directory else folder for directory in directories]
+
+
+def _prunes(directory: str, rules: Rules) -> bool:
+    """Whether a directory and everything below it is left out."""
+    return rules.excludes(directory) or os.path.isfile(os.path.join(directory, "pyvenv.cfg"))
+
+
+def _walk(folder: str, rules: Rules, directories: Optional[List[str]] = None) -> List[str]:
+    """
+    Walk a folder with os.scandir, without descending into pruned or gitignored directories.
+
+    Every directory walked (relative to folder, "" for the folder itself) is appended to
+    directories, if given.
+    """
+    found = []
+    # (directory relative to folder, .gitignore patterns in effect there)
+    stack = [("", _read_gitignore(folder, "", []))]
+    while stack:
+        directory, ignores = stack.pop()
+        if directories is not None:
+            directories.append(directory)
+        try:
+            with os.scandir(os.path.join(folder, directory)) as entries:
+                entries = list(entries)
+        except OSError:
+            continue
+
+        for entry in entries:
+            relative_path = os.path.join(directory, entry.name)
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if _gitignored(ignores, relative_path, is_dir):
+                continue
+            if is_dir:
+                if not _prunes(entry.path, rules):
+                    stack.append((relative_path, _read_gitignore(entry.path, relative_path, ignores)))
+            elif entry.name.endswith(".py") and not rules.excludes(entry.path) and rules.includes(entry.path):
+                found.append(relative_path)
+    return found
+
+
+# .gitignore pattern: (directory it applies to, glob, negated, anchored to that directory, directories only)
+IgnorePattern = Tuple[str, str, bool, bool, bool]
+
+
+def _read_gitignore(directory: str, relative_directory: str, inherited: List[IgnorePattern]) -> List[IgnorePattern]:
+    """Patterns in effect in a directory: the inherited ones, then those of its own .gitignore."""
+    try:
+        with open(os.path.join(directory, ".gitignore"), "r") as f:
+            lines = f.read().splitlines()
+    except (OSError, UnicodeDecodeError):
+        return inherited
+
+    patterns = list(inherited)
+    for line in lines:
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        directories_only = line.endswith("/")
+        line = line.rstrip("/")
+        anchored = "/" in line
+        patterns.append((relative_directory, line.lstrip("/"), negated, anchored, directories_only))
+    return patterns
+
+
+def _gitignored(patterns: List[IgnorePattern], relative_path: str, is_dir: bool) -> bool:
+    """Whether a path is ignored; as in git, the last matching pattern wins."""
+    ignored = False
+    name = os.path.basename(relative_path)
+    for base, glob, negated, anchored, directories_only in patterns:
+        if directories_only and not is_dir:
+            continue
+        if anchored:
+            matched = _wildmatch(glob, Path(os.path.relpath(relative_path, base or ".")).as_posix())
+        else:
+            matched = _wildmatch(glob, name)
+        if matched:
+            ignored = not negated
+    return ignored
+
+
+def _wildmatch(glob: str, path: str) -> bool:
+    """Whether a path matches a .gitignore glob, with git's wildmatch rules (see _wildmatch_regex)."""
+    return _wildmatch_regex(glob).match(path) is not None
+
+
+@lru_cache(maxsize=1024)
+def _wildmatch_regex(glob: str) -> "re.Pattern[str]":
+    """
+    Compile a .gitignore glob as git matches it, unlike fnmatch: '*', '?' and [...] never match
+    '/'; a '**' between slashes (or at either end) matches any number of directories.
+    """
+    parts = []
+    i, n = 0, len(glob)
+    while i < n:
+        char = glob[i]
+        if char == "*":
+            stars = i
+            while i < n and glob[i] == "*":
+                i += 1
+            if i - stars == 2 and (stars == 0 or glob[stars - 1] == "/") and (i == n or glob[i] == "/"):
+                if i == n:
+                    # "dir/**": everything inside
+                    parts.append(".*")
+                else:
+                    # "**/": zero or more directories
+                    parts.append("(?:.*/)?")
+                    i += 1
+            else:
+                parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+            i += 1
+        elif char == "[":
+            end = i + 1
+            if end < n and glob[end] in "!^":
+                end += 1
+            if end < n and glob[end] == "]":
+                end += 1
+            while end < n and glob[end] != "]":
+                end += 1
+            if end >= n:
+                # No closing bracket: a literal '['
+                parts.append(re.escape(char))
+                i += 1
+                continue
+            body = glob[i + 1:end].replace("[", "\\[")
+            if body[:1] in ("!", "^"):
+                parts.append(f"[^{body[1:]}/]")
+            else:
+                parts.append(f"[{body}]")
+            i = end + 1
+        elif char == "\\" and i + 1 < n:
+            parts.append(re.escape(glob[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(char))
+            i += 1
+    return re.compile("".join(parts) + r"\Z", re.DOTALL)
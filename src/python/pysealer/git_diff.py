@@ -1,57 +1,441 @@
 """Git-based diff functionality for comparing function/class changes."""
 
-import ast
+import atexit
+import os
 import subprocess
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Tuple, List
+from typing import Dict, Optional, Tuple, List
 import difflib
+from .source_index import SourceIndex
 
+# Number of parsed blobs kept, shared by every repository
+_INDEX_CACHE_SIZE = 256
 
-def get_file_from_git(file_path: str, ref: str = "HEAD") -> Optional[str]:
+
+class GitObjectReader:
     """
-    Retrieve file content from a specific git reference.
-    
-    Args:
-        file_path: Absolute path to the file
-        ref: Git reference (default: HEAD)
-        
-    Returns:
-        File content as string, or None if not in git or error occurs
+    One long-running `git cat-file --batch` process for reading files out of a repository.
+
+    Every request is a round trip over the process's pipes instead of a new git subprocess.
+    Blobs come back with their object id, so parsed sources can be cached per blob.
+    """
+
+    def __init__(self, git_root: str):
+        self.git_root = git_root
+        self._lock = threading.Lock()
+        self._process: Optional[subprocess.Popen] = None
+        self._broken = False
+
+    def _start(self) -> subprocess.Popen:
+        """Start the cat-file process on first use."""
+        if self._process is None or self._process.poll() is not None:
+            self._process = subprocess.Popen(
+                ["git", "cat-file", "--batch"],
+                cwd=self.git_root,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        return self._process
+
+    def read(self, ref: str, relative_path: str) -> Optional[Tuple[str, bytes]]:
+        """
+        Read a file at a git reference.
+
+        Returns:
+            Tuple of (blob object id, raw content), or None if the file or reference does not exist
+        """
+        if self._broken or "\n" in relative_path:
+            return None
+
+        with self._lock:
+            try:
+                process = self._start()
+                process.stdin.write(f"{ref}:{relative_path}\n".encode())
+                process.stdin.flush()
+
+                header = process.stdout.readline().decode().split()
+                # "<object> missing" or "<object> ambiguous" for anything that is not a blob
+                if len(header) != 3 or header[1] != "blob":
+                    if len(header) == 3:
+                        # Skip the content of trees and other objects
+                        process.stdout.read(int(header[2]) + 1)
+                    return None
+
+                object_id, _, size = header
+                content = process.stdout.read(int(size))
+                process.stdout.read(1)
+                return object_id, content
+            except (OSError, ValueError):
+                # git is missing or the process died: give up on this repository for the run
+                self._broken = True
+                self.close()
+                return None
+
+    def close(self) -> None:
+        """Stop the cat-file process."""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+            process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+
+
+# One object reader per repository root
+_readers: Dict[str, GitObjectReader] = {}
+_readers_lock = threading.Lock()
+
+# Parsed blobs by object id, least recently used first
+_blob_indexes: "OrderedDict[str, Optional[SourceIndex]]" = OrderedDict()
+_blob_indexes_lock = threading.Lock()
+
+
+def _get_reader(git_root: str) -> GitObjectReader:
+    """Return the object reader of a repository, starting one if needed."""
+    with _readers_lock:
+        reader = _readers.get(git_root)
+        if reader is None:
+            reader = _readers[git_root] = GitObjectReader(git_root)
+        return reader
+
+
+@atexit.register
+def close_git_readers() -> None:
+    """Stop every `git cat-file` process and forget the cached repository roots and parsed blobs."""
+    with _readers_lock:
+        readers = list(_readers.values())
+        _readers.clear()
+    for reader in readers:
+        reader.close()
+    with _blob_indexes_lock:
+        _blob_indexes.clear()
+    find_git_root.cache_clear()
+    _is_git_available_in.cache_clear()
+
+
+@lru_cache(maxsize=1024)
+def find_git_root(directory: str) -> Optional[str]:
+    """
+    Return the root of the git repository containing a directory, or None.
+
+    The answer is cached per directory, so it is asked of git only once per run.
     """
     try:
-        # Get relative path from git root
         result = subprocess.run(
             ["git", "rev-parse", "--show-toplevel"],
-            cwd=Path(file_path).parent,
+            cwd=directory,
             capture_output=True,
             text=True,
             timeout=5
         )
-        
-        if result.returncode != 0:
-            return None
-            
-        git_root = result.stdout.strip()
-        relative_path = Path(file_path).relative_to(git_root)
-        
-        # Get file content from git
-        result = subprocess.run(
-            ["git", "show", f"{ref}:{relative_path}"],
+    except (FileNotFoundError, subprocess.TimeoutExpired, subprocess.SubprocessError, OSError):
+        return None
+
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip()
+
+
+def _decode_source(content: bytes) -> str:
+    """Decode file content the way text mode does, translating \\r\\n and \\r to \\n."""
+    text = content.decode("utf-8", errors="replace")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _read_from_git(file_path: str, ref: str) -> Optional[Tuple[str, bytes]]:
+    """Read a file at a git reference as (blob object id, raw content), or None."""
+    path = Path(file_path)
+    git_root = find_git_root(str(path.parent))
+    if git_root is None:
+        return None
+
+    try:
+        relative_path = path.resolve().relative_to(Path(git_root).resolve())
+    except (ValueError, OSError):
+        return None
+
+    return _get_reader(git_root).read(ref, relative_path.as_posix())
+
+
+def get_unmodified_blobs(directory: str) -> Optional[Dict[str, str]]:
+    """
+    Map every tracked file under a directory whose working tree matches the index to its blob id.
+    
+    Blob ids come from a single `git ls-files -s` call, and modified files are found with a
+    single `git diff-files` call, which relies on git's own stat cache instead of reading files.
+    Conflicted entries, symlinks and submodules are left out.
+    
+    Returns:
+        Dictionary mapping resolved absolute file paths (see os.path.realpath) to blob object
+        ids, or None outside a git repository
+    """
+    git_root = find_git_root(directory)
+    if git_root is None:
+        return None
+    
+    try:
+        pathspec = Path(directory).resolve().relative_to(Path(git_root).resolve()).as_posix()
+    except (ValueError, OSError):
+        return None
+    
+    try:
+        listed = subprocess.run(
+            ["git", "ls-files", "-s", "-z", "--", pathspec],
             cwd=git_root,
             capture_output=True,
-            text=True,
-            timeout=5
+            timeout=60
         )
-        
-        if result.returncode == 0:
-            return result.stdout
+        modified = subprocess.run(
+            ["git", "diff-files", "--name-only", "-z", "--", pathspec],
+            cwd=git_root,
+            capture_output=True,
+            timeout=60
+        )
+    except (FileNotFoundError, subprocess.TimeoutExpired, subprocess.SubprocessError, OSError):
+        return None
+    
+    if listed.returncode != 0 or modified.returncode != 0:
+        return None
+    
+    modified_paths = set(modified.stdout.decode(errors="surrogateescape").split("\0"))
+    
+    root = os.path.realpath(git_root)
+    blobs = {}
+    for entry in listed.stdout.decode(errors="surrogateescape").split("\0"):
+        if not entry:
+            continue
+        # "<mode> <object> <stage>\t<path>"
+        info, _, relative_path = entry.partition("\t")
+        mode, object_id, stage = info.split()
+        if stage != "0" or mode not in ("100644", "100755") or relative_path in modified_paths:
+            continue
+        blobs[os.path.join(root, os.path.normpath(relative_path))] = object_id
+    
+    return blobs
+
+
+def list_git_files(directory: str) -> Optional[List[str]]:
+    """
+    List the files under a directory that git does not ignore, with one `git ls-files` call.
+    
+    Tracked files and untracked files that no .gitignore, .git/info/exclude or global
+    excludes file ignores are listed; ignored directories are never walked by git.
+    
+    Returns:
+        Paths relative to the directory, in POSIX form, or None outside a git repository
+    """
+    if find_git_root(directory) is None:
+        return None
+    
+    try:
+        result = subprocess.run(
+            ["git"] + LS_FILES_ARGS,
+            cwd=directory,
+            capture_output=True,
+            timeout=60
+        )
+    except (FileNotFoundError, subprocess.TimeoutExpired, subprocess.SubprocessError, OSError):
         return None
+    
+    if result.returncode != 0:
+        return None
+    return parse_ls_files(result.stdout)
+
+
+# Arguments of the `git ls-files` call of list_git_files, run in the directory to list
+LS_FILES_ARGS = ["ls-files", "-z", "--cached", "--others", "--exclude-standard", "--", "."]
+
+
+def parse_ls_files(output: bytes) -> List[str]:
+    """Paths listed by `git ls-files -z`, each once."""
+    # Tracked files show up once per stage while conflicted
+    return list(dict.fromkeys(entry for entry in output.decode(errors="surrogateescape").split("\0") if entry))
+
+
+def _run_git(git_root: str, args: List[str]) -> subprocess.CompletedProcess:
+    """Run a git command in a repository, reporting a missing git or a failure as ValueError."""
+    try:
+        result = subprocess.run(["git"] + args, cwd=git_root, capture_output=True, timeout=60)
+    except (FileNotFoundError, subprocess.TimeoutExpired, subprocess.SubprocessError, OSError) as e:
+        raise ValueError(f"Cannot run git: {e}")
+    
+    if result.returncode != 0:
+        message = result.stderr.decode(errors="replace").strip().splitlines()
+        raise ValueError(message[0] if message else f"git {args[0]} failed")
+    return result
+
+
+def get_changed_files(path: str, since: Optional[str] = None, staged: bool = False) -> Tuple[List[str], str]:
+    """
+    List the Python files under a file or folder that changed, with one `git diff --name-only` call.
+    
+    Args:
+        path: Python file or folder to look in
+        since: Git reference; files changed between its merge base with HEAD and the
+            working tree are listed (like CI comparing a branch with its target)
+        staged: List the files staged for commit instead
+        
+    Returns:
+        Tuple of (absolute paths of changed Python files that still exist, sorted; revision
+        the changes are relative to)
         
-    except FileNotFoundError:
-        # Git command not found
+    Raises:
+        ValueError: Outside a git repository, or if the reference is unknown
+    """
+    directory = changed_files_directory(path, since, staged)
+    git_root = find_git_root(directory)
+    pathspec = changed_files_pathspec(path, git_root)
+    
+    base = "HEAD" if staged else _run_git(git_root, merge_base_args(since)).stdout.decode().strip()
+    result = _run_git(git_root, diff_names_args(pathspec, base, staged))
+    return parse_changed_files(git_root, result.stdout), base
+
+
+# get_changed_files is split into the helpers below so that aio.get_changed_files builds the
+# same git calls and reads their output the same way, running git with asyncio instead.
+
+def changed_files_directory(path: str, since: Optional[str], staged: bool) -> str:
+    """
+    Check the options of get_changed_files, and return the directory to find the repository of path from.
+    
+    Raises:
+        ValueError: Unless exactly one of a git reference and staged=True is given
+    """
+    if since is not None and staged:
+        raise ValueError("Use either --since or --staged, not both.")
+    if since is None and not staged:
+        raise ValueError("A git reference or staged=True is required.")
+    
+    resolved = Path(path).resolve()
+    return str(resolved if resolved.is_dir() else resolved.parent)
+
+
+def changed_files_pathspec(path: str, git_root: Optional[str]) -> str:
+    """Pathspec of a file or folder relative to its repository root (ValueError outside a repository)."""
+    if git_root is None:
+        raise ValueError(f"'{path}' is not in a git repository.")
+    return Path(path).resolve().relative_to(Path(git_root).resolve()).as_posix()
+
+
+def merge_base_args(since: str) -> List[str]:
+    """Arguments of the `git merge-base` call finding the revision changes since a reference are relative to."""
+    return ["merge-base", since, "HEAD"]
+
+
+def diff_names_args(pathspec: str, base: str, staged: bool) -> List[str]:
+    """Arguments of the `git diff --name-only` call listing the changed files under a pathspec."""
+    # Deleted files have nothing left to lock or check
+    return ["diff", "--name-only", "-z", "--diff-filter=d"] + (["--cached"] if staged else [base]) + ["--", pathspec]
+
+
+def parse_changed_files(git_root: str, output: bytes) -> List[str]:
+    """Sorted absolute paths of the Python files listed by `git diff --name-only -z` that still exist."""
+    changed = []
+    for relative_path in output.decode(errors="surrogateescape").split("\0"):
+        if relative_path.endswith(".py"):
+            file_path = os.path.normpath(os.path.join(git_root, relative_path))
+            if os.path.isfile(file_path):
+                changed.append(file_path)
+    return sorted(changed)
+
+
+def get_changed_symbols(file_path: str, ref: str = "HEAD") -> List[str]:
+    """
+    Names of the functions and classes of a file that are new or changed since a git reference.
+    
+    Definitions are compared without their pysealer decorators, so re-sealing alone is not a change.
+    
+    Returns:
+        Names in ast.walk order; every symbol of the file if it did not exist at the reference
+    """
+    index = SourceIndex.from_file(file_path)
+    
+    blob = _read_from_git(file_path, ref)
+    old_index = index_blob(*blob) if blob is not None else None
+    
+    old_segments = {}
+    if old_index is not None:
+        for symbol in old_index.symbols:
+            old_segments.setdefault(symbol.name, old_index.segment(symbol))
+    
+    changed = []
+    seen = set()
+    for symbol in index.symbols:
+        if symbol.name in seen:
+            continue
+        seen.add(symbol.name)
+        if old_segments.get(symbol.name) != index.segment(symbol):
+            changed.append(symbol.name)
+    return changed
+
+
+def get_file_from_git(file_path: str, ref: str = "HEAD") -> Optional[str]:
+    """
+    Retrieve file content from a specific git reference.
+    
+    Args:
+        file_path: Absolute path to the file
+        ref: Git reference (default: HEAD)
+        
+    Returns:
+        File content as string, or None if not in git or error occurs
+    """
+    blob = _read_from_git(file_path, ref)
+    if blob is None:
+        return None
+    return _decode_source(blob[1])
+
+
+def index_blob(object_id: str, content: bytes) -> Optional[SourceIndex]:
+    """Parse a blob once; blobs are immutable, so the index is cached by object id."""
+    with _blob_indexes_lock:
+        if object_id in _blob_indexes:
+            _blob_indexes.move_to_end(object_id)
+            return _blob_indexes[object_id]
+    
+    try:
+        index = SourceIndex(_decode_source(content))
+    except SyntaxError:
+        index = None
+    
+    with _blob_indexes_lock:
+        _blob_indexes[object_id] = index
+        if len(_blob_indexes) > _INDEX_CACHE_SIZE:
+            _blob_indexes.popitem(last=False)
+    return index
+
+
+def get_symbol_from_git(file_path: str, function_name: str, ref: str = "HEAD") -> Optional[Tuple[str, int]]:
+    """
+    Extract a function or class from a file at a git reference.
+    
+    The file is read through the repository's `git cat-file --batch` process, and its
+    symbol table is parsed once per blob and reused for every symbol of that file.
+    
+    Returns:
+        Tuple of (function_source, start_line) or None if not found
+    """
+    blob = _read_from_git(file_path, ref)
+    if blob is None:
         return None
-    except (subprocess.TimeoutExpired, subprocess.SubprocessError, ValueError, OSError):
+    
+    index = index_blob(*blob)
+    if index is None:
+        return None
+    
+    symbol = index.find(function_name)
+    if symbol is None:
         return None
+    
+    return index.span(symbol), symbol.line_start
 
 
 def extract_function_from_source(source_code: str, function_name: str) -> Optional[Tuple[str, int]]:
@@ -66,24 +450,15 @@ def extract_function_from_source(source_code: str, function_name: str) -> Option
         Tuple of (function_source, start_line) or None if not found
     """
     try:
-        tree = ast.parse(source_code)
-        lines = source_code.splitlines(keepends=True)
-        
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
-                if node.name == function_name:
-                    # Get the source lines for this node
-                    start_line = node.lineno
-                    end_line = node.end_lineno if node.end_lineno else start_line
-                    
-                    function_lines = lines[start_line - 1:end_line]
-                    function_source = ''.join(function_lines)
-                    
-                    return function_source, start_line
-        
+        index = SourceIndex(source_code)
+    except SyntaxError:
         return None
-    except (SyntaxError, AttributeError):
+    
+    symbol = index.find(function_name)
+    if symbol is None:
         return None
+    
+    return index.span(symbol), symbol.line_start
 
 
 def generate_function_diff(
@@ -172,10 +547,18 @@ def is_git_available() -> bool:
     """
     Check if the current directory is in a git repository.
     
+    The answer is cached per current directory (see _is_git_available_in).
+    
     Returns:
         True if .git directory exists in current or parent directories, False otherwise
     """
-    current = Path.cwd()
+    return _is_git_available_in(str(Path.cwd()))
+
+
+@lru_cache(maxsize=64)
+def _is_git_available_in(directory: str) -> bool:
+    """Check if a directory is in a git repository by walking up to the file system root."""
+    current = Path(directory)
     # Check current directory and all parent directories
     for parent in [current] + list(current.parents):
         if (parent / ".git").exists():
@@ -201,14 +584,8 @@ def get_function_diff(
     Returns:
         List of diff tuples or None if git history unavailable
     """
-    # Get the file from git
-    old_file_content = get_file_from_git(file_path)
-    
-    if not old_file_content:
-        return None
-    
-    # Extract the old version of the function
-    old_function = extract_function_from_source(old_file_content, function_name)
+    # Extract the old version of the function from the HEAD blob
+    old_function = get_symbol_from_git(file_path, function_name)
     
     if not old_function:
         return None
@@ -0,0 +1,249 @@
+"""
+Opt-in import hook that verifies sealed modules as they are imported, before any of their code runs.
+
+    import pysealer
+    pysealer.install_import_guard()      # before importing the MCP server's tools
+    import tools                          # TamperedModuleError if a seal does not verify
+
+A guarded module's source is read once, verified, and compiled from exactly those bytes:
+bytecode cached in __pycache__ is never run for it, so what runs is what was verified.
+Passing verdicts are kept in a small sidecar file per module, keyed by the BLAKE3 hash of the
+source, in a per-user cache directory outside the guarded code. A warm start costs hashing the
+source and one sidecar read per module (plus compiling it); a module is only verified again
+once its source changed.
+"""
+
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import json
+import os
+import sys
+import sysconfig
+import warnings
+from pathlib import Path
+from typing import List, Optional, Sequence
+from pysealer import digest
+from .sealer import Sealer
+from . import profiling
+
+# What the guard does with a module whose seals do not verify
+TAMPERED_ACTIONS = ("raise", "warn")
+
+
+class TamperedModuleError(ImportError):
+    """Raised instead of running a sealed module whose seals do not verify."""
+
+
+class TamperedModuleWarning(UserWarning):
+    """Warned when a sealed module whose seals do not verify is imported with action="warn"."""
+
+
+def default_sidecar_dir() -> Path:
+    """
+    Per-user directory for the verdicts of the import guard, outside any source tree.
+
+    $XDG_CACHE_HOME/pysealer/import-guard if set, otherwise under the platform's per-user cache
+    directory (~/.cache, ~/Library/Caches or %LOCALAPPDATA%).
+    """
+    base = os.environ.get("XDG_CACHE_HOME")
+    if not base:
+        if sys.platform == "win32":
+            base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+        elif sys.platform == "darwin":
+            base = Path.home() / "Library" / "Caches"
+        else:
+            base = Path.home() / ".cache"
+    return Path(base) / "pysealer" / "import-guard"
+
+
+class VerdictSidecar:
+    """
+    Verdicts of modules that passed verification, one JSON file per module.
+
+    An entry is the BLAKE3 hash of the source that passed, so it never vouches for other
+    content, whatever the file's size or modification time. It is not signed: whoever can
+    write the directory holding the entries can make a tampered module pass. They are kept in
+    cache_dir, by default the per-user default_sidecar_dir(), never next to the modules.
+    """
+
+    def __init__(self, public_key: str, cache_dir: Optional[str | Path] = None):
+        self.public_key = public_key
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else default_sidecar_dir()
+
+    def _path(self, file_path: str) -> Path:
+        """Sidecar file of a module."""
+        return self.cache_dir / f"{digest(os.fsencode(os.path.abspath(file_path)))[:32]}.pysealer.json"
+
+    def lookup(self, file_path: str, content_hash: str) -> bool:
+        """Whether the source of a module with this BLAKE3 hash passed verification with this public key."""
+        try:
+            with open(self._path(file_path), "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return entry.get("public_key") == self.public_key and entry.get("content_hash") == content_hash
+
+    def store(self, file_path: str, content_hash: str) -> None:
+        """Record that a module passed; a sidecar that cannot be written is skipped, like unwritable bytecode."""
+        entry = {"public_key": self.public_key, "content_hash": content_hash}
+        path = self._path(file_path)
+        temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            # Private to the user, like the keys it relies on
+            path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            with open(temp_path, "w") as f:
+                json.dump(entry, f)
+            os.replace(temp_path, path)
+        except OSError:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+
+
+class _GuardedLoader(importlib.machinery.SourceFileLoader):
+    """
+    Source file loader that compiles exactly the source the guard verified.
+
+    SourceFileLoader.get_code() would run the module's cached bytecode whenever the mtime and
+    size recorded in it still match the source, and otherwise read the source again; here the
+    source is read once, verified, and compiled, and no bytecode is read or written.
+    """
+
+    def __init__(self, fullname: str, path: str, guard: "ImportGuard"):
+        super().__init__(fullname, path)
+        self._guard = guard
+
+    def get_code(self, fullname: str):
+        source_path = self.get_filename(fullname)
+        source = self.get_data(source_path)
+        self._guard.verify(self.name, source_path, source)
+        return self.source_to_code(source, source_path)
+
+
+class ImportGuard(importlib.abc.MetaPathFinder):
+    """
+    sys.meta_path finder that hands the source modules it guards to a verifying loader.
+
+    The module is found by the finders that follow the guard on sys.meta_path, as it would
+    be without it; only its loader is replaced. Modules without any pysealer decorator load
+    as usual. A sealed module with an invalid seal raises TamperedModuleError (action="raise")
+    or is loaded after a TamperedModuleWarning (action="warn"). Seals are verified through the
+    process-wide verdict memo, so a seal already verified by a check is not verified again.
+    """
+
+    def __init__(self, paths: Optional[Sequence[str | Path]] = None, action: str = "raise", sealer: Optional[Sealer] = None,
+                 cache: bool = True, cache_dir: Optional[str | Path] = None):
+        if action not in TAMPERED_ACTIONS:
+            raise ValueError(f"Unknown action '{action}', expected one of: {', '.join(TAMPERED_ACTIONS)}.")
+        self.action = action
+        self.sealer = sealer if sealer is not None else Sealer()
+        # Load the key now, so a missing key fails the install rather than the first import
+        public_key = str(self.sealer.verifying_key)
+        self.sidecar = VerdictSidecar(public_key, cache_dir) if cache else None
+
+        if paths is None:
+            # Everything but the interpreter's own library and installed packages
+            self._include: List[str] = []
+            install_paths = sysconfig.get_paths()
+            self._exclude = sorted({_directory(install_paths[name]) for name in ("stdlib", "platstdlib", "purelib", "platlib") if name in install_paths})
+        else:
+            self._include = [_directory(path) for path in paths]
+            self._exclude = []
+
+    def guards(self, file_path: str) -> bool:
+        """Whether a module file is verified when imported."""
+        file_path = os.path.normcase(os.path.abspath(file_path))
+        if self._include:
+            return any(file_path.startswith(directory) for directory in self._include)
+        return not any(file_path.startswith(directory) for directory in self._exclude)
+
+    def find_spec(self, fullname: str, path: Optional[Sequence[str]], target=None):
+        try:
+            finders = sys.meta_path[sys.meta_path.index(self) + 1:]
+        except ValueError:
+            return None
+        for finder in finders:
+            find_spec = getattr(finder, "find_spec", None)
+            if find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if type(spec.loader) is importlib.machinery.SourceFileLoader and spec.origin and self.guards(spec.origin):
+                spec.loader = _GuardedLoader(fullname, spec.origin, self)
+            return spec
+        return None
+
+    def verify(self, name: str, file_path: str, source: bytes) -> None:
+        """Verify the seals of a module's source, raising or warning as configured if one does not verify."""
+        with profiling.timed_file(file_path):
+            content_hash = digest(source)
+            if self.sidecar is not None:
+                with profiling.phase("cache"):
+                    if self.sidecar.lookup(file_path, content_hash):
+                        return
+
+            try:
+                results = self.sealer.check_source(file_path, importlib.util.decode_source(source))
+            except (SyntaxError, UnicodeDecodeError):
+                # Not Python the guard can read: compiling the module reports it
+                return
+            failed = [symbol for symbol, result in results.items() if result["has_decorator"] and not result["valid"]]
+
+            if not failed:
+                if self.sidecar is not None:
+                    self.sidecar.store(file_path, content_hash)
+                return
+
+        message = f"Sealed module '{name}' ({file_path}) failed verification: {', '.join(failed)}"
+        if self.action == "raise":
+            raise TamperedModuleError(message, name=name, path=file_path)
+        warnings.warn(message, TamperedModuleWarning, stacklevel=2)
+
+
+def _directory(path: str | Path) -> str:
+    """Absolute, case-normalized directory with a trailing separator, for prefix matching."""
+    return os.path.join(os.path.normcase(os.path.abspath(path)), "")
+
+
+def install_import_guard(paths: Optional[Sequence[str | Path]] = None, action: str = "raise", *,
+                         env_path: Optional[str | Path] = None, public_key: Optional[str] = None,
+                         cache: bool = True, cache_dir: Optional[str | Path] = None) -> ImportGuard:
+    """
+    Verify sealed modules as they are imported from now on.
+
+    Modules imported before the guard was installed are not verified. Installing again
+    replaces the previous guard.
+
+    With cache=True a module whose source hash already passed is not verified again. The
+    guard then trusts the directory holding those verdicts (by default the per-user
+    default_sidecar_dir()) as much as the public key: anyone who can write it can let a
+    tampered module through. Point cache_dir at a directory only trusted accounts can write,
+    away from the guarded code, or pass cache=False to verify every import.
+
+    Args:
+        paths: Directories whose modules are verified. If None, every source module outside
+            the standard library and the installed packages is.
+        action: "raise" to refuse to load a tampered module with TamperedModuleError, or "warn"
+            to load it after a TamperedModuleWarning
+        env_path, public_key: Where the public key comes from, as for Sealer
+        cache: Whether to remember passing verdicts, by source hash, in sidecar files (see VerdictSidecar)
+        cache_dir: Directory for the sidecar files, instead of default_sidecar_dir()
+
+    Returns:
+        The installed guard, first on sys.meta_path
+
+    Raises:
+        RuntimeError: If the public key is missing or invalid
+    """
+    guard = ImportGuard(paths, action, Sealer(env_path, public_key=public_key), cache, cache_dir)
+    uninstall_import_guard()
+    sys.meta_path.insert(0, guard)
+    return guard
+
+
+def uninstall_import_guard() -> None:
+    """Stop verifying imports."""
+    sys.meta_path[:] = [finder for finder in sys.meta_path if not isinstance(finder, ImportGuard)]
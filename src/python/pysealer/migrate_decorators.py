@@ -0,0 +1,103 @@
+"""Re-encode existing pysealer decorators in another signature encoding without signing them again."""
+
+from pathlib import Path
+from typing import List, Tuple
+from pysealer import reencode_seal
+from .add_decorators import SEAL_ENCODINGS, write_atomically
+from .source_index import ROOT_MARKER, SourceIndex
+from .discovery import find_python_files
+
+
+def migrate_decorators(file_path: str, encoding: str = "base32") -> Tuple[str, bool]:
+    """
+    Parse a Python file and re-encode the signature of every @pysealer._<signature>() decorator.
+
+    Only the encoding changes: the signature bytes and seal mode are kept, so no private key is needed.
+
+    Args:
+        file_path: Path to the Python file to process
+        encoding: Target signature encoding, one of SEAL_ENCODINGS
+    Returns:
+        Tuple of (modified Python source code as a string, whether any decorator was re-encoded)
+    """
+    if encoding not in SEAL_ENCODINGS:
+        raise ValueError(f"Unknown seal encoding '{encoding}', expected one of: {', '.join(SEAL_ENCODINGS)}")
+
+    index = SourceIndex.from_file(file_path)
+    lines = index.lines
+    changed = False
+
+    for symbol in index.symbols:
+        # Only @pysealer._<signature>() decorators carry a seal
+        if symbol.signature is None:
+            continue
+
+        try:
+            migrated = reencode_seal(symbol.signature, encoding)
+        except ValueError as e:
+            raise ValueError(f"Invalid pysealer decorator on '{symbol.name}': {e}")
+
+        if migrated != symbol.signature:
+            line_idx = symbol.signature_line
+            lines[line_idx] = lines[line_idx].replace(f"._{symbol.signature}", f"._{migrated}", 1)
+            changed = True
+
+    # Re-encode the file's root seal as well
+    for line_idx in index.root_marker_lines:
+        seal = lines[line_idx][len(ROOT_MARKER):].strip()
+        try:
+            migrated = reencode_seal(seal, encoding)
+        except ValueError as e:
+            raise ValueError(f"Invalid pysealer root seal: {e}")
+        if migrated != seal:
+            lines[line_idx] = f"{ROOT_MARKER}{migrated}"
+            changed = True
+
+    modified_code = '\n'.join(lines)
+    return modified_code, changed
+
+
+def migrate_decorators_in_folder(folder_path: str, encoding: str = "base32") -> List[str]:
+    """
+    Re-encode pysealer decorators in all Python files in a folder (recursively).
+
+    Args:
+        folder_path: Path to the folder to process
+        encoding: Target signature encoding, one of SEAL_ENCODINGS
+    Returns:
+        List of file paths where decorators were re-encoded
+    """
+    folder = Path(folder_path)
+
+    if not folder.exists():
+        raise FileNotFoundError(f"Folder '{folder_path}' does not exist.")
+
+    if not folder.is_dir():
+        raise NotADirectoryError(f"'{folder_path}' is not a directory.")
+
+    # Find all Python files in the folder (recursive)
+    python_files = find_python_files(folder_path)
+
+    if not python_files:
+        raise ValueError(f"No Python files found in '{folder_path}'.")
+
+    if encoding not in SEAL_ENCODINGS:
+        raise ValueError(f"Unknown seal encoding '{encoding}', expected one of: {', '.join(SEAL_ENCODINGS)}")
+
+    migrated_files = []
+    errors = []
+
+    for py_file in python_files:
+        try:
+            modified_code, changed = migrate_decorators(str(py_file), encoding)
+            if changed:
+                write_atomically(str(py_file), modified_code)
+                migrated_files.append(str(py_file))
+        except Exception as e:
+            errors.append((str(py_file), str(e)))
+
+    if errors:
+        error_msg = "\n".join([f"  - {file}: {error}" for file, error in errors])
+        raise RuntimeError(f"Failed to re-encode some files:\n{error_msg}")
+
+    return migrated_files
@@ -0,0 +1,161 @@
+"""Phase timing for '--profile': where a lock, check or remove spends its time."""
+
+import cProfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# (phases as {name: (seconds, calls)}, files as {path: seconds}) handed back by worker processes
+Snapshot = Tuple[Dict[str, Tuple[float, int]], Dict[str, float]]
+
+
+class Profile:
+    """
+    Wall time and call count of each phase, and wall time of each file.
+
+    Phases measured in worker processes are merged in, so with more than one job the
+    phase totals add up time spent in parallel and can exceed the wall time.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, List] = {}
+        self.files: Dict[str, float] = {}
+        self.workers = False
+        # Phases are also timed from the threads of a Sealer session's pool
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float, calls: int = 1) -> None:
+        """Account time to a phase."""
+        with self._lock:
+            phase = self.phases.setdefault(name, [0.0, 0])
+            phase[0] += seconds
+            phase[1] += calls
+
+    def add_file(self, file_path: str, seconds: float) -> None:
+        """Account time to a file."""
+        with self._lock:
+            self.files[file_path] = self.files.get(file_path, 0.0) + seconds
+
+    def snapshot(self) -> Snapshot:
+        """Phases and files recorded so far, in a form that can be pickled."""
+        return {name: (seconds, calls) for name, (seconds, calls) in self.phases.items()}, dict(self.files)
+
+    def merge(self, snapshot: Snapshot) -> None:
+        """Add the phases and files recorded by a worker process."""
+        phases, files = snapshot
+        for name, (seconds, calls) in phases.items():
+            self.add(name, seconds, calls)
+        for file_path, seconds in files.items():
+            self.add_file(file_path, seconds)
+        self.workers = True
+
+    def report(self, slowest: int = 10) -> List[str]:
+        """Lines of the breakdown: phases by total time, then the slowest files."""
+        wall = time.perf_counter() - self.started
+        lines = [f"Profile: {wall:.3f}s wall time"]
+        if self.workers:
+            lines.append("  (phase totals include time spent in worker processes)")
+
+        width = max([len(name) for name in self.phases] + [5])
+        lines.append(f"  {'phase':<{width}}  {'calls':>7}  {'total':>9}  {'mean':>9}")
+        for name, (seconds, calls) in sorted(self.phases.items(), key=lambda item: -item[1][0]):
+            lines.append(f"  {name:<{width}}  {calls:>7}  {_format_seconds(seconds):>9}  {_format_seconds(seconds / calls):>9}")
+
+        if self.files:
+            lines.append(f"Slowest files ({min(slowest, len(self.files))} of {len(self.files)}):")
+            for file_path, seconds in sorted(self.files.items(), key=lambda item: -item[1])[:slowest]:
+                lines.append(f"  {_format_seconds(seconds):>9}  {file_path}")
+        return lines
+
+
+def _format_seconds(seconds: float) -> str:
+    """Seconds, or milliseconds below one second."""
+    return f"{seconds:.3f}s" if seconds >= 1 else f"{seconds * 1000:.2f}ms"
+
+
+# Profile of this process, None while profiling is off
+_active: Optional[Profile] = None
+_cprofile: Optional[cProfile.Profile] = None
+_stats_path: Optional[str] = None
+
+
+def start(stats_path: Optional[str] = None) -> Profile:
+    """
+    Start profiling this process.
+
+    Args:
+        stats_path: If given, also run cProfile and dump its pstats to this file on stop()
+    """
+    global _active, _cprofile, _stats_path
+    if _cprofile is not None:
+        # Inherited from a forked parent process
+        _cprofile.disable()
+    _active = Profile()
+    _stats_path = stats_path
+    _cprofile = None
+    if stats_path is not None:
+        _cprofile = cProfile.Profile()
+        _cprofile.enable()
+    return _active
+
+
+def stop() -> Optional[Profile]:
+    """Stop profiling, write the pstats file if one was asked for, and return the profile."""
+    global _active, _cprofile, _stats_path
+    profile = _active
+    if _cprofile is not None:
+        _cprofile.disable()
+        _cprofile.dump_stats(_stats_path)
+    _active = _cprofile = _stats_path = None
+    return profile
+
+
+def is_active() -> bool:
+    """Whether this process is being profiled."""
+    return _active is not None
+
+
+def collect() -> Optional[Snapshot]:
+    """In a worker process: what was recorded since the last call, or None while profiling is off."""
+    global _active
+    if _active is None:
+        return None
+    snapshot = _active.snapshot()
+    _active = Profile()
+    return snapshot
+
+
+def merge(snapshot: Optional[Snapshot]) -> None:
+    """Add what a worker process recorded to this process's profile."""
+    if _active is not None and snapshot is not None:
+        _active.merge(snapshot)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time a block as one call of a phase (a no-op while profiling is off)."""
+    profile = _active
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, time.perf_counter() - started)
+
+
+@contextmanager
+def timed_file(file_path: str) -> Iterator[None]:
+    """Time the processing of one file (a no-op while profiling is off)."""
+    profile = _active
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_file(file_path, time.perf_counter() - started)
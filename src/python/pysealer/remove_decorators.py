@@ -1,8 +1,11 @@
 """Remove cryptographic pysealer decorators from all functions and classes in a Python file."""
 
-import ast
 from typing import List, Tuple, Dict
 from pathlib import Path
+from .add_decorators import write_atomically
+from .source_index import SourceIndex
+from .discovery import find_python_files
+from . import profiling
 
 def remove_decorators(file_path: str) -> Tuple[str, bool]:
     """
@@ -13,39 +16,16 @@ def remove_decorators(file_path: str) -> Tuple[str, bool]:
     Returns:
         Modified Python source code as a string
     """
-    with open(file_path, 'r') as f:
-        content = f.read()
+    with profiling.timed_file(file_path):
+        index = SourceIndex.from_file(file_path)
 
-    tree = ast.parse(content)
-    lines = content.split('\n')
-    lines_to_remove = set()
+        # Every pysealer decorator line, and the file's root seal as well
+        lines_to_remove = index.sealer_lines.union(index.root_marker_lines)
 
-    for node in ast.walk(tree):
-        if type(node).__name__ in ("FunctionDef", "AsyncFunctionDef", "ClassDef"):
-            if hasattr(node, 'decorator_list'):
-                for decorator in node.decorator_list:
-                    is_pysealer_decorator = False
-                    if isinstance(decorator, ast.Name):
-                        if decorator.id.startswith("pysealer"):
-                            is_pysealer_decorator = True
-                    elif isinstance(decorator, ast.Attribute):
-                        if isinstance(decorator.value, ast.Name) and decorator.value.id == "pysealer":
-                            is_pysealer_decorator = True
-                    elif isinstance(decorator, ast.Call):
-                        func = decorator.func
-                        if isinstance(func, ast.Attribute):
-                            if isinstance(func.value, ast.Name) and func.value.id == "pysealer":
-                                is_pysealer_decorator = True
-                        elif isinstance(func, ast.Name) and func.id.startswith("pysealer"):
-                            is_pysealer_decorator = True
-                    if is_pysealer_decorator:
-                        lines_to_remove.add(decorator.lineno - 1)
+        found = len(lines_to_remove) > 0
+        lines = [line for line_idx, line in enumerate(index.lines) if line_idx not in lines_to_remove]
 
-    found = len(lines_to_remove) > 0
-    for line_idx in sorted(lines_to_remove, reverse=True):
-        del lines[line_idx]
-
-    modified_code = '\n'.join(lines)
+        modified_code = '\n'.join(lines)
     return modified_code, found
 
 
@@ -64,7 +44,7 @@ def remove_decorators_from_folder(folder_path: str) -> List[str]:
         raise NotADirectoryError(f"'{folder_path}' is not a directory")
     
     # Find all Python files recursively
-    python_files = list(folder.rglob("*.py"))
+    python_files = find_python_files(folder_path)
     
     if not python_files:
         raise FileNotFoundError(f"No Python files found in '{folder_path}'")
@@ -73,13 +53,12 @@ def remove_decorators_from_folder(folder_path: str) -> List[str]:
     
     for py_file in python_files:
         try:
-            file_path = str(py_file.resolve())
+            file_path = str(Path(py_file).resolve())
             modified_code, found = remove_decorators(file_path)
             
             if found:
                 # Write the modified code back to the file
-                with open(file_path, 'w') as f:
-                    f.write(modified_code)
+                write_atomically(file_path, modified_code)
                 files_modified.append(file_path)
         except Exception as e:
             # Skip files that can't be processed
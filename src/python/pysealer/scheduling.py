@@ -0,0 +1,15 @@
+"""Ordering of the files handed to the worker pools that lock and check folders."""
+
+import os
+from typing import List
+
+
+def largest_first(file_paths: List[str]) -> List[str]:
+    """Order files for a worker pool: largest first, ties broken by path so scheduling is deterministic."""
+    sizes = {}
+    for file_path in file_paths:
+        try:
+            sizes[file_path] = os.path.getsize(file_path)
+        except OSError:
+            sizes[file_path] = 0
+    return sorted(file_paths, key=lambda file_path: (-sizes[file_path], file_path))
@@ -0,0 +1,294 @@
+"""
+A reusable pysealer session for embedding: keys decoded once, discovery rules and a worker pool kept across calls.
+
+The module functions (add_decorators_to_folder, check_decorators_in_folder, ...) look the keys
+up again on every call and start a new process pool for each folder. A Sealer holds all of it
+instead, and can be shared by the threads of a service:
+
+    with Sealer() as sealer:
+        sealer.lock("src")
+        results = sealer.check("src", use_cache=True)
+        result = sealer.verify_symbol("src/app.py", "handler")
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from pysealer import SigningKey, VerifyingKey
+from .setup import get_private_key, get_public_key, signing_key_handle, verifying_key_handle
+from .add_decorators import check_seal_options, lock_file_with_key, write_atomically
+from .check_decorators import apply_verdicts, check_decorators, check_source, iter_check_files, verify_pending
+from .check_results import SymbolResult
+from .discovery import Rules, find_python_files
+from .remove_decorators import remove_decorators
+from .scheduling import largest_first
+from .source_index import SourceIndex
+from . import profiling
+
+
+class Sealer:
+    """
+    Keys, discovery rules and an optional thread pool shared by every lock, check and remove.
+
+    The keys are read once, on first use, from the arguments, the environment or the .env
+    file, and kept decoded. Nothing is loaded into os.environ, so a Sealer is safe to share
+    across threads. Verdicts are remembered in the process-wide verdict memo of
+    check_decorators, so a seal verified by any check is not verified again.
+
+    With jobs > 1 folders are checked and locked in a pool of that many threads, which is
+    started on first use and shut down by close(). The native engine releases the GIL while
+    it reads, parses and verifies or seals a file, so threads run in parallel.
+    """
+
+    def __init__(self, env_path: Optional[str | Path] = None, *, public_key: Optional[str] = None,
+                 private_key: Optional[str] = None, jobs: Optional[int] = 1, rules: Optional[Rules] = None):
+        """
+        Args:
+            env_path: .env file holding the keys. If None, the keys come from the environment
+                or the .env file found from the current directory upward.
+            public_key: Public key to verify with, instead of looking it up
+            private_key: Private key to seal with, instead of looking it up. The public key is
+                derived from it when public_key is not given.
+            jobs: Number of threads used for folders. If None, one per CPU is used; with 1
+                files are handled in the calling thread.
+            rules: Include and exclude globs for folders, instead of the [tool.pysealer]
+                table of each folder's project
+        """
+        if jobs is None:
+            jobs = os.cpu_count() or 1
+        if jobs < 1:
+            raise ValueError(f"Number of jobs must be at least 1, got {jobs}.")
+
+        self.env_path = env_path
+        self.jobs = jobs
+        self.rules = rules
+        self._public_key = public_key
+        self._private_key = private_key
+        self._signing_key: Optional[SigningKey] = None
+        self._verifying_key: Optional[VerifyingKey] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "Sealer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shut the thread pool down; the Sealer can still be used, and starts a new pool if needed."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    @property
+    def signing_key(self) -> SigningKey:
+        """Decoded signing key, loaded on first use (RuntimeError if it is missing or invalid)."""
+        with self._lock:
+            if self._signing_key is None:
+                try:
+                    with profiling.phase("env"):
+                        private_key = self._private_key or get_private_key(self.env_path)
+                        self._signing_key = signing_key_handle(private_key)
+                except (FileNotFoundError, ValueError) as e:
+                    raise RuntimeError(f"Cannot add decorators: {e}. Please run 'pysealer init' first.")
+            return self._signing_key
+
+    @property
+    def verifying_key(self) -> VerifyingKey:
+        """Decoded verifying key, loaded on first use (RuntimeError if it is missing or invalid)."""
+        if self._verifying_key is None and self._public_key is None and self._private_key is not None:
+            # Derived from the given private key, so a Sealer built from one key seals and checks
+            verifying_key = self.signing_key.verifying_key()
+            with self._lock:
+                self._verifying_key = verifying_key
+        with self._lock:
+            if self._verifying_key is None:
+                try:
+                    with profiling.phase("env"):
+                        public_key = self._public_key or get_public_key(self.env_path)
+                        self._verifying_key = verifying_key_handle(public_key)
+                except (FileNotFoundError, ValueError) as e:
+                    raise RuntimeError(f"Cannot verify decorators: {e}. Please run 'pysealer init' first.")
+            return self._verifying_key
+
+    def _pool(self) -> Optional[ThreadPoolExecutor]:
+        """The session's thread pool, started on first use, or None with jobs=1."""
+        if self.jobs == 1:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix="pysealer")
+            return self._executor
+
+    def find_python_files(self, folder: str) -> List[str]:
+        """The Python files of a folder, with the session's rules (see discovery.find_python_files)."""
+        folder_path = Path(folder)
+        if not folder_path.exists():
+            raise FileNotFoundError(f"Folder '{folder}' does not exist.")
+        if not folder_path.is_dir():
+            raise NotADirectoryError(f"'{folder}' is not a directory.")
+
+        file_paths = find_python_files(folder, self.rules)
+        if not file_paths:
+            raise ValueError(f"No Python files found in '{folder}'.")
+        return file_paths
+
+    def _targets(self, path: str) -> Tuple[List[str], Optional[str]]:
+        """Files a path stands for, and the folder to keep the cache in (None for a single file)."""
+        if os.path.isdir(path):
+            return self.find_python_files(path), path
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Path '{path}' does not exist.")
+        return [path], None
+
+    def lock(self, path: str, mode: str = "plain", encoding: str = "base32", root: bool = False) -> List[str]:
+        """
+        Seal every function and class of a Python file, or of every Python file in a folder.
+
+        Args:
+            path: Python file or folder to lock
+            mode, encoding, root: As for add_decorators
+
+        Returns:
+            Paths of the files that were changed (and written atomically), ordered by path
+        """
+        file_paths, folder = self._targets(path)
+        if folder is None:
+            # A single file's errors are raised as they are
+            check_seal_options(mode, encoding)
+            return file_paths if lock_file_with_key(path, self.signing_key, mode, encoding, root) else []
+        return self.lock_files(file_paths, mode, encoding, root)
+
+    def lock_files(self, file_paths: List[str], mode: str = "plain", encoding: str = "base32", root: bool = False) -> List[str]:
+        """
+        Seal the given Python files, e.g. the files changed since a git reference.
+
+        Returns:
+            Paths of the files that were changed, in the order given
+
+        Raises:
+            RuntimeError: If the key is missing, or listing every file that could not be sealed
+        """
+        if not file_paths:
+            return []
+        check_seal_options(mode, encoding)
+        signing_key = self.signing_key
+
+        def lock_one(file_path: str) -> Tuple[bool, Optional[str]]:
+            try:
+                return lock_file_with_key(file_path, signing_key, mode, encoding, root), None
+            except Exception as e:
+                return False, str(e)
+
+        executor = self._pool() if len(file_paths) > 1 else None
+        if executor is not None:
+            ordered = largest_first(file_paths)
+            outcomes = dict(zip(ordered, executor.map(lock_one, ordered)))
+        else:
+            outcomes = {file_path: lock_one(file_path) for file_path in file_paths}
+
+        errors = [f"  - {file_path}: {outcomes[file_path][1]}" for file_path in file_paths if outcomes[file_path][1] is not None]
+        if errors:
+            error_msg = "\n".join(errors)
+            raise RuntimeError(f"Failed to decorate some files:\n{error_msg}")
+        return [file_path for file_path in file_paths if outcomes[file_path][0]]
+
+    def check_file(self, file_path: str) -> Dict[str, SymbolResult]:
+        """Verify every seal of one Python file (see check_decorators); errors are raised, not reported."""
+        return check_decorators(file_path, self.verifying_key)
+
+    def check_source(self, file_path: str, content: str) -> Dict[str, SymbolResult]:
+        """Verify every seal of a source held in memory (see check_decorators.check_source)."""
+        return check_source(file_path, content, self.verifying_key)
+
+    def check(self, path: str, use_cache: bool = False, use_git_blobs: bool = False) -> Dict[str, Dict[str, dict]]:
+        """
+        Verify a Python file, or every Python file in a folder.
+
+        Args:
+            path: Python file or folder to check
+            use_cache, use_git_blobs: As for check_decorators_in_folder
+
+        Returns:
+            Dictionary mapping file paths to their verification results, or to
+            {"error": message} for a file that could not be checked, ordered by path
+        """
+        file_paths, blob_root = self._targets(path)
+        return self.check_files(file_paths, use_cache, use_git_blobs, blob_root)
+
+    def check_files(self, file_paths: List[str], use_cache: bool = False, use_git_blobs: bool = False,
+                    blob_root: Optional[str] = None) -> Dict[str, Dict[str, dict]]:
+        """Verify the given Python files; results are in the order given (see check_decorators_in_files)."""
+        all_results = dict(self.iter_check_files(file_paths, use_cache, use_git_blobs, blob_root))
+        return {file_path: all_results[file_path] for file_path in file_paths}
+
+    def iter_check(self, path: str, use_cache: bool = False, use_git_blobs: bool = False) -> Iterator[Tuple[str, Dict[str, dict]]]:
+        """Verify a Python file or folder, yielding (file path, results) as each file completes."""
+        file_paths, blob_root = self._targets(path)
+        return self.iter_check_files(file_paths, use_cache, use_git_blobs, blob_root)
+
+    def iter_check_files(self, file_paths: List[str], use_cache: bool = False, use_git_blobs: bool = False,
+                         blob_root: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, dict]]]:
+        """Verify the given Python files, yielding (file path, results) as each file completes (see iter_check_files)."""
+        try:
+            verifying_key, key_error = self.verifying_key, None
+        except RuntimeError as e:
+            # Reported per file, as the module functions do (files without seals still pass)
+            verifying_key, key_error = None, e
+        return iter_check_files(file_paths, 1, use_cache, use_git_blobs, blob_root, verifying_key=verifying_key,
+                                public_key=str(verifying_key) if verifying_key is not None else None,
+                                executor=self._pool(), key_error=key_error)
+
+    def remove(self, path: str) -> List[str]:
+        """
+        Remove every pysealer decorator from a Python file, or from every Python file in a folder.
+
+        Returns:
+            Paths of the files that were changed (and written atomically), ordered by path
+        """
+        file_paths, folder = self._targets(path)
+        modified = []
+        for file_path in file_paths:
+            try:
+                modified_code, found = remove_decorators(file_path)
+            except Exception:
+                if folder is None:
+                    raise
+                # Files of a folder that cannot be parsed are skipped, as remove_decorators_from_folder does
+                continue
+            if found:
+                write_atomically(file_path, modified_code)
+                modified.append(file_path)
+        return modified
+
+    def verify_symbol(self, file_path: str, name: str) -> SymbolResult:
+        """
+        Verify the seal of one function or class, without verifying the rest of its file.
+
+        Args:
+            file_path: Python file holding the function or class
+            name: Its name, as the results of check_decorators are keyed
+
+        Raises:
+            ValueError: If the file has no function or class of that name
+        """
+        index = SourceIndex.from_file(file_path)
+        # The last definition wins, as in the results of check_decorators
+        symbols = [symbol for symbol in index.symbols if symbol.name == name]
+        if not symbols:
+            raise ValueError(f"No function or class named '{name}' in '{file_path}'.")
+        symbol = symbols[-1]
+
+        result = SymbolResult(file_path, symbol.name, symbol.signature, symbol.line_start, symbol.line_end)
+        if symbol.signature is None:
+            result.message = "No pysealer decorator found"
+            return result
+
+        pending = [(symbol.name, result, index.segment(symbol), symbol.line_start)]
+        verdicts, error = verify_pending(pending, self.verifying_key)
+        apply_verdicts(file_path, pending, verdicts, error)
+        return result
@@ -1,10 +1,20 @@
 """Setup the storage of the pysealer keypair in a .env file."""
 
 import os
+import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
-from dotenv import load_dotenv, set_key
-from pysealer import generate_keypair
+from typing import Dict, Optional, Tuple
+from dotenv import dotenv_values, set_key
+from pysealer import SigningKey, VerifyingKey, generate_keypair
+
+# Parsed .env files keyed by resolved path, stored with the modification time they were read at
+_env_file_cache: Dict[Path, Tuple[int, Dict[str, Optional[str]]]] = {}
+
+# Discovered .env file keyed by (PYSEALER_ENV_PATH, current directory)
+_env_location_cache: Dict[Tuple[Optional[str], str], Path] = {}
+
+_cache_lock = threading.Lock()
 
 
 def _find_env_file() -> Path:
@@ -51,11 +61,12 @@ def setup_keypair(env_path: Optional[str | Path] = None):
     else:
         env_path = Path(env_path)
     
-    # Check if keys already exist
+    # Check if keys already exist (the file is parsed without loading it into os.environ,
+    # which is not safe while other threads read it)
     if env_path.exists():
-        load_dotenv(env_path)
-        existing_private = os.getenv("PYSEALER_PRIVATE_KEY")
-        existing_public = os.getenv("PYSEALER_PUBLIC_KEY")
+        existing = dotenv_values(env_path)
+        existing_private = existing.get("PYSEALER_PRIVATE_KEY")
+        existing_public = existing.get("PYSEALER_PUBLIC_KEY")
         
         if existing_private or existing_public:
             raise ValueError(f"Keys already exist in {env_path} Cannot overwrite existing keys.")
@@ -70,68 +81,160 @@ def setup_keypair(env_path: Optional[str | Path] = None):
     set_key(str(env_path), "PYSEALER_PRIVATE_KEY", private_key_hex)
     set_key(str(env_path), "PYSEALER_PUBLIC_KEY", public_key_hex)
     
+    # Make sure no stale keys are served from the cache
+    clear_key_cache()
+    
     return private_key_hex, public_key_hex
 
 
-def get_public_key(env_path: Optional[str | Path] = None) -> str:
+def _read_env_file(env_path: Path) -> Dict[str, Optional[str]]:
     """
-    Retrieve the public key from the .env file.
+    Parse a .env file without modifying os.environ.
     
-    Args:
-        env_path: Optional path to .env file. If None, searches from current directory upward.
+    The parsed values are cached per resolved path and reused while the file's
+    modification time is unchanged, so repeated key lookups do not re-read the file.
     
-    Returns:
-        str: The public key hex string, or None if not found.
+    Raises:
+        FileNotFoundError: If the .env file does not exist
     """
-    # Determine .env location
-    if env_path is None:
+    resolved = env_path.resolve()
+    try:
+        mtime = resolved.stat().st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError(f"No .env file found at {env_path}. Run setup_keypair() first.")
+    
+    with _cache_lock:
+        cached = _env_file_cache.get(resolved)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    
+    values = dotenv_values(resolved)
+    
+    with _cache_lock:
+        _env_file_cache[resolved] = (mtime, values)
+    return values
+
+
+def _locate_env_file() -> Path:
+    """Find the .env file like _find_env_file, reusing the result for the same directory and PYSEALER_ENV_PATH."""
+    cache_key = (os.getenv("PYSEALER_ENV_PATH"), os.getcwd())
+    with _cache_lock:
+        env_path = _env_location_cache.get(cache_key)
+    
+    # Search again if nothing was found before or the file has since been removed
+    if env_path is None or not env_path.exists():
         env_path = _find_env_file()
+        if env_path.exists():
+            with _cache_lock:
+                _env_location_cache[cache_key] = env_path
+    
+    return env_path
+
+
+def _get_key(variable: str, env_path: Optional[str | Path]) -> str:
+    """
+    Look up a key, first in the process environment and then in the .env file.
+    
+    Args:
+        variable: Name of the key variable (PYSEALER_PRIVATE_KEY or PYSEALER_PUBLIC_KEY)
+        env_path: Optional path to .env file. If given, the key is always read from that file.
+    """
+    if env_path is None:
+        # Keys provided through the environment are used without touching disk
+        key = os.environ.get(variable)
+        if key:
+            return key
+        env_path = _locate_env_file()
     else:
         env_path = Path(env_path)
     
-    # Check if .env exists
-    if not env_path.exists():
-        raise FileNotFoundError(f"No .env file found at {env_path}. Run setup_keypair() first.")
+    key = _read_env_file(env_path).get(variable)
     
-    # Load environment variables from .env
-    load_dotenv(env_path)
+    if not key:
+        raise ValueError(f"{variable} not found in {env_path}. Run setup_keypair() first.")
     
-    # Get public key
-    public_key = os.getenv("PYSEALER_PUBLIC_KEY")
+    return key
+
+
+def clear_key_cache() -> None:
+    """
+    Forget every cached .env file location, parsed .env file and decoded key handle.
     
-    if public_key is None:
-        raise ValueError(f"PYSEALER_PUBLIC_KEY not found in {env_path}. Run setup_keypair() first.")
+    Call this after keys were rotated by other means than setup_keypair() and the
+    .env file's modification time cannot be relied on to detect the change.
+    """
+    with _cache_lock:
+        _env_file_cache.clear()
+        _env_location_cache.clear()
+    signing_key_handle.cache_clear()
+    verifying_key_handle.cache_clear()
+
+
+def get_public_key(env_path: Optional[str | Path] = None) -> str:
+    """
+    Retrieve the public key from the environment or the .env file.
+    
+    PYSEALER_PUBLIC_KEY is read straight from the environment when it is set. Otherwise the
+    .env file is parsed once and cached until its modification time changes.
     
-    return public_key
+    Args:
+        env_path: Optional path to .env file. If None, uses the environment or searches from current directory upward.
+    
+    Returns:
+        str: The public key hex string.
+    """
+    return _get_key("PYSEALER_PUBLIC_KEY", env_path)
 
 
 def get_private_key(env_path: Optional[str | Path] = None) -> str:
     """
-    Retrieve the private key from the .env file.
+    Retrieve the private key from the environment or the .env file.
+    
+    PYSEALER_PRIVATE_KEY is read straight from the environment when it is set. Otherwise the
+    .env file is parsed once and cached until its modification time changes.
     
     Args:
-        env_path: Optional path to .env file. If None, searches from current directory upward.
+        env_path: Optional path to .env file. If None, uses the environment or searches from current directory upward.
     
     Returns:
-        str: The private key hex string, or None if not found.
+        str: The private key hex string.
     """
-    # Determine .env location
-    if env_path is None:
-        env_path = _find_env_file()
-    else:
-        env_path = Path(env_path)
-    
-    # Check if .env exists
-    if not env_path.exists():
-        raise FileNotFoundError(f"No .env file found at {env_path}. Run setup_keypair() first.")
+    return _get_key("PYSEALER_PRIVATE_KEY", env_path)
+
+
+@lru_cache(maxsize=8)
+def signing_key_handle(private_key: str) -> SigningKey:
+    """Decode a private key once per process."""
+    return SigningKey(private_key)
+
+
+@lru_cache(maxsize=8)
+def verifying_key_handle(public_key: str) -> VerifyingKey:
+    """Decode a public key once per process."""
+    return VerifyingKey(public_key)
+
+
+def get_signing_key(env_path: Optional[str | Path] = None) -> SigningKey:
+    """
+    Load the private key from the .env file as a decoded signing key handle.
     
-    # Load environment variables from .env
-    load_dotenv(env_path)
+    Args:
+        env_path: Optional path to .env file. If None, searches from current directory upward.
     
-    # Get private key
-    private_key = os.getenv("PYSEALER_PRIVATE_KEY")
+    Returns:
+        SigningKey: Handle that can sign any number of items without re-decoding the key.
+    """
+    return signing_key_handle(get_private_key(env_path))
+
+
+def get_verifying_key(env_path: Optional[str | Path] = None) -> VerifyingKey:
+    """
+    Load the public key from the .env file as a decoded verifying key handle.
     
-    if private_key is None:
-        raise ValueError(f"PYSEALER_PRIVATE_KEY not found in {env_path}. Run setup_keypair() first.")
+    Args:
+        env_path: Optional path to .env file. If None, searches from current directory upward.
     
-    return private_key
+    Returns:
+        VerifyingKey: Handle that can verify any number of signatures without re-decoding the key.
+    """
+    return verifying_key_handle(get_public_key(env_path))
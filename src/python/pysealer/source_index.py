@@ -0,0 +1,172 @@
+"""Single-pass index of the functions and classes in a Python source file."""
+
+import ast
+from bisect import bisect_left
+from collections import deque
+from typing import List, NamedTuple, Optional, Set
+from . import profiling
+
+# Start of the module-level comment holding a file's root seal (see add_decorators.py)
+ROOT_MARKER = "# pysealer-root: "
+
+
+class Symbol(NamedTuple):
+    """A function or class definition found in a source file."""
+    name: str
+    # Whether this is a function defined directly in a class body (a method)
+    is_method: bool
+    # 1-based first (def/class keyword) and last line of the definition
+    line_start: int
+    line_end: int
+    # Indentation of the def/class keyword
+    col_offset: int
+    # 0-based line where a new pysealer decorator is inserted
+    insert_line: int
+    # Signature found in an @pysealer._<signature>() decorator
+    signature: Optional[str]
+    # 0-based line holding the signature text, if any
+    signature_line: Optional[int]
+
+
+def _is_pysealer_decorator(decorator: ast.expr) -> bool:
+    """Whether a decorator is any pysealer decorator (@pysealer..., @pysealer.x, @pysealer.x(...))."""
+    if isinstance(decorator, ast.Name):
+        return decorator.id.startswith("pysealer")
+    if isinstance(decorator, ast.Attribute):
+        return isinstance(decorator.value, ast.Name) and decorator.value.id == "pysealer"
+    if isinstance(decorator, ast.Call):
+        func = decorator.func
+        if isinstance(func, ast.Attribute):
+            return isinstance(func.value, ast.Name) and func.value.id == "pysealer"
+        if isinstance(func, ast.Name):
+            return func.id.startswith("pysealer")
+    return False
+
+
+def _root_marker_lines(lines: List[str]) -> List[int]:
+    """
+    0-based line of a file's root seal marker, if it has one, as a list of at most one line.
+
+    Only the line add_decorators writes the marker to counts: right below the first line
+    importing pysealer, or the first line of a file without one. Marker-like lines anywhere
+    else, e.g. in a string, are content like any other.
+    """
+    marker_line = 0
+    for index, line in enumerate(lines):
+        if line.startswith('import pysealer') or line.startswith('from pysealer'):
+            marker_line = index + 1
+            break
+    if marker_line < len(lines) and lines[marker_line].startswith(ROOT_MARKER):
+        return [marker_line]
+    return []
+
+
+class SourceIndex:
+    """
+    Line offsets, symbol spans, decorator lines and decorator-stripped segments of a Python file.
+
+    The source is parsed and walked once. Symbols are listed in ast.walk order, and each
+    segment is sliced straight out of the source unless a pysealer decorator line has to
+    be left out of it.
+    """
+
+    def __init__(self, content: str):
+        self.content = content
+        self.lines = content.split('\n')
+
+        # Character offset at which each line starts
+        self.line_starts = [0] * len(self.lines)
+        offset = 0
+        for index, line in enumerate(self.lines):
+            self.line_starts[index] = offset
+            offset += len(line) + 1
+
+        # 0-based lines of every pysealer decorator, and of root seal markers
+        self.sealer_lines: Set[int] = set()
+        self.root_marker_lines = _root_marker_lines(self.lines)
+
+        self.symbols: List[Symbol] = []
+        with profiling.phase("parse"):
+            self._index_symbols(ast.parse(content))
+
+        # Lines left out of segments: pysealer decorators, whether found by the AST or by their text
+        excluded = set(self.sealer_lines)
+        excluded.update(index for index, line in enumerate(self.lines) if line.strip().startswith('@pysealer'))
+        self._excluded = sorted(excluded)
+
+    @classmethod
+    def from_file(cls, file_path: str) -> "SourceIndex":
+        """Read and index a Python file."""
+        with profiling.phase("read"):
+            with open(file_path, 'r') as f:
+                content = f.read()
+        return cls(content)
+
+    def _index_symbols(self, tree: ast.AST) -> None:
+        """Walk the tree breadth-first, in ast.walk order, recording every function and class."""
+        queue = deque([(tree, False)])
+        while queue:
+            node, is_method = queue.popleft()
+            is_class = isinstance(node, ast.ClassDef)
+            for child in ast.iter_child_nodes(node):
+                queue.append((child, is_class and isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef))))
+
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                self.symbols.append(self._symbol(node, is_method))
+
+    def _symbol(self, node: ast.AST, is_method: bool) -> Symbol:
+        """Build the symbol for a function or class definition and record its decorator lines."""
+        insert_line = None
+        signature = None
+        signature_line = None
+
+        for decorator in node.decorator_list:
+            if not _is_pysealer_decorator(decorator):
+                if insert_line is None:
+                    insert_line = decorator.lineno - 1
+                continue
+
+            self.sealer_lines.add(decorator.lineno - 1)
+
+            # Extract the signature from @pysealer._<signature>()
+            if signature is None and isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Attribute):
+                if decorator.func.attr.startswith('_'):
+                    signature = decorator.func.attr[1:]
+                    signature_line = decorator.func.end_lineno - 1
+
+        return Symbol(
+            name=node.name,
+            is_method=is_method,
+            line_start=node.lineno,
+            line_end=node.end_lineno if node.end_lineno else node.lineno,
+            col_offset=node.col_offset,
+            insert_line=node.lineno - 1 if insert_line is None else insert_line,
+            signature=signature,
+            signature_line=signature_line,
+        )
+
+    def _line_end(self, index: int) -> int:
+        """Character offset just past the end of a line, excluding its newline."""
+        return self.line_starts[index] + len(self.lines[index])
+
+    def span(self, symbol: Symbol) -> str:
+        """Full source of a definition's lines, including the trailing newline if there is one."""
+        end = self.line_starts[symbol.line_end] if symbol.line_end < len(self.lines) else len(self.content)
+        return self.content[self.line_starts[symbol.line_start - 1]:end]
+
+    def segment(self, symbol: Symbol) -> str:
+        """Source that a definition's signature covers: its lines without pysealer decorator lines."""
+        start, end = symbol.line_start - 1, symbol.line_end - 1
+        first = bisect_left(self._excluded, start)
+        if first == len(self._excluded) or self._excluded[first] > end:
+            return self.content[self.line_starts[start]:self._line_end(end)]
+
+        excluded = set(self._excluded[first:bisect_left(self._excluded, end + 1)])
+        return '\n'.join(self.lines[index] for index in range(start, end + 1) if index not in excluded)
+
+    def find(self, name: str) -> Optional[Symbol]:
+        """First function or class with the given name, in ast.walk order."""
+        for symbol in self.symbols:
+            if symbol.name == name:
+                return symbol
+        return None
@@ -0,0 +1,342 @@
+"""Watch a Python file or folder and re-check (or re-lock) only the files that change."""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+from .add_decorators import check_seal_options, read_and_seal, write_atomically
+from .discovery import find_directories, find_python_files
+from .sealer import Sealer
+
+# Editors save in bursts (write a backup, write the file, rename, touch): changes are handled
+# once nothing has changed for this long
+DEFAULT_DEBOUNCE = 0.2
+
+# How often the polling backend looks at the files
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+class WatchEvent(NamedTuple):
+    """What happened to one file after it changed."""
+    file_path: str
+    # Verification results as returned by check_decorators, or {"error": message}; None if the
+    # file was removed or locked
+    results: Optional[dict]
+    # Whether the file was sealed again and written back (only with lock=True)
+    locked: bool = False
+    # Whether the file no longer exists or is no longer covered by the watch
+    removed: bool = False
+
+
+def _stat_fingerprint(file_path: str) -> Optional[Tuple[int, int]]:
+    """(size, mtime_ns) of a file, or None if it is gone."""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class _InotifyBackend:
+    """
+    Linux inotify watches on every directory that holds a watched file.
+
+    Directories are watched rather than files, so editors that save by renaming a new file
+    over the old one are seen too.
+    """
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0x00000800
+    IN_CLOEXEC = 0x00080000
+
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        # Watch descriptor -> directory, and the reverse
+        self._directories: Dict[int, str] = {}
+        self._descriptors: Dict[str, int] = {}
+
+    def watch(self, directories: Set[str]) -> None:
+        """Watch new directories (the ones already watched are kept)."""
+        for directory in directories - set(self._descriptors):
+            descriptor = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.MASK)
+            if descriptor < 0:
+                error = ctypes.get_errno()
+                # A directory removed in the meantime is simply not watched
+                if error == errno.ENOENT:
+                    continue
+                raise OSError(error, os.strerror(error), directory)
+            self._directories[descriptor] = directory
+            self._descriptors[directory] = descriptor
+
+    def wait(self, timeout: float) -> Tuple[Set[str], bool]:
+        """
+        Wait up to timeout seconds for changes.
+
+        Returns:
+            Tuple of (changed paths, whether the watched tree changed shape: directories
+            created, removed or moved, or events lost to a queue overflow)
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set(), False
+
+        changed: Set[str] = set()
+        rescan = False
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed, rescan
+
+        offset = 0
+        while offset < len(data):
+            descriptor, mask, _, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & self.IN_Q_OVERFLOW:
+                rescan = True
+                continue
+            if mask & self.IN_IGNORED:
+                # The directory itself is gone
+                directory = self._directories.pop(descriptor, None)
+                self._descriptors.pop(directory, None)
+                rescan = True
+                continue
+            directory = self._directories.get(descriptor)
+            if directory is None or not name:
+                continue
+            if mask & self.IN_ISDIR:
+                rescan = True
+                continue
+            changed.add(os.path.join(directory, os.fsdecode(name)))
+        return changed, rescan
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class _PollingBackend:
+    """Stats the watched files every interval; used where inotify is not available."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+
+    def watch(self, directories: Set[str]) -> None:
+        pass
+
+    def wait(self, timeout: float) -> Tuple[Set[str], bool]:
+        """Sleep one interval, then ask for a rescan: the watcher compares every file with its index."""
+        time.sleep(self.interval)
+        return set(), True
+
+    def close(self) -> None:
+        pass
+
+
+class Watcher:
+    """
+    Keeps an in-memory index of the watched Python files and handles the ones that change.
+
+    Each file is indexed by its size and modification time. After a change, only files whose
+    fingerprint moved are checked again, and within them the verdict memo of check_decorators
+    skips the functions/classes whose source and seal did not change, so only the symbols that
+    were edited are verified again. With lock=True changed files are sealed again instead, and
+    the watcher's own writes are recognized and not handled twice.
+
+    Files are checked and locked with a Sealer session: the one given, or one of jobs threads
+    with the keys of the environment or the .env file, which close() shuts down.
+
+    Usage:
+        watcher = Watcher("src")
+        for event in watcher.start():      # initial check of every file
+            ...
+        for batch in watcher.changes():    # blocks; call watcher.stop() from another thread to end it
+            ...
+    """
+
+    def __init__(self, path: str, lock: bool = False, mode: str = "plain", encoding: str = "base32", root: bool = False,
+                 debounce: float = DEFAULT_DEBOUNCE, poll_interval: float = DEFAULT_POLL_INTERVAL, polling: bool = False,
+                 jobs: Optional[int] = 1, sealer: Optional[Sealer] = None):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Path '{path}' does not exist.")
+        if lock:
+            check_seal_options(mode, encoding)
+
+        self.path = os.path.abspath(path)
+        self.is_folder = os.path.isdir(self.path)
+        self.lock = lock
+        self.mode = mode
+        self.encoding = encoding
+        self.root = root
+        self.debounce = debounce
+        self._owns_sealer = sealer is None
+        self.sealer = sealer if sealer is not None else Sealer(jobs=jobs)
+
+        self._index: Dict[str, Optional[Tuple[int, int]]] = {}
+        self._stopped = threading.Event()
+
+        self._backend = None
+        if not polling:
+            try:
+                self._backend = _InotifyBackend()
+            except (OSError, AttributeError):
+                # Not Linux, or no inotify in this libc
+                self._backend = None
+        if self._backend is None:
+            self._backend = _PollingBackend(poll_interval)
+
+    @property
+    def backend(self) -> str:
+        """Name of the change notification backend in use: 'inotify' or 'polling'."""
+        return "inotify" if isinstance(self._backend, _InotifyBackend) else "polling"
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _discover(self) -> List[str]:
+        """Every Python file the watch covers."""
+        if self.is_folder:
+            return find_python_files(self.path)
+        return [self.path] if os.path.isfile(self.path) else []
+
+    def _watch_directories(self) -> None:
+        """
+        Watch every directory a new Python file could be discovered in, including those without any yet.
+
+        Called before the files are listed, so a file created in a new directory while it is being
+        added to the watch is found by the listing or notified afterwards.
+        """
+        if not isinstance(self._backend, _InotifyBackend):
+            return
+        if self.is_folder:
+            directories = set(find_directories(self.path))
+        else:
+            directories = {os.path.dirname(self.path)}
+        try:
+            self._backend.watch(directories)
+        except OSError:
+            # Out of inotify watches: fall back to polling
+            self._backend.close()
+            self._backend = _PollingBackend(DEFAULT_POLL_INTERVAL)
+
+    def start(self) -> Iterator[WatchEvent]:
+        """Index every file and check (or lock) it once, yielding one event per file."""
+        self._watch_directories()
+        file_paths = self._discover()
+
+        if self.lock:
+            # Seal every file once, as 'pysealer lock' does
+            self.sealer.lock_files(file_paths, self.mode, self.encoding, self.root)
+            for file_path in file_paths:
+                self._index[file_path] = _stat_fingerprint(file_path)
+                yield WatchEvent(file_path, None, locked=True)
+            return
+
+        for file_path, results in self.sealer.iter_check_files(file_paths, use_cache=True):
+            self._index[file_path] = _stat_fingerprint(file_path)
+            yield WatchEvent(file_path, results)
+
+    def stop(self) -> None:
+        """Make changes() return, within half a second (or one poll interval when polling)."""
+        self._stopped.set()
+
+    def close(self) -> None:
+        """Stop watching and release the notification backend (and the watcher's own Sealer)."""
+        self.stop()
+        self._backend.close()
+        if self._owns_sealer:
+            self.sealer.close()
+
+    def changes(self) -> Iterator[List[WatchEvent]]:
+        """Wait for changes and yield the events of each debounced burst of them, until stop() is called."""
+        while not self._stopped.is_set():
+            changed, rescan = self._backend.wait(0.5)
+            if not changed and not rescan:
+                continue
+
+            # Let the burst settle (the polling backend only notices it once per interval anyway)
+            while isinstance(self._backend, _InotifyBackend) and not self._stopped.is_set():
+                more, more_rescan = self._backend.wait(self.debounce)
+                if not more and not more_rescan:
+                    break
+                changed |= more
+                rescan = rescan or more_rescan
+
+            events = self._handle(changed, rescan)
+            if events:
+                yield events
+
+    def _handle(self, changed: Set[str], rescan: bool) -> List[WatchEvent]:
+        """Check or lock the files whose fingerprint moved, and report removed files."""
+        candidates = {path for path in changed if path in self._index}
+        removed = set()
+        if rescan or any(path.endswith(".py") and path not in self._index for path in changed):
+            # New, moved or removed files or directories: watch new directories and list the files
+            # again (one git ls-files call in a repository)
+            self._watch_directories()
+            file_paths = self._discover()
+            candidates.update(file_paths)
+            removed = set(self._index).difference(file_paths)
+
+        events = []
+        for file_path in sorted(candidates | removed):
+            fingerprint = None if file_path in removed else _stat_fingerprint(file_path)
+            if fingerprint is None:
+                if file_path in self._index:
+                    del self._index[file_path]
+                    events.append(WatchEvent(file_path, None, removed=True))
+                continue
+            if self._index.get(file_path) == fingerprint:
+                # Unchanged, or written by the watcher itself
+                continue
+            event = self._relock(file_path) if self.lock else self._recheck(file_path)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def _recheck(self, file_path: str) -> WatchEvent:
+        """Check a changed file; the verdict memo skips its unchanged functions/classes."""
+        self._index[file_path] = _stat_fingerprint(file_path)
+        # Reported as check reports it: files without decorators pass even without a key
+        return WatchEvent(file_path, dict(self.sealer.iter_check_files([file_path]))[file_path])
+
+    def _relock(self, file_path: str) -> Optional[WatchEvent]:
+        """Seal a changed file again, or return None if sealing it changes nothing (e.g. it was only touched)."""
+        try:
+            # Compared with the source sealing read, so a file that was only touched is left alone
+            content, modified_code, has_changes = read_and_seal(file_path, self.sealer.signing_key, self.mode, self.encoding, self.root)
+            if has_changes and modified_code != content:
+                write_atomically(file_path, modified_code)
+            else:
+                has_changes = False
+        except Exception as e:
+            self._index[file_path] = _stat_fingerprint(file_path)
+            return WatchEvent(file_path, {"error": str(e)})
+        # Index the file as written, so the change notification of the write is skipped
+        self._index[file_path] = _stat_fingerprint(file_path)
+        return WatchEvent(file_path, None, locked=True) if has_changes else None
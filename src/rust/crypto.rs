@@ -1,7 +1,191 @@
 //! Cryptographic utilities for Ed25519 signing.
 
-use ed25519_dalek::{Signer, Verifier, SigningKey, VerifyingKey, Signature};
+use std::borrow::Cow;
+use std::collections::{HashMap, HashSet};
+use std::sync::RwLock;
+
+use ed25519_dalek::{verify_batch, Signer, Verifier, SigningKey, VerifyingKey, Signature};
 use rand::rngs::OsRng;
+use rayon::prelude::*;
+
+/// Number of signatures checked together in one Ed25519 batch equation
+const VERIFY_BATCH_SIZE: usize = 128;
+
+/// Inputs at least this large are hashed with BLAKE3 across all cores
+const PARALLEL_DIGEST_THRESHOLD: usize = 128 * 1024;
+
+/// Prefix marking a seal whose signature covers the BLAKE3 digest of the source
+const BLAKE3_SEAL_PREFIX: &str = "b3_";
+
+/// Prefix marking a seal whose signature is Base32 encoded
+const BASE32_SEAL_PREFIX: &str = "b32_";
+
+/// Domain separator of verdict keys, so they never collide with other BLAKE3 hashes
+const VERDICT_KEY_CONTEXT: &[u8] = b"pysealer-verdict\0";
+
+/// RFC 4648 Base32 alphabet in lowercase, every character is valid in a Python identifier
+const BASE32_ALPHABET: &[u8; 32] = b"abcdefghijklmnopqrstuvwxyz234567";
+
+/// What a seal's signature covers
+#[derive(Clone, Copy, Debug, PartialEq, Eq)]
+pub enum SealMode {
+    /// The signature covers the source text itself
+    Plain,
+    /// The signature covers the 32-byte BLAKE3 digest of the source text
+    Blake3,
+}
+
+impl SealMode {
+    /// Parse a mode name ("plain" or "blake3")
+    pub fn parse(name: &str) -> Result<SealMode, String> {
+        match name {
+            "plain" => Ok(SealMode::Plain),
+            "blake3" => Ok(SealMode::Blake3),
+            _ => Err(format!("Unknown seal mode '{}', expected 'plain' or 'blake3'", name)),
+        }
+    }
+
+    fn prefix(self) -> &'static str {
+        match self {
+            SealMode::Plain => "",
+            SealMode::Blake3 => BLAKE3_SEAL_PREFIX,
+        }
+    }
+}
+
+/// How a seal's signature is written in the decorator
+#[derive(Clone, Copy, Debug, PartialEq, Eq)]
+pub enum SealEncoding {
+    /// Base58, the original encoding (quadratic to encode and decode)
+    Base58,
+    /// Lowercase unpadded Base32 (linear to encode and decode)
+    Base32,
+}
+
+impl SealEncoding {
+    /// Parse an encoding name ("base58" or "base32")
+    pub fn parse(name: &str) -> Result<SealEncoding, String> {
+        match name {
+            "base58" => Ok(SealEncoding::Base58),
+            "base32" => Ok(SealEncoding::Base32),
+            _ => Err(format!("Unknown seal encoding '{}', expected 'base58' or 'base32'", name)),
+        }
+    }
+
+    fn prefix(self) -> &'static str {
+        match self {
+            SealEncoding::Base58 => "",
+            SealEncoding::Base32 => BASE32_SEAL_PREFIX,
+        }
+    }
+}
+
+/// Split a seal into its mode, encoding and encoded signature
+/// Neither alphabet contains '_', so the tag prefixes cannot be confused with a signature
+fn split_seal(seal: &str) -> (SealMode, SealEncoding, &str) {
+    let (mode, rest) = match seal.strip_prefix(BLAKE3_SEAL_PREFIX) {
+        Some(rest) => (SealMode::Blake3, rest),
+        None => (SealMode::Plain, seal),
+    };
+    match rest.strip_prefix(BASE32_SEAL_PREFIX) {
+        Some(signature) => (mode, SealEncoding::Base32, signature),
+        None => (mode, SealEncoding::Base58, rest),
+    }
+}
+
+/// Encode bytes as lowercase unpadded Base32
+fn base32_encode(data: &[u8]) -> String {
+    let mut encoded = String::with_capacity((data.len() * 8).div_ceil(5));
+    let mut buffer: u32 = 0;
+    let mut bits = 0;
+    
+    for &byte in data {
+        buffer = (buffer << 8 | byte as u32) & 0xfff;
+        bits += 8;
+        while bits >= 5 {
+            bits -= 5;
+            encoded.push(BASE32_ALPHABET[(buffer >> bits & 31) as usize] as char);
+        }
+    }
+    if bits > 0 {
+        encoded.push(BASE32_ALPHABET[(buffer << (5 - bits) & 31) as usize] as char);
+    }
+    
+    encoded
+}
+
+/// Decode lowercase unpadded Base32
+fn base32_decode(encoded: &str) -> Result<Vec<u8>, String> {
+    let mut data = Vec::with_capacity(encoded.len() * 5 / 8);
+    let mut buffer: u32 = 0;
+    let mut bits = 0;
+    
+    for c in encoded.bytes() {
+        let value = match c {
+            b'a'..=b'z' => c - b'a',
+            b'2'..=b'7' => c - b'2' + 26,
+            _ => return Err(format!("invalid character '{}'", c as char)),
+        };
+        buffer = (buffer << 5 | value as u32) & 0xfff;
+        bits += 5;
+        if bits >= 8 {
+            bits -= 8;
+            data.push((buffer >> bits) as u8);
+        }
+    }
+    
+    Ok(data)
+}
+
+/// Compute the BLAKE3 digest of data, hashing large inputs in parallel
+pub fn digest(data: &[u8]) -> blake3::Hash {
+    let mut hasher = blake3::Hasher::new();
+    if data.len() >= PARALLEL_DIGEST_THRESHOLD {
+        hasher.update_rayon(data);
+    } else {
+        hasher.update(data);
+    }
+    hasher.finalize()
+}
+
+/// Compute the Merkle root over the BLAKE3 digests of a file's functions and classes
+/// Interior nodes hash their two children behind a 0x01 tag, an odd node is carried up unchanged,
+/// and the root binds the number of leaves
+pub fn merkle_root(leaves: &[blake3::Hash]) -> blake3::Hash {
+    let mut level: Vec<blake3::Hash> = leaves.to_vec();
+    while level.len() > 1 {
+        level = level
+            .chunks(2)
+            .map(|pair| match pair {
+                [left, right] => {
+                    let mut hasher = blake3::Hasher::new();
+                    hasher.update(&[0x01]);
+                    hasher.update(left.as_bytes());
+                    hasher.update(right.as_bytes());
+                    hasher.finalize()
+                }
+                [single] => *single,
+                _ => unreachable!(),
+            })
+            .collect();
+    }
+
+    let mut hasher = blake3::Hasher::new();
+    hasher.update(&[0x02]);
+    hasher.update(&(leaves.len() as u64).to_le_bytes());
+    if let Some(top) = level.first() {
+        hasher.update(top.as_bytes());
+    }
+    hasher.finalize()
+}
+
+/// The bytes a seal of the given mode signs for data
+fn signed_message(data: &[u8], mode: SealMode) -> Cow<'_, [u8]> {
+    match mode {
+        SealMode::Plain => Cow::Borrowed(data),
+        SealMode::Blake3 => Cow::Owned(digest(data).as_bytes().to_vec()),
+    }
+}
 
 /// Generate a new Ed25519 key pair
 /// Returns (private_key_base58, public_key_base58)
@@ -16,9 +200,9 @@ pub fn generate_keypair() -> (String, String) {
     (private_key_base58, public_key_base58)
 }
 
-/// Sign data using Ed25519 with a private key
-/// Returns the signature as a Base58 string
-pub fn generate_signature(data: &str, private_key_base58: &str) -> Result<String, String> {
+/// Decode a Base58 private key into an Ed25519 signing key
+/// The signing key also carries its decompressed public point, so it can be reused for every signature
+pub fn decode_signing_key(private_key_base58: &str) -> Result<SigningKey, String> {
     let private_key_bytes = bs58::decode(private_key_base58)
         .into_vec()
         .map_err(|e| format!("Invalid private key Base58: {}", e))?;
@@ -30,19 +214,12 @@ pub fn generate_signature(data: &str, private_key_base58: &str) -> Result<String
     let mut key_array = [0u8; 32];
     key_array.copy_from_slice(&private_key_bytes);
     
-    let signing_key = SigningKey::from_bytes(&key_array);
-    let signature = signing_key.sign(data.as_bytes());
-    
-    Ok(bs58::encode(signature.to_bytes()).into_string())
+    Ok(SigningKey::from_bytes(&key_array))
 }
 
-/// Verify an Ed25519 signature
-/// Returns true if the signature is valid
-pub fn verify_signature(data: &str, signature_base58: &str, public_key_base58: &str) -> Result<bool, String> {
-    let signature_bytes = bs58::decode(signature_base58)
-        .into_vec()
-        .map_err(|e| format!("Invalid signature Base58: {}", e))?;
-    
+/// Decode a Base58 public key into an Ed25519 verifying key
+/// The point is decompressed once here instead of on every verification
+pub fn decode_verifying_key(public_key_base58: &str) -> Result<VerifyingKey, String> {
     let public_key_bytes = bs58::decode(public_key_base58)
         .into_vec()
         .map_err(|e| format!("Invalid public key Base58: {}", e))?;
@@ -54,14 +231,192 @@ pub fn verify_signature(data: &str, signature_base58: &str, public_key_base58: &
     let mut key_array = [0u8; 32];
     key_array.copy_from_slice(&public_key_bytes);
     
-    let verifying_key = VerifyingKey::from_bytes(&key_array)
-        .map_err(|e| format!("Invalid public key: {}", e))?;
+    VerifyingKey::from_bytes(&key_array)
+        .map_err(|e| format!("Invalid public key: {}", e))
+}
+
+/// Encode a verifying key as a Base58 string
+pub fn encode_verifying_key(verifying_key: &VerifyingKey) -> String {
+    bs58::encode(verifying_key.to_bytes()).into_string()
+}
+
+/// Decode an encoded signature into an Ed25519 signature
+fn decode_signature(signature: &str, encoding: SealEncoding) -> Result<Signature, String> {
+    let signature_bytes = match encoding {
+        SealEncoding::Base58 => bs58::decode(signature)
+            .into_vec()
+            .map_err(|e| format!("Invalid signature Base58: {}", e))?,
+        SealEncoding::Base32 => base32_decode(signature)
+            .map_err(|e| format!("Invalid signature Base32: {}", e))?,
+    };
     
-    let signature = Signature::from_slice(&signature_bytes)
-        .map_err(|e| format!("Invalid signature: {}", e))?;
+    Signature::from_slice(&signature_bytes)
+        .map_err(|e| format!("Invalid signature: {}", e))
+}
+
+/// Encode an Ed25519 signature as a tagged seal
+fn encode_seal(signature: &Signature, mode: SealMode, encoding: SealEncoding) -> String {
+    let signature_bytes = signature.to_bytes();
+    let encoded = match encoding {
+        SealEncoding::Base58 => bs58::encode(signature_bytes).into_string(),
+        SealEncoding::Base32 => base32_encode(&signature_bytes),
+    };
+    format!("{}{}{}", mode.prefix(), encoding.prefix(), encoded)
+}
+
+/// Seal data with a decoded signing key in the given mode and encoding
+/// Returns the encoded signature, prefixed with the tags of any non-default mode or encoding
+pub fn seal(signing_key: &SigningKey, data: &[u8], mode: SealMode, encoding: SealEncoding) -> String {
+    encode_seal(&signing_key.sign(&signed_message(data, mode)), mode, encoding)
+}
+
+/// Whether an existing seal was written in the given mode and encoding
+pub fn seal_matches(seal: &str, mode: SealMode, encoding: SealEncoding) -> bool {
+    let (seal_mode, seal_encoding, _) = split_seal(seal);
+    seal_mode == mode && seal_encoding == encoding
+}
+
+/// Re-encode an existing seal in another encoding without signing again
+pub fn reencode_seal(seal: &str, encoding: SealEncoding) -> Result<String, String> {
+    let (mode, current_encoding, signature) = split_seal(seal);
+    let signature = decode_signature(signature, current_encoding)?;
+    Ok(encode_seal(&signature, mode, encoding))
+}
+
+/// Seal many items with a single decoded signing key in the given mode and encoding
+/// The items are hashed and signed in parallel across all cores
+/// Returns the seals in the same order as the input
+pub fn seal_many(signing_key: &SigningKey, data: &[&[u8]], mode: SealMode, encoding: SealEncoding) -> Vec<String> {
+    data.par_iter()
+        .map(|item| seal(signing_key, item, mode, encoding))
+        .collect()
+}
+
+/// Verify a seal (in any mode and encoding) with a decoded verifying key
+/// Returns true if the signature is valid
+pub fn verify(verifying_key: &VerifyingKey, data: &[u8], seal: &str) -> Result<bool, String> {
+    let (mode, encoding, signature) = split_seal(seal);
+    let signature = decode_signature(signature, encoding)?;
     
-    match verifying_key.verify(data.as_bytes(), &signature) {
+    match verifying_key.verify(&signed_message(data, mode), &signature) {
         Ok(_) => Ok(true),
         Err(_) => Ok(false),
     }
 }
+
+/// Verify one chunk of (data, signature) pairs with a single batch equation
+/// Falls back to per-item verification only when the batch fails, so the
+/// tampered items can still be identified
+fn verify_chunk(chunk: &[(Cow<[u8]>, Option<Signature>)], verifying_key: &VerifyingKey) -> Vec<bool> {
+    let mut messages = Vec::with_capacity(chunk.len());
+    let mut signatures = Vec::with_capacity(chunk.len());
+    
+    for (data, signature) in chunk {
+        if let Some(signature) = signature {
+            messages.push(data.as_ref());
+            signatures.push(*signature);
+        }
+    }
+    
+    let verifying_keys = vec![*verifying_key; messages.len()];
+    
+    if messages.is_empty() || verify_batch(&messages, &signatures, &verifying_keys).is_ok() {
+        return chunk.iter().map(|(_, signature)| signature.is_some()).collect();
+    }
+    
+    chunk
+        .iter()
+        .map(|(data, signature)| match signature {
+            Some(signature) => verifying_key.verify(data, signature).is_ok(),
+            None => false,
+        })
+        .collect()
+}
+
+/// Verify many seals (in any mode and encoding) with a single decoded verifying key
+/// Signatures are checked in parallel batches; malformed signatures are reported as invalid
+/// Returns one boolean per item, in the same order as the input
+pub fn verify_many(verifying_key: &VerifyingKey, items: &[(&[u8], &str)]) -> Vec<bool> {
+    let entries: Vec<(Cow<[u8]>, Option<Signature>)> = items
+        .par_iter()
+        .map(|(data, seal)| {
+            let (mode, encoding, signature) = split_seal(seal);
+            (signed_message(data, mode), decode_signature(signature, encoding).ok())
+        })
+        .collect();
+    
+    let chunks: Vec<Vec<bool>> = entries
+        .par_chunks(VERIFY_BATCH_SIZE)
+        .map(|chunk| verify_chunk(chunk, verifying_key))
+        .collect();
+    
+    chunks.into_iter().flatten().collect()
+}
+
+/// Content address of a verdict: the BLAKE3 hash of the verifying key, the seal and the data
+/// Ed25519 signatures are deterministic, so the verdict for the same triple never changes
+pub fn verdict_key(verifying_key: &VerifyingKey, data: &[u8], seal: &str) -> [u8; 32] {
+    let mut hasher = blake3::Hasher::new();
+    hasher.update(VERDICT_KEY_CONTEXT);
+    hasher.update(verifying_key.as_bytes());
+    hasher.update(&(seal.len() as u64).to_le_bytes());
+    hasher.update(seal.as_bytes());
+    hasher.update(data);
+    *hasher.finalize().as_bytes()
+}
+
+/// Verdict keys of seals already found valid, shared between threads
+#[derive(Default)]
+pub struct VerdictMemo {
+    valid: RwLock<HashSet<[u8; 32]>>,
+}
+
+impl VerdictMemo {
+    pub fn len(&self) -> usize {
+        self.valid.read().unwrap_or_else(|e| e.into_inner()).len()
+    }
+
+    pub fn clear(&self) {
+        self.valid.write().unwrap_or_else(|e| e.into_inner()).clear();
+    }
+}
+
+/// Verify many seals like verify_many, verifying each distinct (data, seal) pair at most once
+/// Pairs already in the memo are valid without being verified again, and newly valid pairs are added to it
+pub fn verify_many_memoized(verifying_key: &VerifyingKey, items: &[(&[u8], &str)], memo: &VerdictMemo) -> Vec<bool> {
+    let keys: Vec<[u8; 32]> = items
+        .par_iter()
+        .map(|(data, seal)| verdict_key(verifying_key, data, seal))
+        .collect();
+
+    // Each item is either known valid (None) or refers to the pending pair that decides it
+    let mut unique: HashMap<[u8; 32], usize> = HashMap::new();
+    let mut pending: Vec<(&[u8], &str)> = Vec::new();
+    let slots: Vec<Option<usize>> = {
+        let valid = memo.valid.read().unwrap_or_else(|e| e.into_inner());
+        items
+            .iter()
+            .zip(&keys)
+            .map(|(item, key)| {
+                if valid.contains(key) {
+                    return None;
+                }
+                Some(*unique.entry(*key).or_insert_with(|| {
+                    pending.push(*item);
+                    pending.len() - 1
+                }))
+            })
+            .collect()
+    };
+
+    let verdicts = verify_many(verifying_key, &pending);
+
+    let mut valid = memo.valid.write().unwrap_or_else(|e| e.into_inner());
+    for (key, index) in &unique {
+        if verdicts[*index] {
+            valid.insert(*key);
+        }
+    }
+
+    slots.iter().map(|slot| slot.map_or(true, |index| verdicts[index])).collect()
+}
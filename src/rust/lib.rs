@@ -1,8 +1,201 @@
 //! Defines the _pysealer module which contains all of the Rust code that can be imported into Python.
 
+use std::path::PathBuf;
+
+use pyo3::buffer::PyBuffer;
 use pyo3::prelude::*;
+use pyo3::pybacked::{PyBackedBytes, PyBackedStr};
 
 mod crypto;
+mod seal;
+
+/// Data to sign or verify: a str, bytes, or any object exposing a contiguous byte buffer (e.g. memoryview)
+/// The data is borrowed from the Python object without copying, so it can be read with the GIL released
+#[derive(FromPyObject)]
+enum Message {
+    Text(PyBackedStr),
+    Bytes(PyBackedBytes),
+    Buffer(PyBuffer<u8>),
+}
+
+impl Message {
+    /// Borrow the raw bytes of the message
+    fn as_bytes(&self) -> PyResult<&[u8]> {
+        match self {
+            Message::Text(text) => Ok(text.as_bytes()),
+            Message::Bytes(bytes) => Ok(&bytes[..]),
+            Message::Buffer(buffer) => {
+                if !buffer.is_c_contiguous() {
+                    return Err(PyErr::new::<pyo3::exceptions::PyValueError, _>("Buffer must be C-contiguous"));
+                }
+                if buffer.len_bytes() == 0 {
+                    return Ok(&[]);
+                }
+                // The exported buffer keeps the memory alive (and prevents resizing) until it is released on drop
+                Ok(unsafe { std::slice::from_raw_parts(buffer.buf_ptr() as *const u8, buffer.len_bytes()) })
+            }
+        }
+    }
+}
+
+/// Ed25519 signing key decoded once from its hex string
+/// Reuse one handle for every signature instead of passing the key string on each call
+#[pyclass(name = "SigningKey", module = "pysealer", frozen)]
+struct PySigningKey {
+    key: ed25519_dalek::SigningKey,
+}
+
+#[pymethods]
+impl PySigningKey {
+    #[new]
+    fn new(private_key_hex: &str) -> PyResult<Self> {
+        crypto::decode_signing_key(private_key_hex)
+            .map(|key| PySigningKey { key })
+            .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e))
+    }
+
+    /// Sign data (str or bytes-like) with this key, releasing the GIL while signing
+    /// mode is "plain" (sign the data) or "blake3" (sign the BLAKE3 digest of the data)
+    /// encoding is "base32" or "base58" (the original encoding)
+    /// Returns the signature as a hex string
+    #[pyo3(signature = (data, mode = "plain", encoding = "base32"))]
+    fn sign(&self, py: Python<'_>, data: Message, mode: &str, encoding: &str) -> PyResult<String> {
+        let (mode, encoding) = (seal_mode(mode)?, seal_encoding(encoding)?);
+        let data = data.as_bytes()?;
+        Ok(py.allow_threads(|| crypto::seal(&self.key, data, mode, encoding)))
+    }
+
+    /// Sign many items with this key, releasing the GIL while they are signed in parallel
+    /// Returns the signatures as hex strings, in input order
+    #[pyo3(signature = (data, mode = "plain", encoding = "base32"))]
+    fn sign_many(&self, py: Python<'_>, data: Vec<Message>, mode: &str, encoding: &str) -> PyResult<Vec<String>> {
+        let (mode, encoding) = (seal_mode(mode)?, seal_encoding(encoding)?);
+        let data = data.iter().map(Message::as_bytes).collect::<PyResult<Vec<&[u8]>>>()?;
+        Ok(py.allow_threads(|| crypto::seal_many(&self.key, &data, mode, encoding)))
+    }
+
+    /// Return the public key handle matching this signing key
+    fn verifying_key(&self) -> PyVerifyingKey {
+        PyVerifyingKey { key: self.key.verifying_key() }
+    }
+
+    fn __repr__(&self) -> String {
+        format!("SigningKey(public_key='{}')", crypto::encode_verifying_key(&self.key.verifying_key()))
+    }
+}
+
+/// Ed25519 verifying key decoded (and its curve point decompressed) once from its hex string
+/// Reuse one handle for every verification instead of passing the key string on each call
+#[pyclass(name = "VerifyingKey", module = "pysealer", frozen)]
+struct PyVerifyingKey {
+    key: ed25519_dalek::VerifyingKey,
+}
+
+#[pymethods]
+impl PyVerifyingKey {
+    #[new]
+    fn new(public_key_hex: &str) -> PyResult<Self> {
+        crypto::decode_verifying_key(public_key_hex)
+            .map(|key| PyVerifyingKey { key })
+            .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e))
+    }
+
+    /// Verify a signature over data (str or bytes-like) with this key, releasing the GIL while verifying
+    /// Returns true if the signature is valid
+    fn verify(&self, py: Python<'_>, data: Message, signature_hex: &str) -> PyResult<bool> {
+        let data = data.as_bytes()?;
+        py.allow_threads(|| crypto::verify(&self.key, data, signature_hex))
+            .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e))
+    }
+
+    /// Verify many (data, signature_hex) pairs with this key, releasing the GIL while they are checked in batches
+    /// With a VerdictMemo, pairs already found valid are not verified again
+    /// Returns one boolean per pair, in input order
+    #[pyo3(signature = (items, memo = None))]
+    fn verify_many(&self, py: Python<'_>, items: Vec<(Message, String)>, memo: Option<&Bound<'_, PyVerdictMemo>>) -> PyResult<Vec<bool>> {
+        let items = message_pairs(&items)?;
+        let memo = memo.map(|memo| &memo.get().memo);
+        Ok(py.allow_threads(|| match memo {
+            Some(memo) => crypto::verify_many_memoized(&self.key, &items, memo),
+            None => crypto::verify_many(&self.key, &items),
+        }))
+    }
+
+    fn __str__(&self) -> String {
+        crypto::encode_verifying_key(&self.key)
+    }
+
+    fn __repr__(&self) -> String {
+        format!("VerifyingKey('{}')", crypto::encode_verifying_key(&self.key))
+    }
+}
+
+/// Memo of seals already found valid, keyed by a BLAKE3 hash of (verifying key, seal, source)
+/// Share one memo between verifications so identical functions and classes are only verified once
+#[pyclass(name = "VerdictMemo", module = "pysealer", frozen)]
+#[derive(Default)]
+struct PyVerdictMemo {
+    memo: crypto::VerdictMemo,
+}
+
+#[pymethods]
+impl PyVerdictMemo {
+    #[new]
+    fn new() -> Self {
+        PyVerdictMemo::default()
+    }
+
+    /// Forget every remembered verdict
+    fn clear(&self) {
+        self.memo.clear();
+    }
+
+    fn __len__(&self) -> usize {
+        self.memo.len()
+    }
+
+    fn __repr__(&self) -> String {
+        format!("VerdictMemo(len={})", self.memo.len())
+    }
+}
+
+/// Parse a seal mode name, reporting unknown modes as ValueError
+fn seal_mode(mode: &str) -> PyResult<crypto::SealMode> {
+    crypto::SealMode::parse(mode).map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e))
+}
+
+/// Parse a seal encoding name, reporting unknown encodings as ValueError
+fn seal_encoding(encoding: &str) -> PyResult<crypto::SealEncoding> {
+    crypto::SealEncoding::parse(encoding).map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e))
+}
+
+/// Borrow the bytes of (data, signature_hex) pairs
+fn message_pairs(items: &[(Message, String)]) -> PyResult<Vec<(&[u8], &str)>> {
+    items
+        .iter()
+        .map(|(data, signature)| Ok((data.as_bytes()?, signature.as_str())))
+        .collect()
+}
+
+/// Resolve a private key given either as a hex string or as a SigningKey handle
+fn signing_key_from(private_key: &Bound<'_, PyAny>) -> PyResult<ed25519_dalek::SigningKey> {
+    if let Ok(handle) = private_key.downcast::<PySigningKey>() {
+        return Ok(handle.get().key.clone());
+    }
+    let private_key_hex: PyBackedStr = private_key.extract()?;
+    crypto::decode_signing_key(&private_key_hex)
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e))
+}
+
+/// Resolve a public key given either as a hex string or as a VerifyingKey handle
+fn verifying_key_from(public_key: &Bound<'_, PyAny>) -> PyResult<ed25519_dalek::VerifyingKey> {
+    if let Ok(handle) = public_key.downcast::<PyVerifyingKey>() {
+        return Ok(handle.get().key);
+    }
+    let public_key_hex: PyBackedStr = public_key.extract()?;
+    crypto::decode_verifying_key(&public_key_hex)
+        .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e))
+}
 
 /// Generate a new Ed25519 key pair
 /// Returns (private_key_hex, public_key_hex)
@@ -11,27 +204,151 @@ fn generate_keypair() -> (String, String) {
     crypto::generate_keypair()
 }
 
-/// Sign data using Ed25519 with a private key
+/// Sign data (str or bytes-like) using Ed25519 with a private key (hex string or SigningKey)
+/// mode is "plain" (sign the data) or "blake3" (sign the BLAKE3 digest of the data)
+/// encoding is "base32" or "base58" (the original encoding)
+/// The GIL is released while signing
 /// Returns the signature as a hex string
 #[pyfunction]
-fn generate_signature(data: &str, private_key_hex: &str) -> PyResult<String> {
-    crypto::generate_signature(data, private_key_hex)
+#[pyo3(signature = (data, private_key_hex, mode = "plain", encoding = "base32"))]
+fn generate_signature(py: Python<'_>, data: Message, private_key_hex: &Bound<'_, PyAny>, mode: &str, encoding: &str) -> PyResult<String> {
+    let (mode, encoding) = (seal_mode(mode)?, seal_encoding(encoding)?);
+    let signing_key = signing_key_from(private_key_hex)?;
+    let data = data.as_bytes()?;
+    Ok(py.allow_threads(|| crypto::seal(&signing_key, data, mode, encoding)))
+}
+
+/// Sign many items using Ed25519 with a private key (hex string or SigningKey)
+/// The GIL is released while the items are signed in parallel
+/// Returns the signatures as hex strings, in input order
+#[pyfunction]
+#[pyo3(signature = (data, private_key_hex, mode = "plain", encoding = "base32"))]
+fn generate_signatures(py: Python<'_>, data: Vec<Message>, private_key_hex: &Bound<'_, PyAny>, mode: &str, encoding: &str) -> PyResult<Vec<String>> {
+    let (mode, encoding) = (seal_mode(mode)?, seal_encoding(encoding)?);
+    let signing_key = signing_key_from(private_key_hex)?;
+    let data = data.iter().map(Message::as_bytes).collect::<PyResult<Vec<&[u8]>>>()?;
+    Ok(py.allow_threads(|| crypto::seal_many(&signing_key, &data, mode, encoding)))
+}
+
+/// Re-encode an existing seal (the text after "@pysealer._") in another encoding without signing again
+/// The seal mode is kept; raises ValueError if the seal is malformed
+#[pyfunction]
+#[pyo3(signature = (seal, encoding = "base32"))]
+fn reencode_seal(seal: &str, encoding: &str) -> PyResult<String> {
+    crypto::reencode_seal(seal, seal_encoding(encoding)?)
         .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e))
 }
 
-/// Verify an Ed25519 signature
+/// Compute the Merkle root over the BLAKE3 digests of the sources of a file's functions and classes
+/// Sign its bytes (bytes.fromhex) to create the file's root seal
+/// Returns the root as a hex string
+#[pyfunction]
+fn merkle_root(py: Python<'_>, data: Vec<Message>) -> PyResult<String> {
+    let data = data.iter().map(Message::as_bytes).collect::<PyResult<Vec<&[u8]>>>()?;
+    Ok(py.allow_threads(|| {
+        let leaves: Vec<blake3::Hash> = data.iter().map(|item| crypto::digest(item)).collect();
+        crypto::merkle_root(&leaves).to_hex().to_string()
+    }))
+}
+
+/// Compute the BLAKE3 digest of data (str or bytes-like), releasing the GIL while hashing
+/// This is the value "blake3" mode signatures cover, so it can be cached and compared without a signature operation
+/// Returns the digest as a hex string
+#[pyfunction]
+fn digest(py: Python<'_>, data: Message) -> PyResult<String> {
+    let data = data.as_bytes()?;
+    Ok(py.allow_threads(|| crypto::digest(data).to_hex().to_string()))
+}
+
+/// Verify an Ed25519 signature over data (str or bytes-like) with a public key (hex string or VerifyingKey)
+/// The GIL is released while verifying
 /// Returns true if the signature is valid
 #[pyfunction]
-fn verify_signature(data: &str, signature_hex: &str, public_key_hex: &str) -> PyResult<bool> {
-    crypto::verify_signature(data, signature_hex, public_key_hex)
+fn verify_signature(py: Python<'_>, data: Message, signature_hex: &str, public_key_hex: &Bound<'_, PyAny>) -> PyResult<bool> {
+    let verifying_key = verifying_key_from(public_key_hex)?;
+    let data = data.as_bytes()?;
+    py.allow_threads(|| crypto::verify(&verifying_key, data, signature_hex))
         .map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e))
 }
 
+/// Verify many Ed25519 signatures against one public key (hex string or VerifyingKey)
+/// Takes (data, signature_hex) pairs and releases the GIL while verifying them in batches
+/// Returns one boolean per pair, in input order
+#[pyfunction]
+fn verify_signatures(py: Python<'_>, items: Vec<(Message, String)>, public_key_hex: &Bound<'_, PyAny>) -> PyResult<Vec<bool>> {
+    let verifying_key = verifying_key_from(public_key_hex)?;
+    let items = message_pairs(&items)?;
+    Ok(py.allow_threads(|| crypto::verify_many(&verifying_key, &items)))
+}
+
+/// Convert a native sealing error into a Python exception
+/// Read failures become OSError; files the native engine cannot handle become ValueError
+fn seal_error(error: seal::SealError) -> PyErr {
+    match error {
+        seal::SealError::Io(e) => PyErr::from(e),
+        seal::SealError::Unsupported(message) => PyErr::new::<pyo3::exceptions::PyValueError, _>(message),
+    }
+}
+
+/// Sign every function and class in a Python file in one native call
+/// The file is memory mapped and parsed in Rust, and the GIL is released for the whole operation
+/// With root=True the file also gets a signed Merkle root, and seals of unchanged functions/classes are reused
+/// Returns (0-based lines of existing pysealer decorators and root markers to remove,
+///          [(0-based line to insert the decorator before, indentation, signature_hex)],
+///          root seal or None)
+#[pyfunction]
+#[pyo3(signature = (path, private_key_hex, mode = "plain", encoding = "base32", root = false))]
+fn seal_file(
+    py: Python<'_>,
+    path: PathBuf,
+    private_key_hex: &Bound<'_, PyAny>,
+    mode: &str,
+    encoding: &str,
+    root: bool,
+) -> PyResult<(Vec<usize>, Vec<(usize, usize, String)>, Option<String>)> {
+    let (mode, encoding) = (seal_mode(mode)?, seal_encoding(encoding)?);
+    let signing_key = signing_key_from(private_key_hex)?;
+    let plan = py.allow_threads(|| seal::seal_file(&path, &signing_key, mode, encoding, root)).map_err(seal_error)?;
+    Ok((plan.remove_lines, plan.insertions, plan.root))
+}
+
+/// Verify the pysealer signature of every function and class in a Python file in one native call
+/// The file is memory mapped and parsed in Rust, and the GIL is released for the whole operation
+/// A matching root seal verifies every sealed function/class at once
+/// With a VerdictMemo, signatures already found valid are not verified again
+/// With sources=False the verified sources are not copied into Python strings
+/// Returns [(name, line_start, line_end, signature_hex or None, verified source or None, valid, covered)] in ast.walk order,
+/// where covered tells that the verdict comes from the root seal rather than the symbol's own seal
+#[pyfunction]
+#[pyo3(signature = (path, public_key_hex, memo = None, sources = true))]
+fn verify_file(py: Python<'_>, path: PathBuf, public_key_hex: &Bound<'_, PyAny>, memo: Option<&Bound<'_, PyVerdictMemo>>, sources: bool) -> PyResult<Vec<(String, usize, usize, Option<String>, Option<String>, bool, bool)>> {
+    let verifying_key = verifying_key_from(public_key_hex)?;
+    let memo = memo.map(|memo| &memo.get().memo);
+    let verdicts = py.allow_threads(|| seal::verify_file(&path, &verifying_key, memo)).map_err(seal_error)?;
+    Ok(verdicts
+        .into_iter()
+        .map(|verdict| {
+            let source = if sources { verdict.source } else { None };
+            (verdict.name, verdict.line_start, verdict.line_end, verdict.signature, source, verdict.valid, verdict.covered)
+        })
+        .collect())
+}
+
 /// _pysealer pyo3 module definition
 #[pymodule]
 fn _pysealer(m: &Bound<'_, PyModule>) -> PyResult<()> {
+    m.add_class::<PySigningKey>()?;
+    m.add_class::<PyVerifyingKey>()?;
+    m.add_class::<PyVerdictMemo>()?;
     m.add_function(wrap_pyfunction!(generate_keypair, m)?)?;
     m.add_function(wrap_pyfunction!(generate_signature, m)?)?;
+    m.add_function(wrap_pyfunction!(generate_signatures, m)?)?;
     m.add_function(wrap_pyfunction!(verify_signature, m)?)?;
+    m.add_function(wrap_pyfunction!(verify_signatures, m)?)?;
+    m.add_function(wrap_pyfunction!(reencode_seal, m)?)?;
+    m.add_function(wrap_pyfunction!(digest, m)?)?;
+    m.add_function(wrap_pyfunction!(merkle_root, m)?)?;
+    m.add_function(wrap_pyfunction!(seal_file, m)?)?;
+    m.add_function(wrap_pyfunction!(verify_file, m)?)?;
     Ok(())
 }
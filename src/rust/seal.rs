@@ -0,0 +1,522 @@
+//! Native sealing and verification of every function and class in a Python file.
+
+use std::borrow::Cow;
+use std::collections::VecDeque;
+use std::fs::File;
+use std::io;
+use std::path::Path;
+
+use ed25519_dalek::{SigningKey, VerifyingKey};
+use memmap2::Mmap;
+use rustpython_parser::ast::{self, Ranged};
+use rustpython_parser::text_size::TextRange;
+use rustpython_parser::Parse;
+
+use crate::crypto;
+
+/// Start of the module-level comment line holding a file's root seal
+pub const ROOT_MARKER: &str = "# pysealer-root: ";
+
+/// Errors raised while sealing or verifying a file natively
+pub enum SealError {
+    /// The file could not be read
+    Io(io::Error),
+    /// The file cannot be handled natively (encoding or syntax the parser does not support)
+    Unsupported(String),
+}
+
+impl From<io::Error> for SealError {
+    fn from(error: io::Error) -> Self {
+        SealError::Io(error)
+    }
+}
+
+/// Contents of a Python file, memory mapped unless its line endings had to be normalised
+enum SourceBuffer {
+    Mapped(Mmap),
+    Owned(Vec<u8>),
+}
+
+impl SourceBuffer {
+    /// Read a file the way Python's text mode does, translating \r\n and \r to \n
+    fn open(path: &Path) -> Result<SourceBuffer, SealError> {
+        let file = File::open(path)?;
+        if file.metadata()?.len() == 0 {
+            return Ok(SourceBuffer::Owned(Vec::new()));
+        }
+
+        // Safety: the map is only read, and only for the duration of a single call
+        let mapped = unsafe { Mmap::map(&file)? };
+        if mapped.contains(&b'\r') {
+            return Ok(SourceBuffer::Owned(normalize_newlines(&mapped)));
+        }
+        Ok(SourceBuffer::Mapped(mapped))
+    }
+
+    /// Return the contents as UTF-8 text
+    fn text(&self) -> Result<&str, SealError> {
+        let bytes = match self {
+            SourceBuffer::Mapped(mapped) => &mapped[..],
+            SourceBuffer::Owned(owned) => &owned[..],
+        };
+        if bytes.starts_with(b"\xef\xbb\xbf") {
+            return Err(SealError::Unsupported("File starts with a byte order mark".to_string()));
+        }
+        std::str::from_utf8(bytes).map_err(|e| SealError::Unsupported(format!("File is not valid UTF-8: {}", e)))
+    }
+}
+
+/// Translate \r\n and lone \r line endings to \n
+fn normalize_newlines(bytes: &[u8]) -> Vec<u8> {
+    let mut normalized = Vec::with_capacity(bytes.len());
+    let mut index = 0;
+    while index < bytes.len() {
+        if bytes[index] == b'\r' {
+            normalized.push(b'\n');
+            if bytes.get(index + 1) == Some(&b'\n') {
+                index += 1;
+            }
+        } else {
+            normalized.push(bytes[index]);
+        }
+        index += 1;
+    }
+    normalized
+}
+
+/// A function or class definition found in a file
+struct Symbol {
+    /// Function or class name
+    name: String,
+    /// Whether this is a function defined directly in a class body (a method)
+    is_method: bool,
+    /// 0-based index of the def/class line
+    line_start: usize,
+    /// 0-based index of the last line of the definition
+    line_end: usize,
+    /// Indentation of the def/class keyword in bytes
+    col_offset: usize,
+    /// 0-based line where a new pysealer decorator is inserted
+    insert_line: usize,
+    /// 0-based lines holding existing pysealer decorators
+    sealer_lines: Vec<usize>,
+    /// Signature found in an @pysealer._<signature>() decorator
+    signature: Option<String>,
+}
+
+/// A node visited while walking the AST in the same breadth-first order as Python's ast.walk
+enum Node<'s> {
+    Stmt(&'s ast::Stmt, bool),
+    Handler(&'s ast::ExceptHandler),
+    Case(&'s ast::MatchCase),
+}
+
+/// Line-indexed view of a Python source file
+struct SourceText<'a> {
+    text: &'a str,
+    /// Byte offset at which each line starts
+    line_starts: Vec<usize>,
+    /// Whether each line is a pysealer decorator line (the lines left out of signed segments)
+    sealer_lines: Vec<bool>,
+}
+
+impl<'a> SourceText<'a> {
+    fn new(text: &'a str) -> Self {
+        let mut line_starts = vec![0];
+        line_starts.extend(text.bytes().enumerate().filter(|(_, byte)| *byte == b'\n').map(|(index, _)| index + 1));
+
+        let mut source = SourceText { text, line_starts, sealer_lines: Vec::new() };
+        source.sealer_lines = (0..source.line_starts.len())
+            .map(|index| source.line(index).trim_start().starts_with("@pysealer"))
+            .collect();
+        source
+    }
+
+    /// Byte offset just past the end of a line, excluding its newline
+    fn line_end_offset(&self, index: usize) -> usize {
+        match self.line_starts.get(index + 1) {
+            Some(next) => next - 1,
+            None => self.text.len(),
+        }
+    }
+
+    /// Text of a line without its newline
+    fn line(&self, index: usize) -> &'a str {
+        &self.text[self.line_starts[index]..self.line_end_offset(index)]
+    }
+
+    /// 0-based index of the line containing a byte offset
+    fn line_index(&self, offset: usize) -> usize {
+        self.line_starts.partition_point(|start| *start <= offset) - 1
+    }
+
+    /// 0-based line holding the root seal marker (at most one), and its seal
+    /// Only the line the marker is written to counts: right below the first line importing
+    /// pysealer, or the first line of a file without one; marker-like lines in strings do not
+    fn root_markers(&self) -> (Vec<usize>, Option<&'a str>) {
+        let count = self.line_starts.len();
+        let marker_line = (0..count)
+            .find(|index| {
+                let line = self.line(*index);
+                line.starts_with("import pysealer") || line.starts_with("from pysealer")
+            })
+            .map_or(0, |index| index + 1);
+        if marker_line < count && self.line(marker_line).starts_with(ROOT_MARKER) {
+            let seal = self.line(marker_line)[ROOT_MARKER.len()..].trim_end();
+            (vec![marker_line], Some(seal))
+        } else {
+            (Vec::new(), None)
+        }
+    }
+
+    /// Source of lines [start, end] joined with \n, leaving out pysealer decorator lines
+    /// Borrowed straight from the file when no line has to be left out
+    fn segment(&self, start: usize, end: usize) -> Cow<'a, str> {
+        if !self.sealer_lines[start..=end].iter().any(|is_sealer| *is_sealer) {
+            return Cow::Borrowed(&self.text[self.line_starts[start]..self.line_end_offset(end)]);
+        }
+
+        let kept: Vec<&str> = (start..=end)
+            .filter(|index| !self.sealer_lines[*index])
+            .map(|index| self.line(index))
+            .collect();
+        Cow::Owned(kept.join("\n"))
+    }
+
+    /// Find the def/class keyword line of a definition
+    fn definition_line(&self, range_start: usize, decorators: &[ast::Expr]) -> usize {
+        let mut index = match decorators.last() {
+            Some(decorator) => self.line_index(usize::from(decorator.range().end())) + 1,
+            None => return self.line_index(range_start),
+        };
+        while index < self.line_starts.len() {
+            let line = self.line(index).trim_start();
+            if line.starts_with("def") || line.starts_with("async") || line.starts_with("class") {
+                return index;
+            }
+            index += 1;
+        }
+        self.line_index(range_start)
+    }
+
+    /// Build the symbol for a function or class definition
+    fn symbol(&self, name: &str, is_method: bool, range: (usize, usize), decorators: &[ast::Expr]) -> Symbol {
+        let (range_start, range_end) = range;
+        let line_start = self.definition_line(range_start, decorators);
+
+        // The last line is the one holding the final non-whitespace character of the definition
+        let mut end = range_end.min(self.text.len());
+        while end > 0 && self.text.as_bytes()[end - 1].is_ascii_whitespace() {
+            end -= 1;
+        }
+        let line_end = self.line_index(end.saturating_sub(1)).max(line_start);
+
+        let line = self.line(line_start);
+        let col_offset = line.len() - line.trim_start().len();
+
+        let mut sealer_lines = Vec::new();
+        let mut insert_line = None;
+        let mut signature = None;
+        for decorator in decorators {
+            let decorator_line = self.line_index(usize::from(decorator.range().start()));
+            if is_pysealer_decorator(decorator) {
+                sealer_lines.push(decorator_line);
+                if signature.is_none() {
+                    signature = seal_signature(decorator).map(str::to_string);
+                }
+            } else if insert_line.is_none() {
+                insert_line = Some(decorator_line);
+            }
+        }
+
+        Symbol {
+            name: name.to_string(),
+            is_method,
+            line_start,
+            line_end,
+            col_offset,
+            insert_line: insert_line.unwrap_or(line_start),
+            sealer_lines,
+            signature,
+        }
+    }
+
+    /// Parse the file and collect every function and class definition in ast.walk order
+    fn symbols(&self, path: &Path) -> Result<Vec<Symbol>, SealError> {
+        let suite = ast::Suite::parse(self.text, &path.to_string_lossy())
+            .map_err(|e| SealError::Unsupported(format!("Failed to parse: {}", e)))?;
+
+        let mut symbols = Vec::new();
+        let mut queue: VecDeque<Node> = suite.iter().map(|stmt| Node::Stmt(stmt, false)).collect();
+
+        while let Some(node) = queue.pop_front() {
+            let stmt = match node {
+                Node::Stmt(stmt, in_class_body) => (stmt, in_class_body),
+                Node::Handler(ast::ExceptHandler::ExceptHandler(handler)) => {
+                    queue.extend(handler.body.iter().map(|child| Node::Stmt(child, false)));
+                    continue;
+                }
+                Node::Case(case) => {
+                    queue.extend(case.body.iter().map(|child| Node::Stmt(child, false)));
+                    continue;
+                }
+            };
+
+            match stmt {
+                (ast::Stmt::FunctionDef(function), in_class_body) => {
+                    symbols.push(self.symbol(function.name.as_str(), in_class_body, offsets(function.range), &function.decorator_list));
+                    queue.extend(function.body.iter().map(|child| Node::Stmt(child, false)));
+                }
+                (ast::Stmt::AsyncFunctionDef(function), in_class_body) => {
+                    symbols.push(self.symbol(function.name.as_str(), in_class_body, offsets(function.range), &function.decorator_list));
+                    queue.extend(function.body.iter().map(|child| Node::Stmt(child, false)));
+                }
+                (ast::Stmt::ClassDef(class), _) => {
+                    symbols.push(self.symbol(class.name.as_str(), false, offsets(class.range), &class.decorator_list));
+                    queue.extend(class.body.iter().map(|child| Node::Stmt(child, true)));
+                }
+                (ast::Stmt::If(ast::StmtIf { body, orelse, .. }), _)
+                | (ast::Stmt::For(ast::StmtFor { body, orelse, .. }), _)
+                | (ast::Stmt::AsyncFor(ast::StmtAsyncFor { body, orelse, .. }), _)
+                | (ast::Stmt::While(ast::StmtWhile { body, orelse, .. }), _) => {
+                    queue.extend(body.iter().chain(orelse.iter()).map(|child| Node::Stmt(child, false)));
+                }
+                (ast::Stmt::With(ast::StmtWith { body, .. }), _)
+                | (ast::Stmt::AsyncWith(ast::StmtAsyncWith { body, .. }), _) => {
+                    queue.extend(body.iter().map(|child| Node::Stmt(child, false)));
+                }
+                (ast::Stmt::Try(ast::StmtTry { body, handlers, orelse, finalbody, .. }), _)
+                | (ast::Stmt::TryStar(ast::StmtTryStar { body, handlers, orelse, finalbody, .. }), _) => {
+                    queue.extend(body.iter().map(|child| Node::Stmt(child, false)));
+                    queue.extend(handlers.iter().map(Node::Handler));
+                    queue.extend(orelse.iter().chain(finalbody.iter()).map(|child| Node::Stmt(child, false)));
+                }
+                (ast::Stmt::Match(ast::StmtMatch { cases, .. }), _) => {
+                    queue.extend(cases.iter().map(Node::Case));
+                }
+                _ => {}
+            }
+        }
+
+        Ok(symbols)
+    }
+}
+
+/// Byte offsets at which an AST node starts and ends
+fn offsets(range: TextRange) -> (usize, usize) {
+    (usize::from(range.start()), usize::from(range.end()))
+}
+
+/// Whether an expression is the bare name `pysealer`
+fn is_pysealer_name(expr: &ast::Expr) -> bool {
+    matches!(expr, ast::Expr::Name(name) if name.id.as_str() == "pysealer")
+}
+
+/// Whether a decorator is any pysealer decorator (@pysealer..., @pysealer.x, @pysealer.x(...))
+fn is_pysealer_decorator(decorator: &ast::Expr) -> bool {
+    match decorator {
+        ast::Expr::Name(name) => name.id.as_str().starts_with("pysealer"),
+        ast::Expr::Attribute(attribute) => is_pysealer_name(&attribute.value),
+        ast::Expr::Call(call) => match call.func.as_ref() {
+            ast::Expr::Attribute(attribute) => is_pysealer_name(&attribute.value),
+            ast::Expr::Name(name) => name.id.as_str().starts_with("pysealer"),
+            _ => false,
+        },
+        _ => false,
+    }
+}
+
+/// Extract the signature from an @pysealer._<signature>() decorator
+fn seal_signature(decorator: &ast::Expr) -> Option<&str> {
+    if let ast::Expr::Call(call) = decorator {
+        if let ast::Expr::Attribute(attribute) = call.func.as_ref() {
+            if is_pysealer_name(&attribute.value) {
+                return attribute.attr.as_str().strip_prefix('_');
+            }
+        }
+    }
+    None
+}
+
+/// Changes needed to seal a file
+pub struct SealPlan {
+    /// 0-based lines of existing pysealer decorators (and root markers) to remove
+    pub remove_lines: Vec<usize>,
+    /// (0-based line to insert before, indentation, signature) for every sealed function/class
+    pub insertions: Vec<(usize, usize, String)>,
+    /// Signed Merkle root over every sealed function/class, when a file-level seal was requested
+    pub root: Option<String>,
+}
+
+/// BLAKE3 Merkle root over the segments of a file's sealed functions and classes
+fn segments_root(segments: &[Cow<str>]) -> blake3::Hash {
+    let leaves: Vec<blake3::Hash> = segments.iter().map(|segment| crypto::digest(segment.as_bytes())).collect();
+    crypto::merkle_root(&leaves)
+}
+
+/// Whether a root seal is a valid signature over a Merkle root
+fn root_is_valid(verifying_key: &VerifyingKey, root: &blake3::Hash, seal: Option<&str>) -> bool {
+    seal.is_some_and(|seal| crypto::verify(verifying_key, root.as_bytes(), seal).unwrap_or(false))
+}
+
+/// Sign every top-level function (and function not defined directly in a class) and every class in a file
+/// Existing pysealer decorator lines are left out of the signed source, exactly as in add_decorators.py
+///
+/// With with_root, the file also gets a signed Merkle root over its functions and classes, and
+/// existing seals are reused instead of signed again: all of them when the stored root still
+/// matches, otherwise those that one batch verification shows to be unchanged
+pub fn seal_file(
+    path: &Path,
+    signing_key: &SigningKey,
+    mode: crypto::SealMode,
+    encoding: crypto::SealEncoding,
+    with_root: bool,
+) -> Result<SealPlan, SealError> {
+    let buffer = SourceBuffer::open(path)?;
+    let source = SourceText::new(buffer.text()?);
+    let symbols = source.symbols(path)?;
+    let (marker_lines, stored_root) = source.root_markers();
+
+    let mut remove_lines: Vec<usize> = symbols.iter().flat_map(|symbol| symbol.sealer_lines.iter().copied()).collect();
+    remove_lines.extend(marker_lines);
+    remove_lines.sort_unstable();
+    remove_lines.dedup();
+
+    let targets: Vec<&Symbol> = symbols.iter().filter(|symbol| !symbol.is_method).collect();
+    let segments: Vec<Cow<str>> = targets
+        .iter()
+        .map(|symbol| source.segment(symbol.line_start, symbol.line_end))
+        .collect();
+
+    // Existing seals that can be kept as they are
+    let mut reused: Vec<Option<String>> = vec![None; targets.len()];
+    let mut root = None;
+    if with_root {
+        let merkle_root = segments_root(&segments);
+        let verifying_key = signing_key.verifying_key();
+        let reusable = |symbol: &Symbol| {
+            symbol.signature.as_deref().is_some_and(|seal| crypto::seal_matches(seal, mode, encoding))
+        };
+
+        if root_is_valid(&verifying_key, &merkle_root, stored_root) {
+            for (slot, symbol) in reused.iter_mut().zip(&targets) {
+                if reusable(symbol) {
+                    *slot = symbol.signature.clone();
+                }
+            }
+        } else {
+            let candidates: Vec<usize> = (0..targets.len()).filter(|index| reusable(targets[*index])).collect();
+            let items: Vec<(&[u8], &str)> = candidates
+                .iter()
+                .map(|index| (segments[*index].as_bytes(), targets[*index].signature.as_deref().unwrap_or_default()))
+                .collect();
+            for (index, valid) in candidates.into_iter().zip(crypto::verify_many(&verifying_key, &items)) {
+                if valid {
+                    reused[index] = targets[index].signature.clone();
+                }
+            }
+        }
+
+        root = Some(match stored_root {
+            Some(seal) if crypto::seal_matches(seal, crypto::SealMode::Plain, encoding)
+                && root_is_valid(&verifying_key, &merkle_root, Some(seal)) => seal.to_string(),
+            _ => crypto::seal(signing_key, merkle_root.as_bytes(), crypto::SealMode::Plain, encoding),
+        });
+    }
+
+    // Sign only the functions and classes without a reusable seal
+    let stale: Vec<usize> = (0..targets.len()).filter(|index| reused[*index].is_none()).collect();
+    let data: Vec<&[u8]> = stale.iter().map(|index| segments[*index].as_bytes()).collect();
+    for (index, signature) in stale.into_iter().zip(crypto::seal_many(signing_key, &data, mode, encoding)) {
+        reused[index] = Some(signature);
+    }
+
+    let insertions = targets
+        .iter()
+        .zip(reused)
+        .map(|(symbol, signature)| (symbol.insert_line, symbol.col_offset, signature.unwrap_or_default()))
+        .collect();
+
+    Ok(SealPlan { remove_lines, insertions, root })
+}
+
+/// Verification result for one function or class
+pub struct SymbolVerdict {
+    pub name: String,
+    /// 1-based first and last line of the definition
+    pub line_start: usize,
+    pub line_end: usize,
+    /// Signature from the pysealer decorator, if any
+    pub signature: Option<String>,
+    /// Source that was verified (decorated definitions only)
+    pub source: Option<String>,
+    pub valid: bool,
+    /// Whether the verdict comes from the file's root seal rather than the symbol's own seal
+    pub covered: bool,
+}
+
+/// Verify the pysealer signature of every function and class in a file, in ast.walk order
+/// When the file carries a root seal that still matches, its functions and classes are reported
+/// valid and covered by it after that single verification, without checking their own seals;
+/// otherwise every signature is verified to find the broken ones
+/// With a memo, signatures already found valid (in this or any other file) are not verified again
+pub fn verify_file(path: &Path, verifying_key: &VerifyingKey, memo: Option<&crypto::VerdictMemo>) -> Result<Vec<SymbolVerdict>, SealError> {
+    let buffer = SourceBuffer::open(path)?;
+    let source = SourceText::new(buffer.text()?);
+    let symbols = source.symbols(path)?;
+    let (_, stored_root) = source.root_markers();
+
+    let segments: Vec<Option<Cow<str>>> = symbols
+        .iter()
+        .map(|symbol| {
+            let needed = symbol.signature.is_some() || (stored_root.is_some() && !symbol.is_method);
+            needed.then(|| source.segment(symbol.line_start, symbol.line_end))
+        })
+        .collect();
+
+    // The root covers exactly the functions and classes that lock seals
+    let root_valid = stored_root.is_some() && {
+        let sealed: Vec<Cow<str>> = symbols
+            .iter()
+            .zip(&segments)
+            .filter(|(symbol, _)| !symbol.is_method)
+            .filter_map(|(_, segment)| segment.clone())
+            .collect();
+        root_is_valid(verifying_key, &segments_root(&sealed), stored_root)
+    };
+    let covered = |symbol: &Symbol| root_valid && !symbol.is_method;
+
+    let items: Vec<(&[u8], &str)> = symbols
+        .iter()
+        .zip(&segments)
+        .filter(|(symbol, _)| !covered(symbol))
+        .filter_map(|(symbol, segment)| Some((segment.as_ref()?.as_bytes(), symbol.signature.as_deref()?)))
+        .collect();
+    let verdicts = match memo {
+        Some(memo) => crypto::verify_many_memoized(verifying_key, &items, memo),
+        None => crypto::verify_many(verifying_key, &items),
+    };
+    let mut verdicts = verdicts.into_iter();
+
+    Ok(symbols
+        .into_iter()
+        .zip(segments)
+        .map(|(symbol, segment)| {
+            let is_covered = symbol.signature.is_some() && covered(&symbol);
+            let valid = match &symbol.signature {
+                None => false,
+                Some(_) if is_covered => true,
+                Some(_) => verdicts.next().unwrap_or(false),
+            };
+            SymbolVerdict {
+                name: symbol.name,
+                line_start: symbol.line_start + 1,
+                line_end: symbol.line_end + 1,
+                source: symbol.signature.as_ref().and(segment.map(Cow::into_owned)),
+                signature: symbol.signature,
+                valid,
+                covered: is_covered,
+            }
+        })
+        .collect())
+}
@@ -29,6 +29,20 @@ def test_check_valid_decorated_file():
         assert ("all decorators are valid" in result.stdout.lower() or
             "all decorators are valid" in result.stderr.lower()), "Check did not verify file"
 
+def test_check_valid_digest_mode_file():
+    """Test that 'pysealer check' verifies files locked with '--mode blake3'."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_path = os.path.join(tmpdir, "sample.py")
+        with open(file_path, "w") as f:
+            f.write(SAMPLE_CODE)
+        # Initialize pysealer in the temp directory
+        subprocess.run(["pysealer", "init"], cwd=tmpdir, capture_output=True, text=True, input="n\n")
+        subprocess.run(["pysealer", "lock", "--mode", "blake3", file_path], capture_output=True, text=True)
+        with open(file_path) as f:
+            assert "@pysealer._b3_" in f.read(), "Seal mode not recorded in decorator"
+        result = subprocess.run(["pysealer", "check", file_path], capture_output=True, text=True)
+        assert result.returncode == 0, f"pysealer check failed: {result.stderr}"
+
 def test_check_fails_on_tampered_file():
     """Test that 'pysealer check' fails if the decorated file is tampered with."""
     with tempfile.TemporaryDirectory() as tmpdir:
@@ -61,6 +75,84 @@ def test_check_fails_on_tampered_file():
         assert ("failed" in result.stdout.lower() or "failed" in result.stderr.lower() or
                 "invalid" in result.stdout.lower() or "invalid" in result.stderr.lower()), "Check did not report failure"
 
+def test_check_root_sealed_file_reports_tampered_symbol():
+    """Test that a file locked with '--root' verifies, and that tampering still pinpoints the broken symbol."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_path = os.path.join(tmpdir, "sample.py")
+        with open(file_path, "w") as f:
+            f.write(SAMPLE_CODE)
+        # Initialize pysealer in the temp directory
+        subprocess.run(["pysealer", "init"], cwd=tmpdir, capture_output=True, text=True, input="n\n")
+        subprocess.run(["pysealer", "lock", "--root", file_path], capture_output=True, text=True)
+        with open(file_path) as f:
+            sealed = f.read()
+        assert "# pysealer-root: " in sealed, "Root seal not added to file"
+        result = subprocess.run(["pysealer", "check", file_path], capture_output=True, text=True)
+        assert result.returncode == 0, f"pysealer check failed: {result.stderr}"
+        # Re-locking an unchanged file keeps every seal
+        subprocess.run(["pysealer", "lock", "--root", file_path], capture_output=True, text=True)
+        with open(file_path) as f:
+            assert f.read() == sealed
+        with open(file_path, "w") as f:
+            f.write(sealed.replace("return 42", "return 43"))
+        result = subprocess.run(["pysealer", "check", file_path], capture_output=True, text=True)
+        assert result.returncode != 0
+        assert "1/2 decorators failed" in result.stderr, f"Unexpected output: {result.stdout} {result.stderr}"
+
+def test_root_marker_lines_in_strings_are_left_alone():
+    """Test that lock, check and remove only treat the real root seal marker as one, not a line of a string."""
+    code = 'TEMPLATE = """\n# pysealer-root: example\n"""\n' + SAMPLE_CODE
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_path = os.path.join(tmpdir, "sample.py")
+        with open(file_path, "w") as f:
+            f.write(code)
+        # Initialize pysealer in the temp directory
+        subprocess.run(["pysealer", "init"], cwd=tmpdir, capture_output=True, text=True, input="n\n")
+        for _ in range(2):
+            subprocess.run(["pysealer", "lock", "--root", file_path], capture_output=True, text=True)
+            with open(file_path) as f:
+                sealed = f.read()
+            assert 'TEMPLATE = """\n# pysealer-root: example\n"""' in sealed, f"String content was changed: {sealed}"
+            assert sealed.count("# pysealer-root: ") == 2
+        result = subprocess.run(["pysealer", "check", file_path], capture_output=True, text=True)
+        assert result.returncode == 0, f"pysealer check failed: {result.stdout} {result.stderr}"
+        subprocess.run(["pysealer", "remove", file_path], capture_output=True, text=True)
+        with open(file_path) as f:
+            removed = f.read()
+        assert 'TEMPLATE = """\n# pysealer-root: example\n"""' in removed and removed.count("# pysealer-root: ") == 1
+
+def test_root_covered_symbols_are_reported_alike_by_both_engines(monkeypatch):
+    """Test that the native engine and the Python fallback both report root-covered symbols as such, garbled seal or not."""
+    from pysealer.check_decorators import ROOT_COVERED_MESSAGE, check_decorators, check_source
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_path = os.path.join(tmpdir, "sample.py")
+        with open(file_path, "w") as f:
+            f.write(SAMPLE_CODE)
+        # Initialize pysealer in the temp directory
+        subprocess.run(["pysealer", "init"], cwd=tmpdir, capture_output=True, text=True, input="n\n")
+        subprocess.run(["pysealer", "lock", "--root", file_path], capture_output=True, text=True)
+        monkeypatch.chdir(tmpdir)
+        with open(file_path) as f:
+            sealed = f.read()
+        # Garble the seal of foo: the root covers the code, not the seals
+        garbled = sealed.replace("@pysealer._", "@pysealer._x", 1)
+        with open(file_path, "w") as f:
+            f.write(garbled)
+        
+        native, fallback = check_decorators(file_path), check_source(file_path, garbled)
+        for results in (native, fallback):
+            assert results["foo"]["valid"] and results["foo"]["message"] == ROOT_COVERED_MESSAGE
+        assert {name: (result["valid"], result["message"]) for name, result in native.items()} == \
+            {name: (result["valid"], result["message"]) for name, result in fallback.items()}
+        
+        tampered = garbled.replace("return 42", "return 43")
+        with open(file_path, "w") as f:
+            f.write(tampered)
+        native, fallback = check_decorators(file_path), check_source(file_path, tampered)
+        for results in (native, fallback):
+            assert not results["foo"]["valid"] and results["Bar"]["valid"]
+            assert results["Bar"]["message"] != ROOT_COVERED_MESSAGE
+
 def test_check_on_undecorated_file():
     """Test that 'pysealer check' handles undecorated files gracefully (should not crash)."""
     with tempfile.TemporaryDirectory() as tmpdir:
@@ -77,3 +169,383 @@ def test_check_on_undecorated_file():
             "no pysealer decorators found" in result.stdout.lower() or "no pysealer decorators found" in result.stderr.lower()
         )
         assert undecorated_detected, f"Check did not report undecorated file, got: {result.stdout} {result.stderr}"
+
+def test_check_folder_reports_only_tampered_file():
+    """Test that 'pysealer check' on a folder pinpoints the tampered file among valid ones."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        clean_path = os.path.join(tmpdir, "clean.py")
+        tampered_path = os.path.join(tmpdir, "tampered.py")
+        for path in (clean_path, tampered_path):
+            with open(path, "w") as f:
+                f.write(SAMPLE_CODE)
+        # Initialize pysealer in the temp directory
+        subprocess.run(["pysealer", "init"], cwd=tmpdir, capture_output=True, text=True, input="n\n")
+        subprocess.run(["pysealer", "lock", tmpdir], capture_output=True, text=True)
+        with open(tampered_path, "r") as f:
+            content = f.read()
+        with open(tampered_path, "w") as f:
+            f.write(content.replace("return 42", "return 43"))
+        result = subprocess.run(["pysealer", "check", tmpdir], capture_output=True, text=True)
+        assert result.returncode != 0, f"pysealer check should fail on tampered folder, got: {result.stdout}"
+        assert "1 decorator failed in 1 file" in (result.stdout + result.stderr), f"Unexpected summary: {result.stdout} {result.stderr}"
+
+def test_check_folder_in_parallel_keeps_stable_order():
+    """Test that 'pysealer check --jobs' reports files in path order whatever their size."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = [os.path.join(tmpdir, f"module_{index}.py") for index in range(4)]
+        for index, path in enumerate(paths):
+            with open(path, "w") as f:
+                # Give the files different sizes so the largest-first schedule differs from path order
+                f.write(SAMPLE_CODE * (index + 1) if index % 2 else SAMPLE_CODE)
+        # Initialize pysealer in the temp directory
+        subprocess.run(["pysealer", "init"], cwd=tmpdir, capture_output=True, text=True, input="n\n")
+        subprocess.run(["pysealer", "lock", tmpdir], capture_output=True, text=True)
+        result = subprocess.run(["pysealer", "check", "--jobs", "2", tmpdir], capture_output=True, text=True)
+        assert result.returncode == 0, f"pysealer check --jobs failed: {result.stdout} {result.stderr}"
+        reported = [line.split()[-1] for line in result.stdout.splitlines() if line.strip().startswith("✓")]
+        assert reported == [os.path.realpath(path) for path in paths], f"Unexpected order: {result.stdout}"
+
+def test_check_cache_skips_unchanged_files_but_not_tampered_ones():
+    """Test that the check cache serves unchanged files and never hides tampering."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_path = os.path.join(tmpdir, "sample.py")
+        with open(file_path, "w") as f:
+            f.write(SAMPLE_CODE)
+        # Initialize pysealer in the temp directory
+        subprocess.run(["pysealer", "init"], cwd=tmpdir, capture_output=True, text=True, input="n\n")
+        subprocess.run(["pysealer", "lock", tmpdir], capture_output=True, text=True)
+        for _ in range(2):
+            result = subprocess.run(["pysealer", "check", tmpdir], capture_output=True, text=True)
+            assert result.returncode == 0, f"pysealer check failed: {result.stdout} {result.stderr}"
+        assert os.path.exists(os.path.join(tmpdir, ".pysealer", "cache", "check.sqlite3")), "Check cache not created"
+        with open(file_path, "r") as f:
+            content = f.read()
+        with open(file_path, "w") as f:
+            f.write(content.replace("return 42", "return 43"))
+        result = subprocess.run(["pysealer", "check", tmpdir], capture_output=True, text=True)
+        assert result.returncode != 0, f"Cached check missed a tampered file: {result.stdout}"
+        result = subprocess.run(["pysealer", "cache", "prune", tmpdir], capture_output=True, text=True)
+        assert result.returncode == 0, f"pysealer cache prune failed: {result.stdout} {result.stderr}"
+
+def test_check_cache_catches_tampering_with_restored_mtime():
+    """Test that a same-size edit whose mtime is set back is not served from the check cache."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_path = os.path.join(tmpdir, "sample.py")
+        with open(file_path, "w") as f:
+            f.write(SAMPLE_CODE)
+        # Initialize pysealer in the temp directory
+        subprocess.run(["pysealer", "init"], cwd=tmpdir, capture_output=True, text=True, input="n\n")
+        subprocess.run(["pysealer", "lock", tmpdir], capture_output=True, text=True)
+        # Date the file well before the check, so its entry is not in the racy window
+        stat = os.stat(file_path)
+        os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns - 60_000_000_000))
+        stat = os.stat(file_path)
+        result = subprocess.run(["pysealer", "check", tmpdir], capture_output=True, text=True)
+        assert result.returncode == 0, f"pysealer check failed: {result.stdout} {result.stderr}"
+        
+        with open(file_path, "r") as f:
+            content = f.read()
+        with open(file_path, "w") as f:
+            f.write(content.replace("return 42", "return 43"))
+        os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        result = subprocess.run(["pysealer", "check", tmpdir], capture_output=True, text=True)
+        assert result.returncode != 0, f"Cached check trusted a file by its restored mtime: {result.stdout}"
+
+def test_check_cache_skips_files_edited_during_the_check():
+    """Test that results are not recorded for a file that changed between its cache lookup and store."""
+    from pysealer.check_cache import CheckCache
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_path = os.path.join(tmpdir, "sample.py")
+        with open(file_path, "w") as f:
+            f.write(SAMPLE_CODE)
+        cache = CheckCache(os.path.join(tmpdir, "cache"), "public key")
+        assert cache.lookup(file_path) is None
+        stat = os.stat(file_path)
+        with open(file_path, "w") as f:
+            f.write(SAMPLE_CODE.replace("return 42", "return 4242"))
+        valid = {"has_decorator": True, "valid": True, "signature": "seal", "message": "", "line_start": 2, "line_end": 3}
+        cache.store(file_path, {"foo": valid})
+        # The content hashed by lookup() must not be vouched for by results of other content
+        with open(file_path, "w") as f:
+            f.write(SAMPLE_CODE)
+        os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert cache.lookup(file_path) is None, "Content looked up before an edit was recorded as checked"
+        cache.close()
+
+def test_identical_symbols_are_verified_once():
+    """Test that the verdict memo verifies a function/class vendored in several files only once."""
+    from dotenv import dotenv_values
+    from pysealer import VerifyingKey
+    from pysealer.check_decorators import _verdict_memo, check_decorators, clear_verdict_memo
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = [os.path.join(tmpdir, "original.py"), os.path.join(tmpdir, "vendored.py")]
+        for path in paths:
+            with open(path, "w") as f:
+                f.write(SAMPLE_CODE)
+        # Initialize pysealer in the temp directory
+        subprocess.run(["pysealer", "init"], cwd=tmpdir, capture_output=True, text=True, input="n\n")
+        subprocess.run(["pysealer", "lock", paths[0]], capture_output=True, text=True)
+        with open(paths[0]) as f:
+            sealed = f.read()
+        with open(paths[1], "w") as f:
+            f.write(sealed)
+        env_path = os.environ.get("PYSEALER_ENV_PATH") or os.path.join(tmpdir, ".env")
+        verifying_key = VerifyingKey(dotenv_values(env_path)["PYSEALER_PUBLIC_KEY"])
+        clear_verdict_memo()
+        for path in paths:
+            results = check_decorators(path, verifying_key)
+            assert all(result["valid"] for result in results.values() if result["has_decorator"])
+        assert len(_verdict_memo) == 2, "Identical functions/classes should share one memo entry each"
+        with open(paths[1], "w") as f:
+            f.write(sealed.replace("return 42", "return 43"))
+        results = check_decorators(paths[1], verifying_key)
+        assert not results["foo"]["valid"], "Tampered function reported valid from the memo"
+        assert len(_verdict_memo) == 2, "Invalid verdicts must not be remembered"
+
+def test_check_results_load_source_on_access():
+    """Test that check results only store spans and read the signed source back when accessed."""
+    from pysealer.check_decorators import check_decorators
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_path = os.path.join(tmpdir, "sample.py")
+        with open(file_path, "w") as f:
+            f.write(SAMPLE_CODE)
+        # Initialize pysealer in the temp directory
+        subprocess.run(["pysealer", "init"], cwd=tmpdir, capture_output=True, text=True, input="n\n")
+        subprocess.run(["pysealer", "lock", file_path], capture_output=True, text=True)
+        result = check_decorators(file_path)["foo"]
+        assert result["valid"] and result["has_decorator"]
+        assert not hasattr(result, "__dict__"), "Results should be slotted records"
+        assert result._source is None, "Source should not be kept after verification"
+        assert result["source"] == "def foo():\n    return 42", f"Unexpected source: {result['source']!r}"
+        assert result["diff"] is None
+        assert set(dict(result)) == {"has_decorator", "valid", "signature", "message", "line_start", "line_end", "source", "diff"}
+
+def test_check_shows_diff_against_git_head():
+    """Test that 'pysealer check' shows the git diff of a tampered function."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_path = os.path.join(tmpdir, "sample.py")
+        with open(file_path, "w") as f:
+            f.write(SAMPLE_CODE)
+        subprocess.run(["git", "init", "-q"], cwd=tmpdir, check=True)
+        # Initialize pysealer in the temp directory
+        subprocess.run(["pysealer", "init"], cwd=tmpdir, capture_output=True, text=True, input="n\n")
+        subprocess.run(["pysealer", "lock", file_path], capture_output=True, text=True)
+        subprocess.run(["git", "add", "sample.py"], cwd=tmpdir, check=True)
+        subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-q", "--no-verify", "-m", "lock"], cwd=tmpdir, check=True)
+        with open(file_path, "r") as f:
+            content = f.read()
+        with open(file_path, "w") as f:
+            f.write(content.replace("return 42", "return 43"))
+        result = subprocess.run(["pysealer", "check", file_path], cwd=tmpdir, capture_output=True, text=True)
+        assert result.returncode != 0, f"pysealer check should fail on tampered file, got: {result.stdout}"
+        assert "Function 'foo' was modified" in result.stdout, f"Diff not shown: {result.stdout}"
+        assert "-    return 42" in result.stdout and "+    return 43" in result.stdout, f"Unexpected diff: {result.stdout}"
+
+def test_check_git_blobs_skips_verified_blobs():
+    """Test that 'pysealer check --git-blobs' records verified blobs and still catches tampering."""
+    import sqlite3
+    import time
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_path = os.path.join(tmpdir, "sample.py")
+        with open(file_path, "w") as f:
+            f.write(SAMPLE_CODE)
+        subprocess.run(["git", "init", "-q"], cwd=tmpdir, check=True)
+        # Initialize pysealer in the temp directory
+        subprocess.run(["pysealer", "init"], cwd=tmpdir, capture_output=True, text=True, input="n\n")
+        subprocess.run(["pysealer", "lock", file_path], capture_output=True, text=True)
+        # Written well before the check, so the verified content is known to be the blob's
+        old = time.time() - 3600
+        os.utime(file_path, (old, old))
+        subprocess.run(["git", "add", "sample.py"], cwd=tmpdir, check=True)
+        for _ in range(2):
+            result = subprocess.run(["pysealer", "check", "--git-blobs", "--no-cache", tmpdir], capture_output=True, text=True)
+            assert result.returncode == 0, f"pysealer check --git-blobs failed: {result.stdout} {result.stderr}"
+        connection = sqlite3.connect(os.path.join(tmpdir, ".pysealer", "cache", "check.sqlite3"))
+        assert connection.execute("SELECT COUNT(*) FROM verified_blobs").fetchone()[0] == 1
+        connection.close()
+        with open(file_path, "r") as f:
+            content = f.read()
+        with open(file_path, "w") as f:
+            f.write(content.replace("return 42", "return 43"))
+        result = subprocess.run(["pysealer", "check", "--git-blobs", tmpdir], capture_output=True, text=True)
+        assert result.returncode != 0, f"Modified file was trusted by its blob: {result.stdout}"
+
+def test_check_git_blobs_with_relative_folder(monkeypatch):
+    """Test that verified blobs are recorded and used when the folder is given as a relative path."""
+    import sqlite3
+    import time
+    from pysealer.check_decorators import check_decorators_in_folder
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.mkdir(os.path.join(tmpdir, "src"))
+        file_path = os.path.join(tmpdir, "src", "sample.py")
+        with open(file_path, "w") as f:
+            f.write(SAMPLE_CODE)
+        subprocess.run(["git", "init", "-q"], cwd=tmpdir, check=True)
+        # Initialize pysealer in the temp directory
+        subprocess.run(["pysealer", "init"], cwd=tmpdir, capture_output=True, text=True, input="n\n")
+        subprocess.run(["pysealer", "lock", file_path], capture_output=True, text=True)
+        # Written well before the check, so the verified content is known to be the blob's
+        old = time.time() - 3600
+        os.utime(file_path, (old, old))
+        subprocess.run(["git", "add", "."], cwd=tmpdir, check=True)
+        monkeypatch.chdir(tmpdir)
+        results = check_decorators_in_folder("src", use_git_blobs=True)
+        assert all(result["valid"] for result in results[os.path.join("src", "sample.py")].values() if result["has_decorator"])
+        connection = sqlite3.connect(os.path.join(tmpdir, ".pysealer", "cache", "check.sqlite3"))
+        assert connection.execute("SELECT COUNT(*) FROM verified_blobs").fetchone()[0] == 1, "Blob of a relative path was not recorded"
+        connection.close()
+
+def test_check_worker_processes_use_the_given_key():
+    """Test that iter_check_files verifies with the caller's key in worker processes too."""
+    from pysealer import VerifyingKey, generate_keypair
+    from pysealer.check_decorators import iter_check_files
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = [os.path.join(tmpdir, "first.py"), os.path.join(tmpdir, "second.py")]
+        for path in paths:
+            with open(path, "w") as f:
+                f.write(SAMPLE_CODE)
+        # Initialize pysealer in the temp directory
+        subprocess.run(["pysealer", "init"], cwd=tmpdir, capture_output=True, text=True, input="n\n")
+        subprocess.run(["pysealer", "lock", tmpdir], capture_output=True, text=True)
+        other_key = VerifyingKey(generate_keypair()[1])
+        for file_path, results in iter_check_files(paths, jobs=2, verifying_key=other_key):
+            assert not results["foo"]["valid"], f"{file_path} was verified with another key than the one given"
+
+def test_check_since_only_covers_changed_files():
+    """Test that 'lock --since' and 'check --since' only handle files changed since a git reference."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        changed_path = os.path.join(tmpdir, "changed.py")
+        unchanged_path = os.path.join(tmpdir, "unchanged.py")
+        for path in (changed_path, unchanged_path):
+            with open(path, "w") as f:
+                f.write(SAMPLE_CODE)
+        subprocess.run(["git", "init", "-q"], cwd=tmpdir, check=True)
+        subprocess.run(["git", "add", "."], cwd=tmpdir, check=True)
+        subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-q", "--no-verify", "-m", "base"], cwd=tmpdir, check=True)
+        # Initialize pysealer in the temp directory
+        subprocess.run(["pysealer", "init"], cwd=tmpdir, capture_output=True, text=True, input="n\n")
+        with open(changed_path, "w") as f:
+            f.write(SAMPLE_CODE.replace("return 42", "return 43"))
+        result = subprocess.run(["pysealer", "lock", "--since", "HEAD", tmpdir], capture_output=True, text=True)
+        assert result.returncode == 0, f"pysealer lock --since failed: {result.stdout} {result.stderr}"
+        with open(unchanged_path) as f:
+            assert "@pysealer" not in f.read(), "Unchanged file should not be locked"
+        result = subprocess.run(["pysealer", "check", "--since", "HEAD", tmpdir], capture_output=True, text=True)
+        assert result.returncode == 0, f"pysealer check --since failed: {result.stdout} {result.stderr}"
+        assert "unchanged.py" not in result.stdout
+        assert "changed.py: foo" in result.stdout, f"Changed symbols not reported: {result.stdout}"
+
+def test_check_ndjson_streams_one_record_per_file():
+    """Test that 'pysealer check --format ndjson' prints one JSON object per file and a summary."""
+    import json
+    with tempfile.TemporaryDirectory() as tmpdir:
+        clean_path = os.path.join(tmpdir, "clean.py")
+        tampered_path = os.path.join(tmpdir, "tampered.py")
+        for path in (clean_path, tampered_path):
+            with open(path, "w") as f:
+                f.write(SAMPLE_CODE)
+        # Initialize pysealer in the temp directory
+        subprocess.run(["pysealer", "init"], cwd=tmpdir, capture_output=True, text=True, input="n\n")
+        subprocess.run(["pysealer", "lock", tmpdir], capture_output=True, text=True)
+        with open(tampered_path, "r") as f:
+            content = f.read()
+        with open(tampered_path, "w") as f:
+            f.write(content.replace("return 42", "return 43"))
+        result = subprocess.run(["pysealer", "check", "--format", "ndjson", tmpdir], capture_output=True, text=True)
+        assert result.returncode != 0, f"pysealer check should fail on tampered folder, got: {result.stdout}"
+        records = [json.loads(line) for line in result.stdout.splitlines()]
+        statuses = {os.path.basename(record["file"]): record["status"] for record in records if "file" in record}
+        assert statuses == {"clean.py": "valid", "tampered.py": "invalid"}
+        assert records[-1] == {"summary": {"valid": 1, "invalid": 1, "error": 0, "unsealed": 0}}
+
+def test_check_profile_reports_phases_and_slowest_files():
+    """Test that 'pysealer check --profile' prints a phase breakdown to stderr and can dump pstats."""
+    import pstats
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_path = os.path.join(tmpdir, "sample.py")
+        with open(file_path, "w") as f:
+            f.write(SAMPLE_CODE)
+        # Initialize pysealer in the temp directory
+        subprocess.run(["pysealer", "init"], cwd=tmpdir, capture_output=True, text=True, input="n\n")
+        subprocess.run(["pysealer", "lock", file_path], capture_output=True, text=True)
+        stats_path = os.path.join(tmpdir, "check.pstats")
+        result = subprocess.run(["pysealer", "check", "--profile", "--profile-stats", stats_path, tmpdir, "--no-cache"], capture_output=True, text=True)
+        assert result.returncode == 0, f"pysealer check --profile failed: {result.stdout} {result.stderr}"
+        assert "Profile:" in result.stderr and "env" in result.stderr, f"No phase breakdown: {result.stderr}"
+        assert "Slowest files (1 of 1):" in result.stderr and file_path in result.stderr
+        assert "Profile:" not in result.stdout, "The breakdown must not mix with the command output"
+        assert pstats.Stats(stats_path).total_calls > 0
+
+def test_async_check_matches_sync_check_and_shows_diff(monkeypatch):
+    """Test that pysealer.aio checks a folder like check_decorators_in_folder and computes diffs with async git."""
+    import asyncio
+    from pysealer import aio
+    from pysealer.check_decorators import check_decorators_in_folder
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = [os.path.join(tmpdir, f"module_{index}.py") for index in range(3)]
+        for path in paths:
+            with open(path, "w") as f:
+                f.write(SAMPLE_CODE)
+        subprocess.run(["git", "init", "-q"], cwd=tmpdir, check=True)
+        # Initialize pysealer in the temp directory
+        subprocess.run(["pysealer", "init"], cwd=tmpdir, capture_output=True, text=True, input="n\n")
+        monkeypatch.chdir(tmpdir)
+        assert asyncio.run(aio.lock_folder(tmpdir, concurrency=2)) == paths
+        subprocess.run(["git", "add", "."], cwd=tmpdir, check=True)
+        subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-q", "--no-verify", "-m", "lock"], cwd=tmpdir, check=True)
+        with open(paths[1]) as f:
+            content = f.read()
+        with open(paths[1], "w") as f:
+            f.write(content.replace("return 42", "return 43"))
+        
+        async_results = asyncio.run(aio.check_folder(tmpdir, concurrency=2))
+        sync_results = check_decorators_in_folder(tmpdir)
+        assert list(async_results) == list(sync_results) == paths
+        for path in paths:
+            assert {name: result["valid"] for name, result in async_results[path].items()} == \
+                {name: result["valid"] for name, result in sync_results[path].items()}
+        
+        async def check_with_diffs():
+            try:
+                return await aio.check_file(paths[1], with_diffs=True)
+            finally:
+                await aio.close_git_readers()
+        
+        results = asyncio.run(check_with_diffs())
+        assert not results["foo"]["valid"]
+        assert any(line[:2] == ("-", "    return 42") for line in results["foo"]["diff"]), f"Unexpected diff: {results['foo']['diff']}"
+        assert results["foo"]["diff"] == sync_results[paths[1]]["foo"]["diff"]
+
+def test_sealer_session_is_shared_across_threads():
+    """Test that one pysealer.Sealer built from a private key locks, checks and verifies symbols from several threads."""
+    from concurrent.futures import ThreadPoolExecutor
+    from pysealer import Sealer, generate_keypair
+    private_key, _ = generate_keypair()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        folders = [os.path.join(tmpdir, f"package_{index}") for index in range(4)]
+        for folder in folders:
+            os.mkdir(folder)
+            for index in range(3):
+                with open(os.path.join(folder, f"module_{index}.py"), "w") as f:
+                    f.write(SAMPLE_CODE)
+        
+        # No .env file anywhere: the session only uses the key it was given
+        with Sealer(private_key=private_key, jobs=2) as sealer, ThreadPoolExecutor(max_workers=4) as pool:
+            locked = list(pool.map(sealer.lock, folders))
+            assert [len(files) for files in locked] == [3, 3, 3, 3]
+            checked = list(pool.map(sealer.check, folders))
+            for results in checked:
+                assert all(result["valid"] for file_results in results.values() for result in file_results.values() if result["has_decorator"])
+            
+            target = os.path.join(folders[0], "module_1.py")
+            assert sealer.verify_symbol(target, "foo")["valid"]
+            with open(target) as f:
+                content = f.read()
+            with open(target, "w") as f:
+                f.write(content.replace("return 42", "return 43"))
+            assert not sealer.verify_symbol(target, "foo")["valid"]
+            assert not sealer.check(folders[0])[target]["foo"]["valid"]
+            with pytest.raises(ValueError):
+                sealer.verify_symbol(target, "missing")
+            
+            assert sealer.remove(folders[1]) == sorted(locked[1])
@@ -64,3 +64,106 @@ def test_decorate_handles_empty_file():
         with open(file_path) as f:
             content = f.read()
         assert "@pysealer_decorator" not in content, "Decorator should not be injected into empty file"
+
+NESTED_CODE = """
+import functools
+
+@functools.lru_cache()
+def outer():
+    def inner():
+        return 1
+    return inner
+
+class Outer:
+    def method(self):
+        return 'method'
+
+    class Inner:
+        pass
+
+async def fetch():
+    return None
+"""
+
+def test_native_engine_matches_python_fallback():
+    """Test that the native seal_file engine places the same decorators as the Python ast implementation."""
+    from pysealer import SigningKey, generate_keypair
+    from pysealer.add_decorators import _seal_natively, _seal_with_ast
+    private_key, _ = generate_keypair()
+    signing_key = SigningKey(private_key)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_path = os.path.join(tmpdir, "nested.py")
+        with open(file_path, "w") as f:
+            f.write(NESTED_CODE)
+        native_lines, native_added, _ = _seal_natively(file_path, NESTED_CODE, signing_key)
+        # Seal the result again so existing decorators are replaced as well
+        sealed = "\n".join(native_lines)
+        with open(file_path, "w") as f:
+            f.write(sealed)
+        assert native_added == 5
+        assert _seal_natively(file_path, sealed, signing_key) == _seal_with_ast(sealed, signing_key)
+    assert (native_lines, native_added, None) == _seal_with_ast(NESTED_CODE, signing_key)
+
+def test_decorate_folder_in_parallel():
+    """Test that 'pysealer lock --jobs' seals every file and leaves no temporary files behind."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = [os.path.join(tmpdir, f"module_{index}.py") for index in range(3)]
+        for path in paths:
+            with open(path, "w") as f:
+                f.write(SAMPLE_CODE)
+        # Initialize pysealer in the temp directory
+        subprocess.run(["pysealer", "init"], cwd=tmpdir, capture_output=True, text=True, input="n\n")
+        result = subprocess.run(["pysealer", "lock", "--jobs", "2", tmpdir], capture_output=True, text=True)
+        assert result.returncode == 0, f"pysealer lock --jobs failed: {result.stderr}"
+        assert sorted(os.listdir(tmpdir)) == sorted([".env"] + [os.path.basename(path) for path in paths])
+        for path in paths:
+            with open(path) as f:
+                decorator_lines = [line for line in f.read().splitlines() if line.strip().startswith("@pysealer._")]
+            assert len(decorator_lines) == 2, f"Decorators missing in {path}"
+        result = subprocess.run(["pysealer", "check", tmpdir], capture_output=True, text=True)
+        assert result.returncode == 0, f"pysealer check failed after parallel lock: {result.stdout}"
+
+def test_decorate_folder_skips_ignored_and_excluded_files():
+    """Test that locking a folder leaves virtualenvs, .gitignore'd and [tool.pysealer] excluded files alone."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        layout = ["pkg/module.py", ".venv/lib/vendored.py", "node_modules/tool/script.py",
+                  "generated/output.py", "env/lib/installed.py", "tests/fixtures/fixture.py"]
+        for relative_path in layout:
+            path = os.path.join(tmpdir, relative_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(SAMPLE_CODE)
+        with open(os.path.join(tmpdir, "env", "pyvenv.cfg"), "w") as f:
+            f.write("home = /usr/bin\n")
+        with open(os.path.join(tmpdir, ".gitignore"), "w") as f:
+            f.write("generated/\n")
+        with open(os.path.join(tmpdir, "pyproject.toml"), "w") as f:
+            f.write('[tool.pysealer]\nexclude = ["tests/fixtures"]\n')
+        # Initialize pysealer in the temp directory
+        subprocess.run(["pysealer", "init"], cwd=tmpdir, capture_output=True, text=True, input="n\n")
+        result = subprocess.run(["pysealer", "lock", tmpdir], capture_output=True, text=True)
+        assert result.returncode == 0, f"pysealer lock failed: {result.stderr}"
+        assert "Successfully added decorators to 1 file:" in result.stdout, f"Unexpected files locked: {result.stdout}"
+        for relative_path in layout:
+            with open(os.path.join(tmpdir, relative_path)) as f:
+                sealed = "@pysealer._" in f.read()
+            assert sealed == (relative_path == "pkg/module.py"), f"Wrong seal state for {relative_path}"
+
+def test_discovery_keeps_nested_build_packages_and_matches_gitignore_like_git():
+    """Test that only the project's own build/dist are skipped, and that .gitignore globs stop at '/' as in git."""
+    from pysealer.discovery import find_python_files
+    with tempfile.TemporaryDirectory() as tmpdir:
+        layout = ["build/lib/copy.py", "dist/copy.py", "pkg/build/steps.py", "pkg/dist/wheel.py",
+                  "docs/conf.py", "docs/examples/demo.py", "notes/a/deep/skip.py"]
+        for relative_path in layout:
+            path = os.path.join(tmpdir, relative_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(SAMPLE_CODE)
+        with open(os.path.join(tmpdir, "pyproject.toml"), "w") as f:
+            f.write("[project]\nname = 'sample'\n")
+        with open(os.path.join(tmpdir, ".gitignore"), "w") as f:
+            f.write("docs/*.py\nnotes/**/skip.py\n")
+        found = sorted(os.path.relpath(path, tmpdir).replace(os.sep, "/") for path in find_python_files(tmpdir))
+        assert found == ["docs/examples/demo.py", "pkg/build/steps.py", "pkg/dist/wheel.py"], f"Unexpected files: {found}"
+
@@ -0,0 +1,86 @@
+"""Tests for pysealer.install_import_guard(), the import-time verification hook."""
+
+import importlib.util
+import os
+import py_compile
+import subprocess
+import sys
+import tempfile
+
+SAMPLE_CODE = """
+def foo():
+    return 42
+
+class Bar:
+    def baz(self):
+        return 'baz'
+"""
+
+IMPORT_TOOL = "import pysealer; pysealer.install_import_guard(action={action!r}); import tool; print(tool.foo())"
+
+
+def _guard_env(tmpdir):
+    """Environment that keeps the guard's verdicts in a cache directory of the test."""
+    return dict(os.environ, XDG_CACHE_HOME=os.path.join(tmpdir, "cache"))
+
+
+def test_import_guard_refuses_tampered_module_and_caches_verdicts():
+    """Test that a sealed module imports once verified, with its verdict cached, and a tampered one is refused or warned about."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_path = os.path.join(tmpdir, "tool.py")
+        with open(file_path, "w") as f:
+            f.write(SAMPLE_CODE)
+        # Initialize pysealer in the temp directory
+        subprocess.run(["pysealer", "init"], cwd=tmpdir, capture_output=True, text=True, input="n\n")
+        subprocess.run(["pysealer", "lock", file_path], capture_output=True, text=True)
+        
+        for _ in range(2):
+            # Cold start verifies and records the verdict, warm start reuses it
+            result = subprocess.run([sys.executable, "-c", IMPORT_TOOL.format(action="raise")], cwd=tmpdir, capture_output=True, text=True, env=_guard_env(tmpdir))
+            assert result.returncode == 0, f"Guarded import of a sealed module failed: {result.stderr}"
+            assert result.stdout.strip() == "42"
+            assert len(os.listdir(os.path.join(tmpdir, "cache", "pysealer", "import-guard"))) == 1
+            assert not os.path.exists(os.path.join(tmpdir, "__pycache__", "tool.pysealer.json")), "Verdicts must not be kept next to the module"
+        
+        with open(file_path) as f:
+            content = f.read()
+        with open(file_path, "w") as f:
+            f.write(content.replace("return 42", "return 43"))
+        
+        result = subprocess.run([sys.executable, "-c", IMPORT_TOOL.format(action="raise")], cwd=tmpdir, capture_output=True, text=True, env=_guard_env(tmpdir))
+        assert result.returncode != 0, f"Tampered module was imported: {result.stdout}"
+        assert "TamperedModuleError" in result.stderr and "foo" in result.stderr, f"Unexpected error: {result.stderr}"
+        
+        result = subprocess.run([sys.executable, "-c", IMPORT_TOOL.format(action="warn")], cwd=tmpdir, capture_output=True, text=True, env=_guard_env(tmpdir))
+        assert result.returncode == 0 and result.stdout.strip() == "43"
+        assert "TamperedModuleWarning" in result.stderr, f"No warning for a tampered module: {result.stderr}"
+
+
+def test_import_guard_never_runs_tampered_bytecode():
+    """Test that a guarded module runs its verified source, not a tampered .pyc whose header matches that source."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_path = os.path.join(tmpdir, "tool.py")
+        with open(file_path, "w") as f:
+            f.write(SAMPLE_CODE)
+        # Initialize pysealer in the temp directory
+        subprocess.run(["pysealer", "init"], cwd=tmpdir, capture_output=True, text=True, input="n\n")
+        subprocess.run(["pysealer", "lock", file_path], capture_output=True, text=True)
+        with open(file_path) as f:
+            content = f.read()
+        stat = os.stat(file_path)
+        
+        # Compile a same-size tampered source under the clean source's mtime, then put the clean source back
+        with open(file_path, "w") as f:
+            f.write(content.replace("return 42", "return 43"))
+        os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        py_compile.compile(file_path, cfile=importlib.util.cache_from_source(file_path), doraise=True)
+        with open(file_path, "w") as f:
+            f.write(content)
+        os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        
+        result = subprocess.run([sys.executable, "-c", "import tool; print(tool.foo())"], cwd=tmpdir, capture_output=True, text=True)
+        assert result.stdout.strip() == "43", "The unguarded import should run the tampered bytecode"
+        
+        result = subprocess.run([sys.executable, "-c", IMPORT_TOOL.format(action="raise")], cwd=tmpdir, capture_output=True, text=True, env=_guard_env(tmpdir))
+        assert result.returncode == 0, f"Guarded import of a sealed module failed: {result.stderr}"
+        assert result.stdout.strip() == "42", f"Guarded import ran the tampered bytecode: {result.stdout}"
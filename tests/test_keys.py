@@ -0,0 +1,85 @@
+"""Tests for the SigningKey/VerifyingKey handles exposed by the Rust extension."""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pysealer import SigningKey, VerifyingKey, digest, generate_keypair, generate_signature, verify_signature
+
+SOURCE = "def foo():\n    return 42"
+
+def test_handles_match_string_key_functions():
+    """Test that signing with a handle produces the same signature as signing with the key string."""
+    private_key, public_key = generate_keypair()
+    signing_key = SigningKey(private_key)
+    verifying_key = VerifyingKey(public_key)
+    signature = signing_key.sign(SOURCE)
+    assert signature == generate_signature(SOURCE, private_key)
+    assert verify_signature(SOURCE, signature, verifying_key)
+    assert str(signing_key.verifying_key()) == str(verifying_key)
+
+def test_bytes_and_buffers_are_accepted():
+    """Test that str, bytes and memoryview slices of the same data sign and verify identically."""
+    private_key, public_key = generate_keypair()
+    signing_key = SigningKey(private_key)
+    verifying_key = VerifyingKey(public_key)
+    buffer = ("# header\n" + SOURCE).encode()
+    segment = memoryview(buffer)[len("# header\n"):]
+    signature = signing_key.sign(SOURCE)
+    assert signing_key.sign(SOURCE.encode()) == signature
+    assert signing_key.sign(segment) == signature
+    assert verifying_key.verify_many([(SOURCE, signature), (segment, signature), (b"tampered", signature)]) == [True, True, False]
+
+def test_verification_from_threads():
+    """Test that one verifying key handle can be shared by a thread pool."""
+    private_key, public_key = generate_keypair()
+    signing_key = SigningKey(private_key)
+    verifying_key = VerifyingKey(public_key)
+    sources = [f"def f{i}():\n    return {i}" for i in range(64)]
+    signatures = signing_key.sign_many(sources)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        verdicts = list(pool.map(verifying_key.verify, sources, signatures))
+    assert all(verdicts)
+
+def test_invalid_key_is_rejected():
+    """Test that malformed keys raise ValueError when the handle is created."""
+    with pytest.raises(ValueError):
+        SigningKey("not-a-key")
+    with pytest.raises(ValueError):
+        VerifyingKey("abc")
+
+def test_digest_mode_signatures():
+    """Test that blake3 mode seals are tagged, verify transparently, and detect tampering."""
+    private_key, public_key = generate_keypair()
+    signing_key = SigningKey(private_key)
+    verifying_key = VerifyingKey(public_key)
+    signature = signing_key.sign(SOURCE, "blake3")
+    assert signature.startswith("b3_")
+    assert generate_signature(SOURCE, private_key, mode="blake3") == signature
+    assert verify_signature(SOURCE, signature, public_key)
+    assert verifying_key.verify_many([(SOURCE, signature), (SOURCE + " ", signature)]) == [True, False]
+    assert digest(SOURCE) == digest(SOURCE.encode()) != digest(SOURCE + " ")
+    with pytest.raises(ValueError):
+        signing_key.sign(SOURCE, "md5")
+
+def test_key_loader_cache(monkeypatch, tmp_path):
+    """Test that keys come from the environment first and that a rewritten .env file is picked up."""
+    from pysealer.setup import clear_key_cache, get_private_key, get_public_key, setup_keypair
+    env_path = tmp_path / ".env"
+    private_key, public_key = setup_keypair(env_path)
+    monkeypatch.delenv("PYSEALER_PRIVATE_KEY", raising=False)
+    monkeypatch.setenv("PYSEALER_ENV_PATH", str(env_path))
+    assert get_private_key() == private_key
+    assert get_public_key(env_path) == public_key
+    # A rewritten file is read again because its modification time changed
+    other_private_key, _ = generate_keypair()
+    env_path.write_text(f"PYSEALER_PRIVATE_KEY={other_private_key}\nPYSEALER_PUBLIC_KEY={public_key}\n")
+    os.utime(env_path, ns=(0, env_path.stat().st_mtime_ns + 1_000_000_000))
+    assert get_private_key() == other_private_key
+    # Keys set in the environment win without reading the file
+    monkeypatch.setenv("PYSEALER_PRIVATE_KEY", private_key)
+    env_path.unlink()
+    assert get_private_key() == private_key
+    clear_key_cache()
+    with pytest.raises(FileNotFoundError):
+        get_public_key(env_path)
@@ -0,0 +1,110 @@
+"""Tests for the 'pysealer watch' CLI command."""
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import pytest
+
+SAMPLE_CODE = """
+def foo():
+    return 42
+
+class Bar:
+    def baz(self):
+        return 'baz'
+"""
+
+# inotify is only available on Linux; elsewhere the watcher always polls
+BACKENDS = [
+    pytest.param(False, marks=pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")),
+    True,
+]
+
+@pytest.mark.parametrize("polling", BACKENDS)
+def test_watch_rechecks_only_changed_files(polling, monkeypatch):
+    """Test that the watcher reports a tampered file and a removed file, and leaves untouched files alone."""
+    from pysealer.watch import Watcher
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = [os.path.join(tmpdir, "tampered.py"), os.path.join(tmpdir, "untouched.py"), os.path.join(tmpdir, "removed.py")]
+        for path in paths:
+            with open(path, "w") as f:
+                f.write(SAMPLE_CODE)
+        # Initialize pysealer in the temp directory
+        subprocess.run(["pysealer", "init"], cwd=tmpdir, capture_output=True, text=True, input="n\n")
+        subprocess.run(["pysealer", "lock", tmpdir], capture_output=True, text=True)
+        # The watcher loads the key of the .env file found from the current directory
+        monkeypatch.chdir(tmpdir)
+        
+        watcher = Watcher(tmpdir, debounce=0.05, poll_interval=0.1, polling=polling)
+        assert watcher.backend == ("polling" if polling else "inotify")
+        initial = list(watcher.start())
+        assert sorted(event.file_path for event in initial) == sorted(paths)
+        assert all(event.results["foo"]["valid"] for event in initial)
+        
+        events = []
+        def collect():
+            for batch in watcher.changes():
+                events.extend(batch)
+                if len(events) >= 2:
+                    watcher.stop()
+        thread = threading.Thread(target=collect)
+        thread.start()
+        try:
+            with open(paths[0]) as f:
+                content = f.read()
+            with open(paths[0], "w") as f:
+                f.write(content.replace("return 42", "return 43"))
+            os.unlink(paths[2])
+            thread.join(timeout=10)
+        finally:
+            watcher.close()
+            thread.join()
+        
+        by_path = {event.file_path: event for event in events}
+        assert set(by_path) == {paths[0], paths[2]}, f"Unexpected events: {events}"
+        assert not by_path[paths[0]].results["foo"]["valid"]
+        assert by_path[paths[0]].results["Bar"]["valid"]
+        assert by_path[paths[2]].removed
+
+
+@pytest.mark.parametrize("polling", BACKENDS)
+def test_watch_sees_files_created_in_new_directories(polling, monkeypatch):
+    """Test that a file created in a directory made after the watch started, or in one without Python files, is checked."""
+    from pysealer.watch import Watcher
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with open(os.path.join(tmpdir, "module.py"), "w") as f:
+            f.write(SAMPLE_CODE)
+        os.mkdir(os.path.join(tmpdir, "empty"))
+        # Initialize pysealer in the temp directory
+        subprocess.run(["pysealer", "init"], cwd=tmpdir, capture_output=True, text=True, input="n\n")
+        monkeypatch.chdir(tmpdir)
+        
+        watcher = Watcher(tmpdir, debounce=0.05, poll_interval=0.1, polling=polling)
+        list(watcher.start())
+        created = [os.path.join(tmpdir, "empty", "first.py"), os.path.join(tmpdir, "new", "nested", "second.py")]
+        
+        events = []
+        def collect():
+            for batch in watcher.changes():
+                events.extend(batch)
+                if {event.file_path for event in events} >= set(created):
+                    watcher.stop()
+        thread = threading.Thread(target=collect)
+        thread.start()
+        try:
+            with open(created[0], "w") as f:
+                f.write(SAMPLE_CODE)
+            # Give the watcher time to add the new directories before the file appears in them
+            os.makedirs(os.path.dirname(created[1]))
+            time.sleep(1)
+            with open(created[1], "w") as f:
+                f.write(SAMPLE_CODE)
+            thread.join(timeout=10)
+        finally:
+            watcher.close()
+            thread.join()
+        
+        assert {event.file_path for event in events} >= set(created), f"Missed new files: {events}"